@@ -0,0 +1,99 @@
+"""Analytics endpoints backed by precomputed tables."""
+from datetime import date
+from flask import Blueprint, jsonify, request
+
+from models import CareerEvent
+from services.career_event_service import EVENT_TYPES, career_events_query, profiles_promoted_within
+from services.rollup_service import DIMENSIONS, company_transitions, tenure_distribution
+
+analytics_bp = Blueprint('analytics', __name__, url_prefix='/analytics')
+
+MAX_LIMIT = 1000
+
+
+def _date_arg(name):
+    value = request.args.get(name)
+    return date.fromisoformat(value) if value else None
+
+
+def _limit_arg(default=100):
+    """``limit`` from the query string capped at ``MAX_LIMIT``, or raise ValueError."""
+    limit = request.args.get('limit', default, type=int)
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    return min(limit, MAX_LIMIT)
+
+
+def _event_to_dict(event):
+    return {
+        'id': event.id,
+        'profile_id': event.profile_id,
+        'event_type': event.event_type,
+        'event_date': event.event_date.isoformat(),
+        'from_company': event.from_company,
+        'to_company': event.to_company,
+        'from_role': event.from_role,
+        'to_role': event.to_role,
+        'seniority_delta': event.seniority_delta,
+        'company_tenure_months': event.company_tenure_months,
+        'gap_months': event.gap_months
+    }
+
+
+@analytics_bp.route('/career-events', methods=['GET'])
+def list_career_events():
+    """List career events filtered by type, company, tenure and date range."""
+    event_type = request.args.get('type')
+    if event_type and event_type not in EVENT_TYPES:
+        return jsonify({"error": f"Unknown event type '{event_type}'"}), 400
+    try:
+        since, until = _date_arg('since'), _date_arg('until')
+        within_months = request.args.get('within_months', type=int)
+        limit = _limit_arg()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = career_events_query(event_type, company=request.args.get('company'),
+                                within_months=within_months, since=since, until=until)
+    events = query.order_by(CareerEvent.event_date.desc(), CareerEvent.id).limit(limit).all()
+    return jsonify([_event_to_dict(event) for event in events])
+
+
+@analytics_bp.route('/promotions', methods=['GET'])
+def promoted_profiles():
+    """Ids of profiles promoted at a company within a number of months of joining."""
+    company = request.args.get('company')
+    within_months = request.args.get('within_months', type=int)
+    if not company or within_months is None:
+        return jsonify({"error": "company and within_months are required"}), 400
+    try:
+        since, until = _date_arg('since'), _date_arg('until')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    profile_ids = profiles_promoted_within(company, within_months, since=since, until=until)
+    return jsonify({'company': company, 'within_months': within_months, 'profile_ids': profile_ids})
+
+
+@analytics_bp.route('/tenure', methods=['GET'])
+def tenure_stats():
+    """Tenure distributions with approximate percentiles by company, role type or start year."""
+    dimension = request.args.get('dimension', 'company')
+    if dimension not in DIMENSIONS:
+        return jsonify({"error": f"Unknown dimension '{dimension}'"}), 400
+    try:
+        limit = _limit_arg()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(tenure_distribution(dimension, key=request.args.get('key'), limit=limit))
+
+
+@analytics_bp.route('/transitions', methods=['GET'])
+def transition_stats():
+    """Company-to-company transition counts, optionally from or to one company."""
+    try:
+        limit = _limit_arg()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(company_transitions(from_company=request.args.get('from'),
+                                       to_company=request.args.get('to'), limit=limit))
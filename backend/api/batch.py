@@ -0,0 +1,139 @@
+"""Batch processing endpoints."""
+import json
+import time
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+
+from services.event_bus import event_bus
+from services.upload_service import ingest_in_background, spool_upload
+
+batch_bp = Blueprint('batch', __name__, url_prefix='/batch')
+
+CSV_CONTENT_TYPES = ('text/csv', 'application/csv', 'application/vnd.ms-excel')
+
+
+def _batch_service():
+    return current_app.extensions['batch_service']
+
+
+def _upload_format(filename, content_type):
+    if (filename or '').lower().endswith('.csv') or (content_type or '').startswith(CSV_CONTENT_TYPES):
+        return 'csv'
+    return 'text'
+
+
+@batch_bp.route('/profiles', methods=['POST'])
+def submit_batch():
+    """Submit a batch of names or LinkedIn URLs.
+
+    Accepts a multipart upload in the ``file`` field, or the raw request body
+    as plain text or CSV. The upload is spooled to a temporary file and
+    streamed into the batch queue in the background; the job is returned at
+    once and its ``upload_report`` is filled in when ingestion finishes.
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        stream = upload.stream
+        fmt = _upload_format(upload.filename, upload.mimetype)
+        source = upload.filename
+    elif request.mimetype in ('text/plain',) + CSV_CONTENT_TYPES:
+        stream = request.stream
+        fmt = _upload_format(None, request.mimetype)
+        source = 'request-body'
+    else:
+        return jsonify({"error": "Expected a 'file' upload or a text/plain or text/csv body"}), 400
+
+    skip_existing = request.args.get('skip_existing', 'true').lower() != 'false'
+    spool = spool_upload(stream)
+    batch_service = _batch_service()
+    job = batch_service.create_job(source=source)
+    ingest_in_background(
+        current_app._get_current_object(), spool, job, batch_service, fmt=fmt,
+        chunk_size=current_app.config.get('BATCH_UPLOAD_CHUNK_SIZE', 1000),
+        skip_existing=skip_existing
+    )
+    current_app.logger.info(f"Batch job {job.id} submitted from {source}")
+    return jsonify(job.to_dict()), 202
+
+
+@batch_bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    """List all batch jobs, newest first."""
+    return jsonify([job.to_dict() for job in _batch_service().list_jobs()])
+
+
+@batch_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Return the status of a batch job."""
+    job = _batch_service().get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Batch job not found"}), 404
+    return jsonify(job.to_dict())
+
+
+@batch_bp.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a batch job."""
+    batch_service = _batch_service()
+    job = batch_service.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Batch job not found"}), 404
+    batch_service.cancel_job(job)
+    current_app.logger.info(f"Batch job {job.id} cancelled")
+    return jsonify(job.to_dict())
+
+
+def _sse(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@batch_bp.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Stream progress, per-item results and the final summary as Server-Sent Events.
+
+    The stream ends after the ``summary`` event. Jobs owned by another
+    process can be watched when the Postgres event bridge is enabled; those
+    streams carry throttled progress and the summary, without item events.
+    As this process cannot tell an unknown job from a remote one, or see a
+    remote job that has already finished, such a stream ends with a
+    ``timeout`` event after ``SSE_REMOTE_IDLE_SECONDS`` without events.
+    """
+    batch_service = _batch_service()
+    job = batch_service.get_job(job_id)
+    if job is None and event_bus.bridge is None:
+        return jsonify({"error": "Batch job not found"}), 404
+
+    keepalive = current_app.config.get('SSE_KEEPALIVE_SECONDS', 15)
+    max_idle = current_app.config.get('SSE_REMOTE_IDLE_SECONDS', 300)
+    # Subscribe before taking the snapshot so no event falls in between
+    subscription = event_bus.subscribe(batch_service.channel(job_id))
+
+    def stream():
+        try:
+            yield f"retry: {int(keepalive * 1000)}\n\n"
+            if job is not None:
+                if job.is_finished:
+                    yield _sse('summary', {'job': job.to_dict()})
+                    return
+                yield _sse('progress', {'job': job.progress()})
+
+            last_event = time.monotonic()
+            while True:
+                event = subscription.get(timeout=keepalive)
+                if event is None:
+                    idle = time.monotonic() - last_event
+                    if job is None and idle >= max_idle:
+                        yield _sse('timeout', {'job_id': job_id, 'idle_seconds': round(idle, 1)})
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                last_event = time.monotonic()
+                yield _sse(event['type'], event['data'])
+                if event['type'] == 'summary':
+                    return
+        finally:
+            subscription.close()
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
@@ -0,0 +1,224 @@
+"""Profile endpoints.
+
+Reads by id are served from pre-serialized profile documents. Listing,
+search, lookup, history and deletion by LinkedIn URL go through the shard
+set. Profile ids are only unique within a shard, so the endpoints taking
+ids serve unsharded deployments only and answer 400 when
+``SHARD_DATABASE_URLS`` is set.
+"""
+from datetime import datetime
+from flask import Blueprint, Response, jsonify, request
+from sqlalchemy import select
+
+from extensions import db
+from models import Profile
+from services.profile_documents import build_documents, digest, read_document, read_documents
+from services.shard_service import SORT_COLUMNS, shard_key, shard_set
+from services.version_archive import profile_history, version_as_of
+
+profiles_bp = Blueprint('profiles', __name__, url_prefix='/profiles')
+
+MAX_IDS = 500
+MAX_PAGE_SIZE = 500
+
+
+def _summary_to_dict(summary):
+    return {key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in summary.items()}
+
+
+def _page_args():
+    """``(limit, offset)`` from the query string, or raise ValueError."""
+    limit = request.args.get('limit', 50, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    if not 0 < limit <= MAX_PAGE_SIZE or offset < 0:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE} and offset at least 0")
+    return limit, offset
+
+
+def _version_to_dict(version):
+    return {
+        'version_number': version.version_number,
+        'valid_from': version.valid_from.isoformat(),
+        'valid_to': version.valid_to.isoformat() if version.valid_to else None,
+        'data': version.get_data()
+    }
+
+
+def _sharded_error():
+    """The error returned by the by-id endpoints when profiles are sharded, or None."""
+    if shard_set.sharded:
+        return jsonify({"error": "Profile ids are only unique within a shard; "
+                                 "look profiles up by linkedin_url under /profiles/by-url"}), 400
+    return None
+
+
+def _history_response(profile_id, session=None, archived=True):
+    """All versions of a profile, or the one valid at ``?as_of=``."""
+    as_of = request.args.get('as_of')
+    if as_of is None:
+        return jsonify([_version_to_dict(version)
+                        for version in profile_history(profile_id, session=session, archived=archived)])
+
+    try:
+        at = datetime.fromisoformat(as_of)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    version = version_as_of(profile_id, at, session=session, archived=archived)
+    if version is None:
+        return jsonify({"error": f"No version valid at {as_of}"}), 404
+    return jsonify(_version_to_dict(version))
+
+
+def _built(profile_id):
+    """``(document bytes, digest)`` built from the normalized tables, or None; nothing is stored."""
+    document = build_documents([profile_id]).get(profile_id)
+    return (document, digest(document)) if document is not None else None
+
+
+@profiles_bp.route('/<int:profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """A full profile as its stored document bytes, with an ETag.
+
+    A profile without a stored document is served from a freshly built one.
+    ``?verify=true`` rebuilds the document from the normalized tables,
+    serves the rebuilt one and reports in ``X-Document-Drift`` whether the
+    stored one differs. GETs never write: stored documents are repaired by
+    ``flask verify-profile-documents --repair``. Unsharded deployments only.
+    """
+    error = _sharded_error()
+    if error is not None:
+        return error
+    drift = None
+    stored = read_document(profile_id)
+    if request.args.get('verify') == 'true':
+        expected = _built(profile_id)
+        drift = expected is not None and (stored is None or stored[0] != expected[0])
+        stored = expected
+    elif stored is None:
+        stored = _built(profile_id)
+    if stored is None:
+        return jsonify({"error": "Profile not found"}), 404
+
+    document, digest = stored
+    response = Response(document, mimetype='application/json')
+    response.set_etag(digest)
+    if drift is not None:
+        response.headers['X-Document-Drift'] = 'true' if drift else 'false'
+    return response.make_conditional(request)
+
+
+@profiles_bp.route('', methods=['GET'])
+def get_profiles():
+    """Several full profiles, in the order of ``?ids=1,2,3``, as a JSON array of stored documents.
+
+    Missing documents are built for the response but not stored. Unsharded
+    deployments only.
+
+    Without ``ids``, a page of profile summaries across shards, ordered by
+    ``?sort=`` (name, linkedin_url, created_at or updated_at) and ``?order=``.
+    """
+    if 'ids' not in request.args:
+        return _list_profiles()
+    error = _sharded_error()
+    if error is not None:
+        return error
+    try:
+        profile_ids = [int(value) for value in request.args.get('ids', '').split(',') if value.strip()]
+    except ValueError:
+        return jsonify({"error": "ids must be a comma-separated list of integers"}), 400
+    if not profile_ids:
+        return jsonify({"error": "ids is required"}), 400
+    if len(profile_ids) > MAX_IDS:
+        return jsonify({"error": f"At most {MAX_IDS} ids per request"}), 400
+
+    documents = read_documents(profile_ids)
+    missing = [profile_id for profile_id in profile_ids if profile_id not in documents]
+    if missing:
+        documents.update(build_documents(missing))
+    body = b'[' + b','.join(documents[profile_id] for profile_id in profile_ids
+                            if profile_id in documents) + b']'
+    return Response(body, mimetype='application/json')
+
+
+@profiles_bp.route('/<int:profile_id>/history', methods=['GET'])
+def get_profile_history(profile_id):
+    """Every version of a profile, including archived ones; ``?as_of=`` returns the version valid then.
+
+    ``as_of`` is ISO 8601; times with an offset are converted to UTC, naive ones are taken as UTC.
+    Unsharded deployments only; ``/profiles/by-url/history`` works either way.
+    """
+    error = _sharded_error()
+    if error is not None:
+        return error
+    if db.session.get(Profile, profile_id) is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return _history_response(profile_id)
+
+
+def _list_profiles():
+    sort = request.args.get('sort', 'name')
+    if sort not in SORT_COLUMNS:
+        return jsonify({"error": f"sort must be one of {', '.join(SORT_COLUMNS)}"}), 400
+    try:
+        limit, offset = _page_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    summaries = shard_set.list_profiles(sort=sort, descending=request.args.get('order') == 'desc',
+                                        limit=limit, offset=offset)
+    return jsonify([_summary_to_dict(summary) for summary in summaries])
+
+
+@profiles_bp.route('/search', methods=['GET'])
+def search_profiles():
+    """Profiles whose name or any company contains ``?q=``, ordered by name, across shards."""
+    text = request.args.get('q', '').strip()
+    if not text:
+        return jsonify({"error": "q is required"}), 400
+    try:
+        limit, offset = _page_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify([_summary_to_dict(summary)
+                    for summary in shard_set.search_profiles(text, limit=limit, offset=offset)])
+
+
+@profiles_bp.route('/by-url', methods=['GET'])
+def get_profile_by_url():
+    """A profile and its children looked up on its shard by ``?linkedin_url=``."""
+    linkedin_url = request.args.get('linkedin_url')
+    if not linkedin_url:
+        return jsonify({"error": "linkedin_url is required"}), 400
+    document = shard_set.get_profile_document(linkedin_url)
+    if document is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return jsonify(document)
+
+
+@profiles_bp.route('/by-url/history', methods=['GET'])
+def get_profile_history_by_url():
+    """Versions of the profile at ``?linkedin_url=``, read from its shard; ``?as_of=`` as for ``/history``.
+
+    The version archive belongs to the application database, so archived
+    versions are included only when unsharded.
+    """
+    linkedin_url = request.args.get('linkedin_url')
+    if not linkedin_url:
+        return jsonify({"error": "linkedin_url is required"}), 400
+    with shard_set.session(shard_set.shard_for(linkedin_url), read_only=True) as session:
+        profile_id = session.execute(
+            select(Profile.id).where(Profile.linkedin_url == shard_key(linkedin_url))).scalar()
+        if profile_id is None:
+            return jsonify({"error": "Profile not found"}), 404
+        return _history_response(profile_id, session=session, archived=not shard_set.sharded)
+
+
+@profiles_bp.route('/by-url', methods=['DELETE'])
+def delete_profile_by_url():
+    """Delete the profile at ``?linkedin_url=`` with everything derived from it."""
+    linkedin_url = request.args.get('linkedin_url')
+    if not linkedin_url:
+        return jsonify({"error": "linkedin_url is required"}), 400
+    if not shard_set.delete_profile(linkedin_url):
+        return jsonify({"error": "Profile not found"}), 404
+    return '', 204
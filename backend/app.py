@@ -4,6 +4,14 @@ import os
 
 # Import extensions
 from extensions import db, migrate
+from services.audit_log import audit_log
+from services.batch_service import batch_service
+from services.event_bus import event_bus
+from services.profile_fetcher import profile_fetcher
+from services.refresh_scheduler import refresh_scheduler
+from services.replica_router import replica_router
+from services.shard_service import shard_set
+from services.version_archive import version_archive
 
 def create_app(config_name='default'):
     """Application factory function."""
@@ -22,11 +30,51 @@ def create_app(config_name='default'):
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
+    audit_log.init_app(app)
+    profile_fetcher.init_app(app)
+    batch_service.init_app(app, processor=profile_fetcher)
+    replica_router.init_app(app)
+    shard_set.init_app(app)
+    version_archive.init_app(app)
+    
+    # Relay job events between processes when running several workers
+    if app.config.get('EVENTS_PG_BRIDGE') and event_bus.bridge is None:
+        from services.event_bus import PostgresNotifyBridge
+        PostgresNotifyBridge(event_bus, app.config['SQLALCHEMY_DATABASE_URI']).start()
+    
+    from services.role_classifier import enable_ingest_classification, disable_ingest_classification
+    if app.config.get('ROLE_TYPE_CLASSIFY_ON_INGEST'):
+        enable_ingest_classification()
+    else:
+        disable_ingest_classification()
+    
+    from services.profile_documents import enable_document_maintenance, disable_document_maintenance
+    if app.config.get('PROFILE_DOCUMENTS_MAINTAINED'):
+        enable_document_maintenance()
+    else:
+        disable_document_maintenance()
+    
+    refresh_scheduler.init_app(app)
     
     # Import models to ensure they are registered with SQLAlchemy
-    from models import Profile, JobHistory, Education, ProfileTag, ProfileVersion
+    from models import (
+        Profile, JobHistory, Education, ProfileTag, ProfileVersion,
+        Skill, ProfileSkill, CareerEvent, ProfileAnalysisState,
+        TenureFact, TenureRollup, CompanyTransitionRollup, ReplicationHeartbeat,
+        AuditRecord, ProfileDocument, RefreshIssue
+    )
     
     # Register blueprints
+    from api.batch import batch_bp
+    app.register_blueprint(batch_bp)
+    from api.analytics import analytics_bp
+    app.register_blueprint(analytics_bp)
+    from api.profiles import profiles_bp
+    app.register_blueprint(profiles_bp)
+    
+    # Register CLI commands
+    from commands import register_commands
+    register_commands(app)
     
     # Health check endpoint
     @app.route('/health', methods=['GET'])
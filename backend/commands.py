@@ -0,0 +1,129 @@
+"""Flask CLI commands for batch analysis jobs."""
+import asyncio
+import json
+import tempfile
+import time
+import click
+
+
+def register_commands(app):
+    """Register the analysis commands on the app's CLI."""
+
+    @app.cli.command('extract-skills')
+    @click.option('--batch-size', default=500, show_default=True, help='Job descriptions per batch.')
+    @click.option('--workers', default=None, type=int, help='Worker processes (0 runs inline).')
+    @click.option('--full', is_flag=True, help='Reprocess every job, not only changed ones.')
+    def extract_skills_command(batch_size, workers, full):
+        """Extract skills from changed job descriptions."""
+        from services.skill_service import extract_skills
+        click.echo(json.dumps(extract_skills(batch_size=batch_size, workers=workers, full=full)))
+
+    @app.cli.command('classify-roles')
+    @click.option('--batch-size', default=1000, show_default=True, help='Jobs per batch.')
+    @click.option('--full', is_flag=True, help='Reclassify every automatically classified job.')
+    def classify_roles_command(batch_size, full):
+        """Fill role_type for unclassified or changed jobs."""
+        from services.role_classifier import classify_role_types
+        click.echo(json.dumps(classify_role_types(batch_size=batch_size, full=full)))
+
+    @app.cli.command('detect-career-events')
+    @click.option('--batch-size', default=500, show_default=True, help='Profiles per batch.')
+    @click.option('--full', is_flag=True, help='Recompute every profile, not only changed ones.')
+    def detect_career_events_command(batch_size, full):
+        """Recompute career events for profiles whose jobs changed."""
+        from services.career_event_service import refresh_career_events
+        click.echo(json.dumps(refresh_career_events(batch_size=batch_size, full=full)))
+
+    @app.cli.command('run-refresh-scheduler')
+    def run_refresh_scheduler_command():
+        """Run the refresh scheduler and the batch workers that fetch its refreshes."""
+        from services.batch_service import batch_service
+        from services.refresh_scheduler import refresh_scheduler
+        click.echo(f"Refresh scheduler running every {refresh_scheduler.interval_seconds}s "
+                   f"with a budget of {refresh_scheduler.budget} per {refresh_scheduler.window_seconds}s")
+        batch_service.start()
+        try:
+            refresh_scheduler.run_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            batch_service.stop()
+
+    @app.cli.command('refresh-rollups')
+    @click.option('--batch-size', default=500, show_default=True, help='Profiles per batch.')
+    @click.option('--full', is_flag=True, help='Rebuild every rollup, not only changed cohorts.')
+    def refresh_rollups_command(batch_size, full):
+        """Refresh tenure and transition rollups from profiles whose jobs changed."""
+        from services.rollup_service import refresh_rollups
+        click.echo(json.dumps(refresh_rollups(batch_size=batch_size, full=full)))
+
+    @app.cli.command('rebalance-shards')
+    @click.option('--batch-size', default=500, show_default=True, help='Profiles scanned per batch.')
+    @click.option('--dry-run', is_flag=True, help='Only report the moves that would be made.')
+    def rebalance_shards_command(batch_size, dry_run):
+        """Move profiles that are not on the shard their LinkedIn URL hashes to."""
+        from services.shard_service import shard_set
+        click.echo(json.dumps(shard_set.rebalance(batch_size=batch_size, dry_run=dry_run)))
+
+    @app.cli.command('export-profiles')
+    @click.option('--batch-size', default=500, show_default=True, help='Profiles read per shard query.')
+    def export_profiles_command(batch_size):
+        """Write every profile across all shards as JSON lines, ordered by LinkedIn URL."""
+        from services.shard_service import shard_set
+        for document in shard_set.export_profiles(batch_size=batch_size):
+            click.echo(json.dumps(document))
+
+    @app.cli.command('verify-profile-documents')
+    @click.option('--batch-size', default=500, show_default=True, help='Profiles per batch.')
+    @click.option('--repair', is_flag=True, help='Rewrite drifted and missing documents.')
+    def verify_profile_documents_command(batch_size, repair):
+        """Compare stored profile documents with the normalized tables."""
+        from services.profile_documents import verify_documents
+        click.echo(json.dumps(verify_documents(batch_size=batch_size, repair=repair)))
+
+    @app.cli.command('rebuild-profile-documents')
+    @click.option('--batch-size', default=500, show_default=True, help='Profiles per batch.')
+    def rebuild_profile_documents_command(batch_size):
+        """Rebuild every stored profile document."""
+        from services.profile_documents import rebuild_documents
+        click.echo(json.dumps(rebuild_documents(batch_size=batch_size)))
+
+    @app.cli.command('archive-versions')
+    @click.option('--batch-size', default=10000, show_default=True, help='Versions per segment.')
+    @click.option('--older-than-days', default=None, type=int,
+                  help='Archive versions closed this many days ago (default VERSION_ARCHIVE_AFTER_DAYS).')
+    def archive_versions_command(batch_size, older_than_days):
+        """Move closed profile versions past the cutoff into archive segments."""
+        from datetime import datetime, timedelta
+        from services.version_archive import version_archive
+        cutoff = None
+        if older_than_days is not None:
+            cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        click.echo(json.dumps(version_archive.archive(cutoff=cutoff, batch_size=batch_size)))
+
+    @app.cli.command('benchmark-fetch')
+    @click.option('--count', default=1000, show_default=True, help='Distinct profile URLs.')
+    @click.option('--concurrency', default=64, show_default=True, help='Concurrent requests.')
+    @click.option('--latency', default=0.005, show_default=True, help='Stub server latency in seconds.')
+    def benchmark_fetch_command(count, concurrency, latency):
+        """Benchmark the fetch client against the local stub server, cold and then revalidated."""
+        from services.fetch_client import AsyncFetchClient
+        from utils.stub_server import StubServer
+
+        async def run(client, urls):
+            started = time.monotonic()
+            await client.get_many(urls)
+            return time.monotonic() - started
+
+        with StubServer(latency=latency) as server, tempfile.TemporaryDirectory() as cache_dir:
+            urls = [server.url(f"user-{i}") for i in range(count)]
+            with AsyncFetchClient(max_concurrency=concurrency, cache_dir=cache_dir,
+                                  max_connections_per_host=concurrency) as client:
+                report = {}
+                for phase in ('cold', 'revalidate'):
+                    elapsed = asyncio.run(run(client, urls))
+                    report[phase] = {'seconds': round(elapsed, 3),
+                                     'requests_per_second': round(count / elapsed, 1)}
+                report['client'] = client.client.stats()
+                report['server'] = dict(server.counters)
+        click.echo(json.dumps(report))
@@ -4,11 +4,104 @@ from dotenv import load_dotenv
 # Load environment variables from .env file if it exists
 load_dotenv()
 
+def parse_weights(value):
+    """Parse ``"vip:3,watchlist:2"`` into ``{'vip': 3.0, 'watchlist': 2.0}``."""
+    weights = {}
+    for entry in (value or '').split(','):
+        if ':' in entry:
+            key, weight = entry.rsplit(':', 1)
+            weights[key.strip()] = float(weight)
+    return weights
+
+def parse_urls(value):
+    """Parse ``"a=sqlite:///a.db,b=sqlite:///b.db"`` into ``{'a': 'sqlite:///a.db', ...}``."""
+    urls = {}
+    for entry in (value or '').split(','):
+        if '=' in entry:
+            name, url = entry.split('=', 1)
+            urls[name.strip()] = url.strip()
+    return urls
+
 class Config:
     """Base configuration."""
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-key-please-change-in-production')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Batch processing. Uploads block once BATCH_QUEUE_SIZE items are
+    # waiting; workers start with the first queued item when enabled.
+    # Finished jobs are kept for BATCH_JOB_TTL_SECONDS.
+    BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', 4))
+    BATCH_UPLOAD_CHUNK_SIZE = int(os.environ.get('BATCH_UPLOAD_CHUNK_SIZE', 1000))
+    BATCH_QUEUE_SIZE = int(os.environ.get('BATCH_QUEUE_SIZE', 10000))
+    BATCH_WORKERS_ENABLED = os.environ.get('BATCH_WORKERS_ENABLED', 'true') == 'true'
+    BATCH_JOB_TTL_SECONDS = int(os.environ.get('BATCH_JOB_TTL_SECONDS', 3600))
+    
+    # Job progress events: seconds between SSE keepalives, seconds a stream
+    # for a job owned by another process may go without events before it is
+    # closed, whether to relay events between processes with Postgres
+    # LISTEN/NOTIFY, and the minimum seconds between relayed progress events
+    # per job
+    SSE_KEEPALIVE_SECONDS = int(os.environ.get('SSE_KEEPALIVE_SECONDS', 15))
+    SSE_REMOTE_IDLE_SECONDS = int(os.environ.get('SSE_REMOTE_IDLE_SECONDS', 300))
+    EVENTS_PG_BRIDGE = os.environ.get('EVENTS_PG_BRIDGE') == 'true'
+    EVENTS_PROGRESS_INTERVAL_SECONDS = float(os.environ.get('EVENTS_PROGRESS_INTERVAL_SECONDS', 0.5))
+    
+    # Staleness-driven refresh scheduler, run by "flask run-refresh-scheduler".
+    # The budget is the number of refresh requests allowed per window on the
+    # shared LinkedIn token, across all processes; tag priorities are given
+    # as "tag:weight,tag:weight".
+    REFRESH_BUDGET_PER_WINDOW = int(os.environ.get('REFRESH_BUDGET_PER_WINDOW', 100))
+    REFRESH_WINDOW_SECONDS = int(os.environ.get('REFRESH_WINDOW_SECONDS', 3600))
+    REFRESH_INTERVAL_SECONDS = int(os.environ.get('REFRESH_INTERVAL_SECONDS', 300))
+    REFRESH_MIN_AGE_HOURS = float(os.environ.get('REFRESH_MIN_AGE_HOURS', 24))
+    REFRESH_TAG_PRIORITIES = parse_weights(os.environ.get('REFRESH_TAG_PRIORITIES', ''))
+    
+    # Classify role types of new and edited jobs as they are saved
+    ROLE_TYPE_CLASSIFY_ON_INGEST = os.environ.get('ROLE_TYPE_CLASSIFY_ON_INGEST', 'true') == 'true'
+    
+    # Optional read replica. Read-only requests use it unless the client
+    # wrote within REPLICA_PIN_SECONDS or it lags more than REPLICA_MAX_LAG_SECONDS.
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 30))
+    REPLICA_LAG_CHECK_SECONDS = float(os.environ.get('REPLICA_LAG_CHECK_SECONDS', 5))
+    REPLICA_PIN_SECONDS = float(os.environ.get('REPLICA_PIN_SECONDS', 10))
+    
+    # Optional hash-sharded profile storage, given as "name=url,name=url".
+    # Shard names determine placement, so keep them stable when adding shards.
+    SHARD_DATABASE_URLS = parse_urls(os.environ.get('SHARD_DATABASE_URLS', ''))
+    SHARD_MAX_WORKERS = int(os.environ.get('SHARD_MAX_WORKERS', 8))
+    
+    # Write-behind audit log. Sinks are "db" and/or "jsonl" (segments in
+    # AUDIT_LOG_DIR); producers wait at most AUDIT_ENQUEUE_TIMEOUT_SECONDS
+    # for room in the queue before a record is dropped. Records a sink keeps
+    # failing on end up in a dead-letter file in AUDIT_LOG_DIR.
+    AUDIT_SINKS = [s.strip() for s in os.environ.get('AUDIT_SINKS', 'db').split(',') if s.strip()]
+    AUDIT_LOG_DIR = os.environ.get(
+        'AUDIT_LOG_DIR', os.path.join(os.path.abspath(os.path.dirname(__file__)), 'logs', 'audit'))
+    AUDIT_QUEUE_SIZE = int(os.environ.get('AUDIT_QUEUE_SIZE', 10000))
+    AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 500))
+    AUDIT_FLUSH_INTERVAL_SECONDS = float(os.environ.get('AUDIT_FLUSH_INTERVAL_SECONDS', 1.0))
+    AUDIT_ENQUEUE_TIMEOUT_SECONDS = float(os.environ.get('AUDIT_ENQUEUE_TIMEOUT_SECONDS', 0.01))
+    AUDIT_SEGMENT_MAX_BYTES = int(os.environ.get('AUDIT_SEGMENT_MAX_BYTES', 64 * 1024 * 1024))
+    
+    # Fetch client for the LinkedIn data source: shared token, response cache
+    # directory for conditional requests, and keep-alive pool size per host
+    LINKEDIN_API_TOKEN = os.environ.get('LINKEDIN_API_TOKEN')
+    LINKEDIN_API_BASE_URL = os.environ.get('LINKEDIN_API_BASE_URL', 'https://api.linkedin.com')
+    FETCH_CACHE_DIR = os.environ.get(
+        'FETCH_CACHE_DIR', os.path.join(os.path.abspath(os.path.dirname(__file__)), 'cache', 'fetch'))
+    FETCH_MAX_CONNECTIONS_PER_HOST = int(os.environ.get('FETCH_MAX_CONNECTIONS_PER_HOST', 16))
+    FETCH_TIMEOUT_SECONDS = float(os.environ.get('FETCH_TIMEOUT_SECONDS', 10))
+    
+    # Keep pre-serialized profile documents up to date as changes are committed
+    PROFILE_DOCUMENTS_MAINTAINED = os.environ.get('PROFILE_DOCUMENTS_MAINTAINED', 'true') == 'true'
+    
+    # Closed profile versions older than VERSION_ARCHIVE_AFTER_DAYS are moved
+    # from the database into segment files in VERSION_ARCHIVE_DIR
+    VERSION_ARCHIVE_DIR = os.environ.get(
+        'VERSION_ARCHIVE_DIR', os.path.join(os.path.abspath(os.path.dirname(__file__)), 'archive', 'versions'))
+    VERSION_ARCHIVE_AFTER_DAYS = int(os.environ.get('VERSION_ARCHIVE_AFTER_DAYS', 365))
+    
     # Use SQLite for local development and PostgreSQL in Docker
     if os.environ.get('DOCKER_ENV') == 'true':
         SQLALCHEMY_DATABASE_URI = os.environ.get(
@@ -30,6 +123,8 @@ class DevelopmentConfig(Config):
 class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
+    AUDIT_SINKS = []
+    BATCH_WORKERS_ENABLED = False
     
     # Use in-memory SQLite for testing when not in Docker
     if os.environ.get('DOCKER_ENV') == 'true':
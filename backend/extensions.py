@@ -2,6 +2,8 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 
+from utils.db_routing import RoutingSession
+
 # Initialize extensions
-db = SQLAlchemy()
-migrate = Migrate()
\ No newline at end of file
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+migrate = Migrate()
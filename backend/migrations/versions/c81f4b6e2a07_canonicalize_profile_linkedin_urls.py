@@ -0,0 +1,42 @@
+"""Store profile LinkedIn URLs in canonical form
+
+Revision ID: c81f4b6e2a07
+Revises: 7d3e5a1c9b24
+Create Date: 2026-10-20 10:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from utils.linkedin import canonicalize_linkedin_url
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81f4b6e2a07'
+down_revision = '7d3e5a1c9b24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rewrite stored URLs to their canonical form. Rows whose canonical URL
+    # is already taken by another profile are left as they are.
+    conn = op.get_bind()
+    profiles = sa.table('profiles', sa.column('id', sa.Integer), sa.column('linkedin_url', sa.String))
+    rows = conn.execute(sa.select(profiles.c.id, profiles.c.linkedin_url)).all()
+    taken = {url for _, url in rows}
+    for profile_id, url in rows:
+        try:
+            canonical = canonicalize_linkedin_url(url)
+        except ValueError:
+            continue
+        if canonical == url or canonical in taken:
+            continue
+        conn.execute(profiles.update().where(profiles.c.id == profile_id).values(linkedin_url=canonical))
+        taken.discard(url)
+        taken.add(canonical)
+
+
+def downgrade():
+    # The original URL forms are not kept
+    pass
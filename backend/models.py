@@ -5,6 +5,7 @@ from flask_sqlalchemy import SQLAlchemy
 
 # Import db from a separate module to avoid circular imports
 from extensions import db
+from utils.linkedin import canonicalize_linkedin_url
 
 class Profile(db.Model):
     """Profile model representing a LinkedIn user profile."""
@@ -23,18 +24,15 @@ class Profile(db.Model):
     education = db.relationship('Education', back_populates='profile', cascade='all, delete-orphan')
     tags = db.relationship('ProfileTag', back_populates='profile', cascade='all, delete-orphan')
     versions = db.relationship('ProfileVersion', back_populates='profile', cascade='all, delete-orphan')
+    skills = db.relationship('ProfileSkill', back_populates='profile', cascade='all, delete-orphan')
+    career_events = db.relationship('CareerEvent', back_populates='profile', cascade='all, delete-orphan')
+    analysis_state = db.relationship('ProfileAnalysisState', back_populates='profile', uselist=False,
+                                     cascade='all, delete-orphan')
     
     @validates('linkedin_url')
     def validate_linkedin_url(self, key, url):
-        """Validate that the LinkedIn URL is properly formatted."""
-        if not url:
-            raise ValueError("LinkedIn URL cannot be empty")
-        
-        if not url.startswith(('https://www.linkedin.com/', 'http://www.linkedin.com/', 
-                              'https://linkedin.com/', 'http://linkedin.com/')):
-            raise ValueError("Invalid LinkedIn URL format")
-        
-        return url
+        """Validate the LinkedIn URL and store its canonical form, so lookups by URL match."""
+        return canonicalize_linkedin_url(url)
     
     def __repr__(self):
         return f"<Profile {self.name} ({self.id})>"
@@ -55,11 +53,16 @@ class JobHistory(db.Model):
     end_date = db.Column(db.Date, nullable=True)
     is_current = db.Column(db.Boolean, default=False)
     description = db.Column(db.Text, nullable=True)
+    # updated_at values the last skill extraction / role classification saw;
+    # they differ from updated_at when the row changed since
+    skills_extracted_at = db.Column(db.DateTime, nullable=True)
+    role_type_classified_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationship
     profile = db.relationship('Profile', back_populates='jobs')
+    skills = db.relationship('ProfileSkill', back_populates='job', cascade='all, delete-orphan')
     
     def __repr__(self):
         return f"<JobHistory {self.role} at {self.company_name} ({self.id})>"
@@ -136,4 +139,248 @@ class ProfileVersion(db.Model):
         self.data_snapshot = json.dumps(data)
     
     def __repr__(self):
-        return f"<ProfileVersion {self.version_number} for profile {self.profile_id}>"
\ No newline at end of file
+        return f"<ProfileVersion {self.version_number} for profile {self.profile_id}>"
+
+
+class Skill(db.Model):
+    """Skill model for the dictionary of skills extracted from job descriptions."""
+    __tablename__ = 'skills'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True, index=True)
+    aliases = db.Column(db.Text, nullable=True)  # JSON list of alternative spellings
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationship
+    profile_skills = db.relationship('ProfileSkill', back_populates='skill', cascade='all, delete-orphan')
+    
+    def get_aliases(self):
+        """Deserialize the JSON alias list."""
+        return json.loads(self.aliases) if self.aliases else []
+    
+    def set_aliases(self, aliases):
+        """Serialize aliases to JSON for storage."""
+        self.aliases = json.dumps(sorted(set(aliases)))
+    
+    def __repr__(self):
+        return f"<Skill {self.name} ({self.id})>"
+
+
+class ProfileSkill(db.Model):
+    """ProfileSkill model linking a skill to the job description it was found in."""
+    __tablename__ = 'profile_skills'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    profile_id = db.Column(db.Integer, db.ForeignKey('profiles.id'), nullable=False, index=True)
+    job_history_id = db.Column(db.Integer, db.ForeignKey('job_history.id'), nullable=False, index=True)
+    skill_id = db.Column(db.Integer, db.ForeignKey('skills.id'), nullable=False, index=True)
+    mention_count = db.Column(db.Integer, nullable=False, default=1)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    profile = db.relationship('Profile', back_populates='skills')
+    job = db.relationship('JobHistory', back_populates='skills')
+    skill = db.relationship('Skill', back_populates='profile_skills')
+    
+    # Composite unique constraint
+    __table_args__ = (
+        db.UniqueConstraint('job_history_id', 'skill_id', name='uix_job_skill'),
+    )
+    
+    def __repr__(self):
+        return f"<ProfileSkill {self.skill_id} for job {self.job_history_id}>"
+
+
+
+class CareerEvent(db.Model):
+    """CareerEvent model for moves derived from a profile's ordered job history."""
+    __tablename__ = 'career_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    profile_id = db.Column(db.Integer, db.ForeignKey('profiles.id'), nullable=False, index=True)
+    event_type = db.Column(db.String(50), nullable=False)  # promotion, lateral_move, company_change, gap
+    event_date = db.Column(db.Date, nullable=False)
+    from_job_id = db.Column(db.Integer, db.ForeignKey('job_history.id', ondelete='SET NULL'), nullable=True)
+    to_job_id = db.Column(db.Integer, db.ForeignKey('job_history.id', ondelete='SET NULL'), nullable=True)
+    from_company = db.Column(db.String(255), nullable=True)
+    to_company = db.Column(db.String(255), nullable=True)
+    company_key = db.Column(db.String(255), nullable=True)  # normalized name of the company moved into
+    from_role = db.Column(db.String(255), nullable=True)
+    to_role = db.Column(db.String(255), nullable=True)
+    seniority_delta = db.Column(db.Float, nullable=True)
+    company_tenure_months = db.Column(db.Integer, nullable=True)  # months at the company before the event
+    gap_months = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationship
+    profile = db.relationship('Profile', back_populates='career_events')
+    
+    __table_args__ = (
+        db.Index('ix_career_events_type_company_date', 'event_type', 'company_key', 'event_date'),
+        db.Index('ix_career_events_type_date', 'event_type', 'event_date'),
+    )
+    
+    def __repr__(self):
+        return f"<CareerEvent {self.event_type} for profile {self.profile_id} on {self.event_date}>"
+
+
+class ProfileAnalysisState(db.Model):
+    """ProfileAnalysisState model recording which job history each derived analysis was built from."""
+    __tablename__ = 'profile_analysis_state'
+    
+    profile_id = db.Column(db.Integer, db.ForeignKey('profiles.id'), primary_key=True)
+    # "<job count>:<classified job count>:<max job id>:<max job updated_at>" at the time of the last run
+    career_events_signature = db.Column(db.String(100), nullable=True)
+    rollups_signature = db.Column(db.String(100), nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationship
+    profile = db.relationship('Profile', back_populates='analysis_state')
+    
+    def __repr__(self):
+        return f"<ProfileAnalysisState for profile {self.profile_id}>"
+
+
+class TenureFact(db.Model):
+    """TenureFact model holding one job's contribution to the cohort rollups.
+    
+    Derived from job_history and rebuilt per profile, so it carries no foreign
+    keys; facts of deleted profiles are found and removed by the next refresh.
+    """
+    __tablename__ = 'tenure_facts'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    profile_id = db.Column(db.Integer, nullable=False, index=True)
+    job_history_id = db.Column(db.Integer, nullable=False)
+    company_key = db.Column(db.String(255), nullable=False)
+    company_name = db.Column(db.String(255), nullable=False)
+    role_type = db.Column(db.String(100), nullable=False)
+    start_year = db.Column(db.Integer, nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    # Open-ended (current) jobs have their tenure recomputed on every refresh
+    is_open = db.Column(db.Boolean, nullable=False, default=False, index=True)
+    tenure_months = db.Column(db.Integer, nullable=False)
+    tenure_bucket = db.Column(db.Integer, nullable=False)  # index into rollup_service.TENURE_BUCKETS
+    # The profile's next job at another company, if any
+    next_company_key = db.Column(db.String(255), nullable=True)
+    next_company_name = db.Column(db.String(255), nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_tenure_facts_company_next', 'company_key', 'next_company_key'),
+        db.Index('ix_tenure_facts_role_type', 'role_type'),
+        db.Index('ix_tenure_facts_start_year', 'start_year'),
+    )
+    
+    def __repr__(self):
+        return f"<TenureFact for job {self.job_history_id}>"
+
+
+class TenureRollup(db.Model):
+    """TenureRollup model with the tenure distribution of one cohort."""
+    __tablename__ = 'tenure_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    dimension = db.Column(db.String(20), nullable=False)  # company, role_type, start_year
+    dimension_key = db.Column(db.String(255), nullable=False)
+    label = db.Column(db.String(255), nullable=False)
+    job_count = db.Column(db.Integer, nullable=False)
+    total_months = db.Column(db.Integer, nullable=False)
+    min_months = db.Column(db.Integer, nullable=False)
+    max_months = db.Column(db.Integer, nullable=False)
+    histogram = db.Column(db.Text, nullable=False)  # JSON list of job counts per tenure bucket
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('dimension', 'dimension_key', name='uix_tenure_rollup_dimension_key'),
+        db.Index('ix_tenure_rollups_dimension_count', 'dimension', 'job_count'),
+    )
+    
+    def get_histogram(self):
+        """Deserialize the JSON histogram."""
+        return json.loads(self.histogram)
+    
+    def __repr__(self):
+        return f"<TenureRollup {self.dimension}={self.dimension_key}>"
+
+
+class CompanyTransitionRollup(db.Model):
+    """CompanyTransitionRollup model counting moves from one company to another."""
+    __tablename__ = 'company_transition_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    from_company_key = db.Column(db.String(255), nullable=False)
+    to_company_key = db.Column(db.String(255), nullable=False, index=True)
+    from_company = db.Column(db.String(255), nullable=False)
+    to_company = db.Column(db.String(255), nullable=False)
+    transition_count = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('from_company_key', 'to_company_key', name='uix_company_transition'),
+    )
+    
+    def __repr__(self):
+        return f"<CompanyTransitionRollup {self.from_company_key} -> {self.to_company_key}>"
+
+
+class ReplicationHeartbeat(db.Model):
+    """ReplicationHeartbeat model whose single row is bumped on the primary to measure replica lag."""
+    __tablename__ = 'replication_heartbeat'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    beat_at = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f"<ReplicationHeartbeat {self.beat_at}>"
+
+
+class AuditRecord(db.Model):
+    """AuditRecord model for fetches, deletions and tag changes, written in batches."""
+    __tablename__ = 'audit_records'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    action = db.Column(db.String(50), nullable=False)  # fetch, profile.delete, tag.assign, tag.remove
+    entity_type = db.Column(db.String(50), nullable=True)
+    entity_id = db.Column(db.String(255), nullable=True)
+    actor = db.Column(db.String(255), nullable=True)
+    details = db.Column(db.Text, nullable=True)  # JSON serialized data
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    __table_args__ = (
+        db.Index('ix_audit_records_entity', 'entity_type', 'entity_id'),
+        db.Index('ix_audit_records_action_created', 'action', 'created_at'),
+    )
+    
+    def get_details(self):
+        """Deserialize the JSON details."""
+        return json.loads(self.details) if self.details else None
+    
+    def __repr__(self):
+        return f"<AuditRecord {self.action} {self.entity_type} {self.entity_id}>"
+
+
+class ProfileDocument(db.Model):
+    """ProfileDocument model holding the pre-serialized JSON of a full profile, served as stored bytes."""
+    __tablename__ = 'profile_documents'
+    
+    profile_id = db.Column(db.Integer, db.ForeignKey('profiles.id', ondelete='CASCADE'), primary_key=True)
+    document = db.Column(db.LargeBinary, nullable=False)  # UTF-8 JSON
+    digest = db.Column(db.String(32), nullable=False)  # blake2b of document, served as the ETag
+    built_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<ProfileDocument for profile {self.profile_id}>"
+
+
+class RefreshIssue(db.Model):
+    """RefreshIssue model recording each refresh request spent from the shared budget."""
+    __tablename__ = 'refresh_issues'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # Profile ids are only unique within a shard
+    shard = db.Column(db.String(64), nullable=False, default='default', server_default='default')
+    profile_id = db.Column(db.Integer, nullable=False, index=True)
+    issued_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<RefreshIssue profile {self.shard}/{self.profile_id} at {self.issued_at}>"
@@ -0,0 +1 @@
+"""Service layer for background processing and data pipelines."""
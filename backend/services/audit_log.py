@@ -0,0 +1,340 @@
+"""Write-behind audit log.
+
+Audit records (profile fetches, profile deletions, tag assignments) are
+put on a bounded in-memory queue and written by one background thread in
+batches, as a multi-row insert into ``audit_records`` and/or appended to
+JSONL segment files. Request handlers only pay for a queue put.
+
+When the queue is full, ``record`` blocks for at most
+``AUDIT_ENQUEUE_TIMEOUT_SECONDS`` (back-pressure) and then drops the record
+and counts it. ``stop`` (registered with ``atexit``) drains the queue
+before the process exits; ``flush`` waits until everything queued so far
+is written.
+
+A batch that a sink still fails to take after ``WRITE_ATTEMPTS`` is kept
+and retried for that sink with the next batch. Once more records are kept
+than the queue holds, or when the process stops, the oldest are appended
+to a dead-letter JSONL file in ``AUDIT_LOG_DIR`` (with the sinks they are
+missing from) and counted as failed.
+
+Deletions and tag changes are captured from session flushes and recorded
+only once the transaction commits.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from flask import has_request_context, request
+from sqlalchemy import event, insert
+
+from extensions import db
+from models import AuditRecord, Profile, ProfileTag
+
+logger = logging.getLogger(__name__)
+
+SINK_DB = 'db'
+SINK_JSONL = 'jsonl'
+
+# Attempts per batch and sink before the batch is kept for the next write
+WRITE_ATTEMPTS = 3
+
+
+class AuditLog:
+    """Bounded audit queue drained in batches by a background writer."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.sinks = ()
+        self.batch_size = 500
+        self.flush_interval = 1.0
+        self.enqueue_timeout = 0.01
+        self.log_dir = None
+        self.segment_max_bytes = 64 * 1024 * 1024
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self._queue = queue.Queue(maxsize=10000)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._segment = None
+        # (sinks still missing, records) of batches that failed, oldest first
+        self._retained = []
+        self._atexit_registered = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read audit settings; an empty ``AUDIT_SINKS`` disables auditing."""
+        self.app = app
+        self.sinks = tuple(app.config.get('AUDIT_SINKS') or ())
+        self.batch_size = app.config.get('AUDIT_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('AUDIT_FLUSH_INTERVAL_SECONDS', self.flush_interval)
+        self.enqueue_timeout = app.config.get('AUDIT_ENQUEUE_TIMEOUT_SECONDS', self.enqueue_timeout)
+        self.log_dir = app.config.get('AUDIT_LOG_DIR', self.log_dir)
+        self.segment_max_bytes = app.config.get('AUDIT_SEGMENT_MAX_BYTES', self.segment_max_bytes)
+        queue_size = app.config.get('AUDIT_QUEUE_SIZE', self._queue.maxsize)
+        if queue_size != self._queue.maxsize and self._queue.empty():
+            self._queue = queue.Queue(maxsize=queue_size)
+        app.extensions['audit_log'] = self
+        if self.sinks:
+            enable_session_audit()
+        else:
+            disable_session_audit()
+
+    @property
+    def enabled(self):
+        return bool(self.sinks)
+
+    def stats(self):
+        """Counters for monitoring."""
+        return {
+            'queued': self._queue.qsize(),
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'retained': sum(len(records) for _, records in list(self._retained)),
+            'batches': self.batches
+        }
+
+    # Producers
+
+    def record(self, action, entity_type=None, entity_id=None, details=None, actor=None):
+        """Queue an audit record; returns False if it was dropped."""
+        if not self.enabled:
+            return False
+        if actor is None and has_request_context():
+            actor = request.remote_addr
+        entry = {
+            'action': action,
+            'entity_type': entity_type,
+            'entity_id': None if entity_id is None else str(entity_id),
+            'actor': actor,
+            'details': details,
+            'created_at': datetime.utcnow()
+        }
+        try:
+            self._queue.put(entry, timeout=self.enqueue_timeout)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                dropped = self.dropped
+            if dropped == 1 or dropped % 1000 == 0:
+                logger.warning(f"Audit queue full; {dropped} records dropped so far")
+            return False
+        with self._lock:
+            self.enqueued += 1
+        self._ensure_writer()
+        return True
+
+    # Writer
+
+    def _ensure_writer(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name='audit-writer')
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+                for _ in batch:
+                    self._queue.task_done()
+            elif self._stop.is_set():
+                return
+
+    def _next_batch(self):
+        """Wait up to the flush interval for a record, then take up to a batch."""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        """Write retained batches, then ``batch``, to the sinks they are missing from."""
+        pending, self._retained = self._retained + [(self.sinks, batch)], []
+        down = set()
+        for sinks, records in pending:
+            missing = tuple(sink for sink in sinks
+                            if sink in down or not self._write_sink(sink, records))
+            down.update(missing)
+            if missing:
+                self._retained.append((missing, records))
+            else:
+                with self._lock:
+                    self.written += len(records)
+        with self._lock:
+            self.batches += 1
+
+        retained = sum(len(records) for _, records in self._retained)
+        while self._retained and retained > self._queue.maxsize:
+            sinks, records = self._retained.pop(0)
+            self._dead_letter(sinks, records)
+            retained -= len(records)
+
+    def _write_sink(self, sink, records):
+        writer = self._write_db if sink == SINK_DB else self._write_jsonl
+        for attempt in range(WRITE_ATTEMPTS):
+            try:
+                writer(records)
+                return True
+            except Exception as e:
+                if attempt + 1 == WRITE_ATTEMPTS:
+                    logger.error(f"Audit {sink} write of {len(records)} records failed; "
+                                 f"keeping them for the next write: {e}")
+                else:
+                    time.sleep(0.1 * (attempt + 1))
+        return False
+
+    def _dead_letter(self, sinks, records):
+        """Append records that could not be written to the dead-letter file."""
+        path = os.path.join(self.log_dir, f"dead-letter-{os.getpid()}.jsonl")
+        try:
+            os.makedirs(self.log_dir, exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                for entry in records:
+                    f.write(json.dumps(dict(entry, created_at=entry['created_at'].isoformat(),
+                                            missing_sinks=list(sinks)), default=str) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            logger.error(f"Audit: {len(records)} unwritten records moved to {path}")
+        except OSError as e:
+            logger.error(f"Audit: {len(records)} records lost, dead-letter write failed: {e}")
+        with self._lock:
+            self.failed += len(records)
+
+    def _write_db(self, batch):
+        rows = [dict(entry, details=json.dumps(entry['details']) if entry['details'] is not None else None)
+                for entry in batch]
+        with self.app.app_context():
+            with db.engine.begin() as conn:
+                conn.execute(insert(AuditRecord), rows)
+
+    def _segment_path(self):
+        """Current JSONL segment, rotated once it reaches the size limit."""
+        if self._segment is None or (os.path.exists(self._segment)
+                                     and os.path.getsize(self._segment) >= self.segment_max_bytes):
+            os.makedirs(self.log_dir, exist_ok=True)
+            stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+            self._segment = os.path.join(self.log_dir, f"audit-{stamp}-{os.getpid()}.jsonl")
+        return self._segment
+
+    def _write_jsonl(self, batch):
+        lines = ''.join(
+            json.dumps(dict(entry, created_at=entry['created_at'].isoformat()), default=str) + '\n'
+            for entry in batch)
+        with open(self._segment_path(), 'a', encoding='utf-8') as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def flush(self):
+        """Block until every record queued so far has been written."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+            return
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def stop(self, timeout=None):
+        """Stop the writer after it has written everything queued.
+
+        Records still failing are moved to the dead-letter file.
+        """
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._stop.set()
+            thread.join(timeout)
+        self.flush()
+        retained, self._retained = self._retained, []
+        for sinks, records in retained:
+            self._dead_letter(sinks, records)
+
+
+# Global instance registered by the application factory
+audit_log = AuditLog()
+
+
+# Deletions and tag changes, captured at flush and recorded on commit
+
+def _collect_on_flush(session, flush_context):
+    pending = session.info.setdefault('audit_pending', [])
+    deleted_profiles = set()
+    for obj in session.deleted:
+        if isinstance(obj, Profile):
+            deleted_profiles.add(obj.id)
+            pending.append(('profile.delete', 'profile', obj.id, {'linkedin_url': obj.linkedin_url}))
+    for obj in session.deleted:
+        if isinstance(obj, ProfileTag) and obj.profile_id not in deleted_profiles:
+            pending.append(('tag.remove', 'profile', obj.profile_id, {'tag': obj.tag_name}))
+    for obj in session.new:
+        if isinstance(obj, ProfileTag):
+            pending.append(('tag.assign', 'profile', obj.profile_id, {'tag': obj.tag_name}))
+
+
+def _record_on_commit(session):
+    for action, entity_type, entity_id, details in session.info.pop('audit_pending', []):
+        audit_log.record(action, entity_type=entity_type, entity_id=entity_id, details=details)
+
+
+def _discard_on_rollback(session, previous_transaction):
+    session.info.pop('audit_pending', None)
+
+
+_SESSION_HOOKS = (
+    ('after_flush', _collect_on_flush),
+    ('after_commit', _record_on_commit),
+    ('after_soft_rollback', _discard_on_rollback),
+)
+
+
+def enable_session_audit(session=None):
+    """Record deletions and tag changes committed through ``session``."""
+    session = session or db.session
+    for name, hook in _SESSION_HOOKS:
+        if not event.contains(session, name, hook):
+            event.listen(session, name, hook)
+
+
+def disable_session_audit(session=None):
+    session = session or db.session
+    for name, hook in _SESSION_HOOKS:
+        if event.contains(session, name, hook):
+            event.remove(session, name, hook)
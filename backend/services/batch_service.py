@@ -0,0 +1,360 @@
+"""In-memory batch job queue for profile processing.
+
+Jobs hold only counters and status; queued items live in a single bounded
+priority queue shared by a small pool of worker threads. When the queue is
+full, ``enqueue`` blocks until workers make room or the job is cancelled,
+so a large upload is read only as fast as it is processed. The processor that handles each
+item is pluggable so the fetch pipeline can be wired in without the queue
+knowing about it. With ``auto_start`` set, the worker pool is started by
+the first ``enqueue``.
+
+Progress, per-item results and the final summary are published to the
+event bus on the ``batch:<job id>`` channel, and each processed item is
+recorded as a ``fetch`` in the audit log. Item events are only built when
+someone in this process watches the job; other processes get a progress
+event at most every ``progress_interval`` seconds instead of one NOTIFY
+per item. Finished jobs are forgotten after ``job_ttl`` seconds.
+"""
+import itertools
+import logging
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from services.audit_log import audit_log as default_audit_log
+from services.event_bus import event_bus as default_event_bus
+
+logger = logging.getLogger(__name__)
+
+# Queue priorities (lower runs first)
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+# Number of per-item errors kept on a job for reporting
+MAX_JOB_ERRORS = 100
+
+# How often a producer blocked on a full queue checks for cancellation
+ENQUEUE_POLL_SECONDS = 0.5
+
+
+class JobStatus:
+    """Batch job status values."""
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+
+class BatchJob:
+    """Progress and status of a single batch job."""
+
+    def __init__(self, job_id, source=None):
+        self.id = job_id
+        self.source = source
+        self.status = JobStatus.PENDING
+        self.total = 0
+        self.processed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.submitted = False
+        self.errors = []
+        self.upload_report = None
+        self.created_at = datetime.utcnow()
+        self.finished_at = None
+        self.progress_sent_at = 0.0
+
+    @property
+    def is_finished(self):
+        return self.status in JobStatus.FINISHED
+
+    def progress(self):
+        """Compact progress counters, used for streamed events."""
+        return {
+            'id': self.id,
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'submitted': self.submitted
+        }
+
+    def to_dict(self):
+        """Serialize the job for API responses."""
+        return {
+            'id': self.id,
+            'source': self.source,
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'submitted': self.submitted,
+            'errors': list(self.errors),
+            'upload_report': self.upload_report,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f"<BatchJob {self.id} {self.status} {self.processed}/{self.total}>"
+
+
+class BatchService:
+    """Priority queue of batch items processed by a pool of worker threads."""
+
+    def __init__(self, app=None, processor=None, events=None, audit=None):
+        self.app = None
+        self.processor = processor
+        self.events = events
+        self.audit = audit
+        self.max_workers = 4
+        self.auto_start = False
+        self.job_ttl = 3600
+        self.progress_interval = 0.5
+        self._jobs = {}
+        self._lock = threading.RLock()
+        self._queue = queue.PriorityQueue(maxsize=10000)
+        self._seq = itertools.count()
+        self._workers = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, processor=None):
+        """Bind the service to a Flask app."""
+        self.app = app
+        self.max_workers = app.config.get('BATCH_MAX_WORKERS', 4)
+        self.auto_start = app.config.get('BATCH_WORKERS_ENABLED', False)
+        self.job_ttl = app.config.get('BATCH_JOB_TTL_SECONDS', self.job_ttl)
+        self.progress_interval = app.config.get('EVENTS_PROGRESS_INTERVAL_SECONDS', self.progress_interval)
+        queue_size = app.config.get('BATCH_QUEUE_SIZE', self._queue.maxsize)
+        if queue_size != self._queue.maxsize and self._queue.empty():
+            self._queue = queue.PriorityQueue(maxsize=queue_size)
+        if processor is not None:
+            self.processor = processor
+        app.extensions['batch_service'] = self
+
+    def set_processor(self, processor):
+        """Set the callable used to process each queued item."""
+        self.processor = processor
+
+    # Job registry
+
+    def create_job(self, source=None):
+        """Create and register a new batch job."""
+        job = BatchJob(uuid.uuid4().hex, source=source)
+        with self._lock:
+            self._evict_finished()
+            self._jobs[job.id] = job
+        return job
+
+    def get_job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self):
+        with self._lock:
+            self._evict_finished()
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def _evict_finished(self, now=None):
+        """Drop jobs that finished more than ``job_ttl`` seconds ago."""
+        now = now or datetime.utcnow()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None
+                   and (now - job.finished_at).total_seconds() > self.job_ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    # Events
+
+    @staticmethod
+    def channel(job_id):
+        """Event bus channel for a job."""
+        return f"batch:{job_id}"
+
+    def _publish(self, job, event_type, data=None):
+        if self.events is None:
+            return
+        channel = self.channel(job.id)
+        if event_type == 'item':
+            self._publish_item(job, channel, data)
+            return
+        payload = {'job': job.to_dict() if event_type == 'summary' else job.progress()}
+        if data:
+            payload.update(data)
+        job.progress_sent_at = time.monotonic()
+        self.events.publish(channel, event_type, payload)
+
+    def _publish_item(self, job, channel, data):
+        """Item events go to local watchers; other processes get throttled progress."""
+        if self.events.subscriber_count(channel):
+            payload = {'job': job.progress()}
+            payload.update(data)
+            self.events.publish(channel, 'item', payload, remote=False)
+        now = time.monotonic()
+        if self.events.bridge is not None and now - job.progress_sent_at >= self.progress_interval:
+            job.progress_sent_at = now
+            self.events.publish(channel, 'progress', {'job': job.progress()}, local=False)
+
+    # Queueing
+
+    def enqueue(self, job, items, priority=PRIORITY_NORMAL):
+        """Queue items for a job and return how many were queued.
+
+        Blocks while the queue is full, and stops early once the job is
+        cancelled.
+        """
+        if job.is_finished:
+            return 0
+        if self.auto_start and self.processor is not None:
+            self.start()
+
+        count = 0
+        for item in items:
+            with self._lock:
+                if job.is_finished:
+                    break
+                job.total += 1
+                if job.status == JobStatus.PENDING:
+                    job.status = JobStatus.PROCESSING
+            # Outside the lock, which workers need to make room
+            if not self._put((priority, next(self._seq), job.id, item), job):
+                with self._lock:
+                    job.total -= 1
+                break
+            count += 1
+
+        if count:
+            self._publish(job, 'progress')
+        return count
+
+    def _put(self, entry, job):
+        """Put ``entry`` on the queue, giving up if ``job`` is cancelled while waiting."""
+        while True:
+            try:
+                self._queue.put(entry, timeout=ENQUEUE_POLL_SECONDS)
+                return True
+            except queue.Full:
+                if job.is_finished:
+                    return False
+
+    def finish_submission(self, job):
+        """Mark that no more items will be queued for a job."""
+        with self._lock:
+            job.submitted = True
+            completed = self._maybe_complete(job)
+        if completed:
+            self._publish(job, 'summary')
+
+    def cancel_job(self, job):
+        """Cancel a job; items still in the queue are dropped when dequeued."""
+        with self._lock:
+            if job.is_finished:
+                return False
+            job.status = JobStatus.CANCELLED
+            job.finished_at = datetime.utcnow()
+        self._publish(job, 'summary')
+        return True
+
+    # Processing
+
+    def process_pending(self):
+        """Process queued items in the calling thread until the queue is empty."""
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._handle(entry)
+
+    def start(self):
+        """Start the worker threads that drain the queue in the background."""
+        if self.processor is None:
+            raise RuntimeError("Batch service has no processor configured")
+        if len(self._workers) >= self.max_workers and all(w.is_alive() for w in self._workers):
+            return
+        with self._lock:
+            self._workers = [w for w in self._workers if w.is_alive()]
+            while len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._worker, daemon=True,
+                                          name=f"batch-worker-{len(self._workers)}")
+                worker.start()
+                self._workers.append(worker)
+
+    def stop(self, timeout=None):
+        """Stop worker threads once the items ahead of them are processed."""
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            self._queue.put((float('inf'), next(self._seq), None, None))
+        for worker in workers:
+            worker.join(timeout)
+
+    def _worker(self):
+        while True:
+            entry = self._queue.get()
+            if entry[2] is None:
+                return
+            self._handle(entry)
+
+    def _handle(self, entry):
+        _, _, job_id, item = entry
+        job = self.get_job(job_id)
+        if job is None or job.is_finished:
+            return
+
+        error = None
+        result = None
+        try:
+            if self.app is not None:
+                with self.app.app_context():
+                    result = self.processor(item)
+            else:
+                result = self.processor(item)
+        except Exception as e:
+            logger.warning(f"Batch job {job_id} item {item!r} failed: {e}")
+            error = str(e)
+
+        with self._lock:
+            if job.is_finished:
+                return
+            job.processed += 1
+            if error is None:
+                job.succeeded += 1
+            else:
+                job.failed += 1
+                if len(job.errors) < MAX_JOB_ERRORS:
+                    job.errors.append({'item': item, 'error': error})
+            completed = self._maybe_complete(job)
+
+        if self.audit is not None:
+            self.audit.record('fetch', entity_type='profile',
+                              entity_id=item.get('value') if isinstance(item, dict) else item,
+                              details={'job_id': job.id, 'source': job.source, 'error': error})
+        self._publish(job, 'item', {
+            'item': item,
+            'status': 'failed' if error else 'succeeded',
+            'error': error,
+            'result': result if isinstance(result, (dict, str, int, float, bool)) else None
+        })
+        if completed:
+            self._publish(job, 'summary')
+
+    def _maybe_complete(self, job):
+        if job.submitted and not job.is_finished and job.processed >= job.total:
+            job.status = JobStatus.COMPLETED
+            job.finished_at = datetime.utcnow()
+            logger.info(f"Batch job {job.id} completed: {job.succeeded} succeeded, {job.failed} failed")
+            return True
+        return False
+
+
+# Shared instance, bound to the app in create_app()
+batch_service = BatchService(events=default_event_bus, audit=default_audit_log)
@@ -0,0 +1,312 @@
+"""Career move detection over ordered job histories.
+
+Each profile's ``JobHistory`` rows, ordered by start date, are turned into
+``CareerEvent`` rows: promotions and lateral moves within a company, company
+changes, and gaps between jobs. Events are stored in an indexed table so
+dashboards can run set-based queries ("promoted within 18 months at X")
+instead of rescanning job histories.
+
+Only profiles whose job history changed are recomputed. A profile's job
+signature (job count, classified job count, highest job id, latest
+``updated_at``) is stored in ``ProfileAnalysisState`` and compared on each
+run, which also catches deleted jobs.
+"""
+import logging
+import re
+import time
+from sqlalchemy import delete, exists, func, insert, select, update
+
+from extensions import db
+from models import CareerEvent, JobHistory, ProfileAnalysisState
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+# A break between jobs longer than this is recorded as a gap
+GAP_THRESHOLD_DAYS = 90
+
+PROMOTION = 'promotion'
+LATERAL_MOVE = 'lateral_move'
+COMPANY_CHANGE = 'company_change'
+GAP = 'gap'
+
+EVENT_TYPES = (PROMOTION, LATERAL_MOVE, COMPANY_CHANGE, GAP)
+
+# Legal suffixes dropped from the end of company names
+LEGAL_SUFFIXES = {'inc', 'llc', 'ltd', 'corp', 'corporation', 'co', 'gmbh', 'plc'}
+
+# (pattern, seniority level), checked from the most senior down
+SENIORITY_RULES = [
+    (r'\bchief\b.*\bofficer\b|\bc[eftoi]o\b|\bcxo\b|(?<!vice )\bpresident\b', 10),
+    (r'\b(?:svp|evp|senior vice president|executive vice president)\b', 9),
+    (r'\b(?:vp|vice president)\b', 8),
+    (r'\bhead of\b|\b(?:senior|sr) director\b', 7),
+    (r'\bdirector\b', 6),
+    (r'\b(?:senior|sr|group) manager\b', 5),
+    (r'\b(?:principal|distinguished)\b', 4.5),
+    (r'\b(?:staff|lead|manager)\b', 4),
+    (r'\b(?:senior|sr)\b', 3),
+    (r'\b(?:junior|jr|associate|assistant|entry level)\b', 1),
+    (r'\b(?:intern|internship|trainee|apprentice)\b', 0),
+]
+DEFAULT_SENIORITY = 2
+
+_SENIORITY_RULES = [(re.compile(pattern), level) for pattern, level in SENIORITY_RULES]
+_LEVEL_SUFFIX = re.compile(r'\b(i{1,3}|iv|v|[1-5])$')
+_ROMAN = {'i': 1, 'ii': 2, 'iii': 3, 'iv': 4, 'v': 5}
+
+
+def _normalize(text):
+    return ' '.join(re.sub(r'[^\w&+#]+', ' ', (text or '').lower()).split())
+
+
+def normalize_company(name):
+    """Normalized company name used to compare and index companies.
+
+    Trailing legal suffixes are dropped (``Acme Co., Ltd.`` is ``acme``), but
+    the same words elsewhere in a name are kept, as in ``Co-op Bank``.
+    """
+    tokens = _normalize(name).split()
+    while len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    return ' '.join(tokens)
+
+
+def seniority(role):
+    """Seniority level of a role title; numbered levels (``Engineer II``) add a tenth per step."""
+    title = _normalize(role)
+    level = next((level for pattern, level in _SENIORITY_RULES if pattern.search(title)),
+                 DEFAULT_SENIORITY)
+    suffix = _LEVEL_SUFFIX.search(title)
+    if suffix:
+        step = suffix.group(1)
+        level += 0.1 * (_ROMAN[step] if step in _ROMAN else int(step))
+    return level
+
+
+def months_between(start, end):
+    """Whole months from ``start`` to ``end``."""
+    return (end.year - start.year) * 12 + (end.month - start.month) - (end.day < start.day)
+
+
+def _ends_after(job, other):
+    """Whether ``job`` ends after ``other``; a current job never ends."""
+    if job.end_date is None:
+        return other.end_date is not None
+    return other.end_date is not None and job.end_date > other.end_date
+
+
+def _is_side_role(job, primary, later_jobs):
+    """Whether ``job``, overlapping ``primary`` at another company, is a side role.
+
+    It is one if it ends before the primary job does, or if the primary
+    company carries on with another job that starts while it is running.
+    """
+    if not _ends_after(job, primary):
+        return True
+    primary_company = normalize_company(primary.company_name)
+    return any(
+        normalize_company(later.company_name) == primary_company
+        and (job.end_date is None or later.start_date < job.end_date)
+        for later in later_jobs
+    )
+
+
+def derive_events(profile_id, jobs):
+    """Derive career events from one profile's jobs.
+
+    ``jobs`` must be ordered by start date. A job that overlaps the current
+    primary job at another company is either a concurrent side role, which
+    produces no event, or the next primary job (see ``_is_side_role``).
+    """
+    jobs = list(jobs)
+    events = []
+    primary = None
+    company_start = None
+    latest_end = None
+
+    for index, job in enumerate(jobs):
+        if primary is None:
+            primary, company_start, latest_end = job, job.start_date, job.end_date
+            continue
+
+        same_company = normalize_company(job.company_name) == normalize_company(primary.company_name)
+        overlaps = primary.end_date is None or job.start_date < primary.end_date
+        if overlaps and not same_company and _is_side_role(job, primary, jobs[index + 1:]):
+            if latest_end is not None and (job.end_date is None or job.end_date > latest_end):
+                latest_end = job.end_date
+            continue
+
+        if latest_end is not None and (job.start_date - latest_end).days > GAP_THRESHOLD_DAYS:
+            events.append({
+                'profile_id': profile_id,
+                'event_type': GAP,
+                'event_date': latest_end,
+                'from_job_id': primary.id,
+                'to_job_id': job.id,
+                'gap_months': months_between(latest_end, job.start_date)
+            })
+
+        delta = seniority(job.role) - seniority(primary.role)
+        event = {
+            'profile_id': profile_id,
+            'event_date': job.start_date,
+            'from_job_id': primary.id,
+            'to_job_id': job.id,
+            'from_company': primary.company_name,
+            'to_company': job.company_name,
+            'company_key': normalize_company(job.company_name),
+            'from_role': primary.role,
+            'to_role': job.role,
+            'seniority_delta': round(delta, 2),
+            'company_tenure_months': months_between(company_start, job.start_date)
+        }
+        if same_company:
+            if delta > 0:
+                events.append(dict(event, event_type=PROMOTION))
+            elif _normalize(job.role) != _normalize(primary.role):
+                events.append(dict(event, event_type=LATERAL_MOVE))
+        else:
+            events.append(dict(event, event_type=COMPANY_CHANGE))
+            company_start = job.start_date
+
+        primary = job
+        if job.end_date is None or latest_end is None:
+            latest_end = job.end_date
+        else:
+            latest_end = max(latest_end, job.end_date)
+
+    return events
+
+
+def _signature(count, typed_count, max_id, max_updated_at):
+    updated = max_updated_at.isoformat() if max_updated_at else ''
+    return f"{count}:{typed_count}:{max_id}:{updated}"
+
+
+def changed_profile_ids(full=False, column='career_events_signature'):
+    """Return ``{profile_id: signature}`` for profiles whose jobs changed.
+
+    ``column`` is the ``ProfileAnalysisState`` signature column of the
+    analysis asking, so each analysis tracks its own progress. The classified
+    job count is part of the signature because batch role classification
+    fills ``role_type`` without touching ``updated_at``.
+    """
+    stored = getattr(ProfileAnalysisState, column)
+    jobs = (
+        select(
+            JobHistory.profile_id,
+            func.count(JobHistory.id).label('job_count'),
+            func.count(JobHistory.role_type).label('typed_count'),
+            func.max(JobHistory.id).label('max_id'),
+            func.max(JobHistory.updated_at).label('max_updated_at')
+        )
+        .group_by(JobHistory.profile_id)
+        .subquery()
+    )
+    stmt = (
+        select(jobs, stored.label('signature'))
+        .outerjoin(ProfileAnalysisState, ProfileAnalysisState.profile_id == jobs.c.profile_id)
+        .execution_options(yield_per=5000)
+    )
+    changed = {}
+    for row in db.session.execute(stmt):
+        signature = _signature(row.job_count, row.typed_count, row.max_id, row.max_updated_at)
+        if full or signature != row.signature:
+            changed[row.profile_id] = signature
+
+    # Profiles whose jobs were all deleted
+    orphaned = select(ProfileAnalysisState.profile_id).where(
+        stored.isnot(None),
+        stored != '',
+        ~exists().where(JobHistory.profile_id == ProfileAnalysisState.profile_id)
+    )
+    for profile_id in db.session.execute(orphaned).scalars():
+        changed[profile_id] = ''
+    return changed
+
+
+def save_signatures(signatures, column='career_events_signature'):
+    """Store ``{profile_id: signature}`` in a ``ProfileAnalysisState`` column."""
+    existing = set(db.session.execute(
+        select(ProfileAnalysisState.profile_id)
+        .where(ProfileAnalysisState.profile_id.in_(list(signatures)))
+    ).scalars())
+    updates = [{'profile_id': pid, column: sig}
+               for pid, sig in signatures.items() if pid in existing]
+    inserts = [{'profile_id': pid, column: sig}
+               for pid, sig in signatures.items() if pid not in existing]
+    if updates:
+        db.session.execute(update(ProfileAnalysisState), updates)
+    if inserts:
+        db.session.execute(insert(ProfileAnalysisState), inserts)
+
+
+def refresh_career_events(batch_size=DEFAULT_BATCH_SIZE, full=False):
+    """Recompute career events for profiles whose jobs changed and return a report."""
+    started = time.monotonic()
+    changed = changed_profile_ids(full=full)
+    profile_ids = sorted(changed)
+    event_count = 0
+
+    for offset in range(0, len(profile_ids), batch_size):
+        batch = profile_ids[offset:offset + batch_size]
+        rows = db.session.execute(
+            select(JobHistory.id, JobHistory.profile_id, JobHistory.company_name, JobHistory.role,
+                   JobHistory.start_date, JobHistory.end_date)
+            .where(JobHistory.profile_id.in_(batch))
+            .order_by(JobHistory.profile_id, JobHistory.start_date, JobHistory.id)
+        ).all()
+
+        by_profile = {}
+        for row in rows:
+            by_profile.setdefault(row.profile_id, []).append(row)
+        events = [event for profile_id, jobs in by_profile.items()
+                  for event in derive_events(profile_id, jobs)]
+
+        db.session.execute(delete(CareerEvent).where(CareerEvent.profile_id.in_(batch)))
+        if events:
+            db.session.execute(insert(CareerEvent), events)
+        save_signatures({profile_id: changed[profile_id] for profile_id in batch})
+        db.session.commit()
+        event_count += len(events)
+
+    elapsed = time.monotonic() - started
+    logger.info(
+        f"Career events: recomputed {len(profile_ids)} profiles, {event_count} events "
+        f"in {elapsed:.2f}s"
+    )
+    return {
+        'profiles': len(profile_ids),
+        'events': event_count,
+        'elapsed_seconds': round(elapsed, 3)
+    }
+
+
+def career_events_query(event_type=None, company=None, within_months=None, since=None, until=None):
+    """Build a query over career events.
+
+    ``company`` matches the company moved into (normalized); ``within_months``
+    keeps events that happened at most that many months into the tenure at
+    the company; ``since``/``until`` bound the event date.
+    """
+    query = CareerEvent.query
+    if event_type:
+        query = query.filter(CareerEvent.event_type == event_type)
+    if company:
+        query = query.filter(CareerEvent.company_key == normalize_company(company))
+    if within_months is not None:
+        query = query.filter(CareerEvent.company_tenure_months <= within_months)
+    if since:
+        query = query.filter(CareerEvent.event_date >= since)
+    if until:
+        query = query.filter(CareerEvent.event_date <= until)
+    return query
+
+
+def profiles_promoted_within(company, months, since=None, until=None):
+    """Ids of profiles promoted at ``company`` within ``months`` of joining it."""
+    query = career_events_query(PROMOTION, company=company, within_months=months,
+                                since=since, until=until)
+    return sorted(row.profile_id for row in query.with_entities(CareerEvent.profile_id).distinct())
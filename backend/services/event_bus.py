@@ -0,0 +1,209 @@
+"""In-process publish/subscribe for job progress events.
+
+Subscribers get a bounded queue per subscription, so a slow SSE client can
+never block a publisher: when a subscriber falls behind, its oldest events
+are dropped. ``PostgresNotifyBridge`` fans events out across processes with
+``LISTEN/NOTIFY`` so a client can watch a job running in another worker.
+"""
+import json
+import logging
+import queue
+import select
+import threading
+import time
+import uuid
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SUBSCRIPTION_SIZE = 1000
+
+# Postgres NOTIFY channel shared by all bus channels
+PG_NOTIFY_CHANNEL = 'career_peek_events'
+
+# NOTIFY payloads must stay below 8000 bytes
+PG_MAX_PAYLOAD = 7900
+
+
+class Subscription:
+    """A subscriber's bounded queue of events for one channel."""
+
+    def __init__(self, bus, channel, maxsize=DEFAULT_SUBSCRIPTION_SIZE):
+        self.bus = bus
+        self.channel = channel
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def put(self, event):
+        """Deliver an event, dropping the oldest queued event if full."""
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Return the next event, or None if none arrives within ``timeout``."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventBus:
+    """Channel-based in-process event bus."""
+
+    def __init__(self):
+        self.bridge = None
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel, maxsize=DEFAULT_SUBSCRIPTION_SIZE):
+        """Subscribe to a channel and return the ``Subscription``."""
+        subscription = Subscription(self, channel, maxsize=maxsize)
+        with self._lock:
+            self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscriptions.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[subscription.channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscriptions.get(channel, ()))
+
+    def publish(self, channel, event_type, data, local=True, remote=True):
+        """Publish an event locally and, if a bridge is set, to other processes."""
+        event = {'type': event_type, 'data': data}
+        if local:
+            self.deliver(channel, event)
+        if remote and self.bridge is not None:
+            self.bridge.publish(channel, event)
+
+    def deliver(self, channel, event):
+        """Deliver an event to local subscribers only."""
+        with self._lock:
+            subscribers = list(self._subscriptions.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+
+
+class PostgresNotifyBridge:
+    """Relay bus events between processes with PostgreSQL ``LISTEN/NOTIFY``.
+
+    Each process tags its notifications with an origin id and ignores its
+    own, since local subscribers already received the event directly.
+    """
+
+    def __init__(self, bus, db_uri, pg_channel=PG_NOTIFY_CHANNEL):
+        self.bus = bus
+        self.pg_channel = pg_channel
+        self.origin = uuid.uuid4().hex
+        self._url = make_url(db_uri)
+        self._engine = None
+        self._running = False
+        self._thread = None
+
+    def encode(self, channel, event):
+        """Encode an event as a NOTIFY payload.
+
+        Events too large for NOTIFY are sent without their data and marked
+        ``truncated`` so remote subscribers still see the event happen.
+        """
+        message = {'origin': self.origin, 'channel': channel, 'event': event}
+        payload = json.dumps(message, default=str)
+        if len(payload.encode('utf-8')) > PG_MAX_PAYLOAD:
+            message['event'] = {'type': event.get('type'), 'data': None, 'truncated': True}
+            payload = json.dumps(message, default=str)
+        return payload
+
+    def decode(self, payload):
+        """Return ``(channel, event)`` for a foreign notification, else None."""
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return None
+        if message.get('origin') == self.origin:
+            return None
+        return message.get('channel'), message.get('event')
+
+    def publish(self, channel, event):
+        payload = self.encode(channel, event)
+        try:
+            if self._engine is None:
+                self._engine = create_engine(self._url, pool_size=2, max_overflow=2)
+            with self._engine.begin() as conn:
+                conn.execute(text("SELECT pg_notify(:channel, :payload)"),
+                             {'channel': self.pg_channel, 'payload': payload})
+        except Exception as e:
+            logger.warning(f"Could not bridge event on {channel}: {e}")
+
+    def start(self):
+        """Attach to the bus and start the listener thread."""
+        self.bus.bridge = self
+        self._running = True
+        self._thread = threading.Thread(target=self._listen_forever, daemon=True,
+                                        name='event-bus-listener')
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._running = False
+        if self.bus.bridge is self:
+            self.bus.bridge = None
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._engine is not None:
+            self._engine.dispose()
+
+    def _listen_forever(self):
+        while self._running:
+            try:
+                self._listen()
+            except Exception as e:
+                logger.warning(f"Event bus listener error, reconnecting: {e}")
+                time.sleep(1)
+
+    def _listen(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        dsn = self._url.set(drivername='postgresql').render_as_string(hide_password=False)
+        conn = psycopg2.connect(dsn)
+        try:
+            conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {self.pg_channel}")
+            while self._running:
+                if select.select([conn], [], [], 1.0) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    decoded = self.decode(conn.notifies.pop(0).payload)
+                    if decoded is not None:
+                        self.bus.deliver(*decoded)
+        finally:
+            conn.close()
+
+
+# Shared instance used by the batch service and SSE endpoints
+event_bus = EventBus()
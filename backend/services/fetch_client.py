@@ -0,0 +1,332 @@
+"""Pooled, cached HTTP client for the LinkedIn data source.
+
+Every request shares one token, so the client avoids spending requests and
+latency twice:
+
+* Connections are kept alive and reused from a per-host pool, which also
+  caps concurrent connections per host. A request that fails on a reused
+  connection the server has already closed is retried once on a fresh one.
+* Responses carrying an ``ETag`` or ``Last-Modified`` are stored in an
+  on-disk cache (metadata as JSON next to the body), and later requests
+  for the same URL are sent with ``If-None-Match``/``If-Modified-Since``.
+  A ``304 Not Modified`` is answered from the cache. Entries are keyed by
+  a hash of the token as well as the URL, so clients with different
+  tokens sharing a cache directory never see each other's responses.
+* Concurrent requests for the same URL are coalesced: one goes out and
+  the others wait for its response.
+
+``AsyncFetchClient`` exposes the same client to asyncio code. Requests run
+on a thread pool sized for the wanted concurrency and coalesce on asyncio
+futures, so one event loop can keep many pooled connections busy.
+
+Only the standard library is used (``http.client``).
+"""
+import asyncio
+import hashlib
+import http.client
+import json
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 16
+DEFAULT_USER_AGENT = 'career-peek-fetcher/1.0'
+
+# Errors meaning a pooled keep-alive connection was closed by the server
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                            ConnectionResetError, BrokenPipeError)
+
+
+class FetchResponse:
+    """A fetched response; ``from_cache`` is set when a 304 was answered from the cache."""
+
+    def __init__(self, url, status, headers, body, from_cache=False):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.from_cache = from_cache
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    def json(self):
+        return json.loads(self.body)
+
+    def __repr__(self):
+        return f"<FetchResponse {self.status} {self.url}{' (cached)' if self.from_cache else ''}>"
+
+
+class ConnectionPool:
+    """Keep-alive HTTP connections, pooled per scheme, host and port."""
+
+    def __init__(self, max_per_host=DEFAULT_MAX_CONNECTIONS_PER_HOST, timeout=DEFAULT_TIMEOUT):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.opened = 0
+        self.reused = 0
+        self._idle = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def _new_connection(self, scheme, host, port):
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    @contextmanager
+    def connection(self, scheme, host, port):
+        """Yield ``(connection, reused)``; it goes back to the pool if still open.
+
+        The response must be read completely inside the block.
+        """
+        key = (scheme, host, port)
+        with self._lock:
+            slot = self._slots.setdefault(key, threading.BoundedSemaphore(self.max_per_host))
+        slot.acquire()
+        try:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                conn = idle.pop() if idle else None
+                reused = conn is not None
+                if reused:
+                    self.reused += 1
+                else:
+                    self.opened += 1
+            if conn is None:
+                conn = self._new_connection(scheme, host, port)
+
+            keep = False
+            try:
+                yield conn, reused
+                keep = conn.sock is not None
+            finally:
+                if keep:
+                    with self._lock:
+                        self._idle[key].append(conn)
+                else:
+                    conn.close()
+        finally:
+            slot.release()
+
+    def close(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+
+def token_scope(token):
+    """Cache scope of a token: a hash, so the token itself is never written to disk."""
+    if not token:
+        return ''
+    return hashlib.blake2b(token.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """On-disk cache of validators and bodies, one JSON and one body file per URL and scope."""
+
+    def __init__(self, directory, scope=''):
+        self.directory = directory
+        self.scope = scope
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url):
+        key = f"{self.scope}\0{url}"
+        name = hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+        base = os.path.join(self.directory, name[:2], name)
+        return base + '.json', base + '.body'
+
+    def get(self, url):
+        """Return ``(metadata, body)`` for a cached URL, or None."""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        if metadata.get('url') != url or metadata.get('scope', '') != self.scope:
+            return None
+        return metadata, body
+
+    def put(self, url, status, headers, body):
+        """Store a response; the body is written before the metadata that points at it."""
+        meta_path, body_path = self._paths(url)
+        directory = os.path.dirname(meta_path)
+        os.makedirs(directory, exist_ok=True)
+        metadata = {
+            'url': url,
+            'scope': self.scope,
+            'status': status,
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified'),
+            'headers': headers
+        }
+        for path, data in ((body_path, body), (meta_path, json.dumps(metadata).encode('utf-8'))):
+            fd, tmp = tempfile.mkstemp(dir=directory)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+
+class FetchClient:
+    """Thread-safe GET client with pooling, conditional requests and coalescing."""
+
+    def __init__(self, token=None, cache_dir=None, max_connections_per_host=DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                 timeout=DEFAULT_TIMEOUT, user_agent=DEFAULT_USER_AGENT):
+        self.pool = ConnectionPool(max_connections_per_host, timeout)
+        self.cache = ResponseCache(cache_dir, scope=token_scope(token)) if cache_dir else None
+        self.headers = {'User-Agent': user_agent, 'Accept': 'application/json'}
+        if token:
+            self.headers['Authorization'] = f"Bearer {token}"
+        self.requests = 0
+        self.not_modified = 0
+        self.coalesced = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'not_modified': self.not_modified,
+            'coalesced': self.coalesced,
+            'connections_opened': self.pool.opened,
+            'connections_reused': self.pool.reused
+        }
+
+    def get(self, url):
+        """Fetch ``url``, sharing the response with concurrent callers for the same URL."""
+        with self._lock:
+            future = self._inflight.get(url)
+            leader = future is None
+            if leader:
+                future = self._inflight[url] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            response = self._fetch(url)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[url]
+
+    def _fetch(self, url):
+        headers = dict(self.headers)
+        cached = self.cache.get(url) if self.cache else None
+        if cached:
+            metadata, _ = cached
+            if metadata.get('etag'):
+                headers['If-None-Match'] = metadata['etag']
+            if metadata.get('last_modified'):
+                headers['If-Modified-Since'] = metadata['last_modified']
+
+        status, response_headers, body = self._request(url, headers)
+        if status == 304 and cached:
+            metadata, cached_body = cached
+            with self._lock:
+                self.not_modified += 1
+            return FetchResponse(url, metadata['status'], metadata['headers'], cached_body, from_cache=True)
+
+        cacheable = (status == 200 and self.cache is not None
+                     and ('etag' in response_headers or 'last-modified' in response_headers)
+                     and 'no-store' not in response_headers.get('cache-control', ''))
+        if cacheable:
+            self.cache.put(url, status, response_headers, body)
+        return FetchResponse(url, status, response_headers, body)
+
+    def _request(self, url, headers):
+        parts = urlsplit(url)
+        path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        for attempt in range(2):
+            with self.pool.connection(parts.scheme, parts.hostname, parts.port) as (conn, reused):
+                try:
+                    conn.request('GET', path, headers=headers)
+                    response = conn.getresponse()
+                    body = response.read()
+                except _STALE_CONNECTION_ERRORS:
+                    conn.close()
+                    if not reused or attempt:
+                        raise
+                    continue
+                with self._lock:
+                    self.requests += 1
+                return response.status, {k.lower(): v for k, v in response.getheaders()}, body
+
+    def close(self):
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AsyncFetchClient:
+    """Asyncio front end for ``FetchClient``."""
+
+    def __init__(self, client=None, max_concurrency=64, **client_options):
+        self.client = client or FetchClient(**client_options)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='fetch')
+        self._inflight = {}
+
+    async def get(self, url):
+        """Fetch ``url``; concurrent awaits of the same URL share one request."""
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.get_running_loop().run_in_executor(self._executor, self.client.get, url)
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        else:
+            with self.client._lock:
+                self.client.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def get_many(self, urls):
+        """Fetch many URLs concurrently; failed fetches are returned as exceptions."""
+        return await asyncio.gather(*(self.get(url) for url in urls), return_exceptions=True)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+
+def create_fetch_client(config):
+    """Build a ``FetchClient`` from app config."""
+    return FetchClient(
+        token=config.get('LINKEDIN_API_TOKEN'),
+        cache_dir=config.get('FETCH_CACHE_DIR'),
+        max_connections_per_host=config.get('FETCH_MAX_CONNECTIONS_PER_HOST', DEFAULT_MAX_CONNECTIONS_PER_HOST),
+        timeout=config.get('FETCH_TIMEOUT_SECONDS', DEFAULT_TIMEOUT)
+    )
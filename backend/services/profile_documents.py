@@ -0,0 +1,326 @@
+"""Pre-serialized profile documents for the hot read path.
+
+A full profile (the profile, its jobs, education, tags and latest version)
+is serialized once into ``profile_documents`` and served as stored bytes,
+so reads skip ORM hydration and JSON encoding.
+
+Documents are rebuilt in the same transaction as the change that affects
+them: an ``after_flush`` hook collects the ids of profiles whose graph was
+touched and a ``before_commit`` hook rebuilds those documents. Bulk Core
+updates bypass the ORM, so code issuing them calls ``mark_changed`` with
+the affected profile ids. ``verify_documents`` rebuilds documents from the
+normalized tables and reports (and optionally repairs) any drift.
+
+Documents are written with an upsert on ``profile_id`` (``INSERT ... ON
+CONFLICT DO UPDATE`` on Postgres and SQLite, ``merge`` elsewhere), so
+concurrent rebuilds of one profile never collide on the primary key.
+"""
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from extensions import db
+from models import Education, JobHistory, Profile, ProfileDocument, ProfileTag, ProfileVersion
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+_GRAPH_MODELS = (Profile, JobHistory, Education, ProfileTag, ProfileVersion)
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def _encode(document):
+    return json.dumps(document, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def build_documents(profile_ids, session=None):
+    """Serialize the documents of ``profile_ids``; returns ``{profile_id: bytes}``.
+
+    Profiles that no longer exist are left out.
+    """
+    session = session or db.session
+    profile_ids = list(profile_ids)
+    if not profile_ids:
+        return {}
+    documents = {}
+    for row in session.execute(select(Profile.__table__).where(Profile.id.in_(profile_ids))):
+        documents[row.id] = {
+            'id': row.id,
+            'name': row.name,
+            'linkedin_url': row.linkedin_url,
+            'last_updated': _iso(row.last_updated),
+            'engagement_score': row.engagement_score,
+            'created_at': _iso(row.created_at),
+            'updated_at': _iso(row.updated_at),
+            'jobs': [],
+            'education': [],
+            'tags': [],
+            'latest_version': None
+        }
+
+    jobs = session.execute(
+        select(JobHistory.__table__).where(JobHistory.profile_id.in_(profile_ids))
+        .order_by(JobHistory.start_date.desc(), JobHistory.id.desc()))
+    for row in jobs:
+        if row.profile_id in documents:
+            documents[row.profile_id]['jobs'].append({
+                'id': row.id,
+                'company_name': row.company_name,
+                'company_url': row.company_url,
+                'company_size': row.company_size,
+                'role': row.role,
+                'role_type': row.role_type,
+                'start_date': _iso(row.start_date),
+                'end_date': _iso(row.end_date),
+                'is_current': row.is_current,
+                'description': row.description
+            })
+
+    education = session.execute(
+        select(Education.__table__).where(Education.profile_id.in_(profile_ids))
+        .order_by(Education.start_date.desc().nulls_last(), Education.id))
+    for row in education:
+        if row.profile_id in documents:
+            documents[row.profile_id]['education'].append({
+                'id': row.id,
+                'institution': row.institution,
+                'degree': row.degree,
+                'field_of_study': row.field_of_study,
+                'start_date': _iso(row.start_date),
+                'end_date': _iso(row.end_date)
+            })
+
+    tags = session.execute(
+        select(ProfileTag.profile_id, ProfileTag.tag_name)
+        .where(ProfileTag.profile_id.in_(profile_ids)).order_by(ProfileTag.tag_name))
+    for row in tags:
+        if row.profile_id in documents:
+            documents[row.profile_id]['tags'].append(row.tag_name)
+
+    latest = (
+        select(ProfileVersion.profile_id, func.max(ProfileVersion.version_number).label('version_number'))
+        .where(ProfileVersion.profile_id.in_(profile_ids))
+        .group_by(ProfileVersion.profile_id)
+        .subquery()
+    )
+    versions = session.execute(
+        select(ProfileVersion.profile_id, ProfileVersion.version_number, ProfileVersion.data_snapshot,
+               ProfileVersion.valid_from, ProfileVersion.valid_to)
+        .join(latest, (ProfileVersion.profile_id == latest.c.profile_id)
+              & (ProfileVersion.version_number == latest.c.version_number)))
+    for row in versions:
+        if row.profile_id in documents:
+            documents[row.profile_id]['latest_version'] = {
+                'version_number': row.version_number,
+                'valid_from': _iso(row.valid_from),
+                'valid_to': _iso(row.valid_to),
+                'data': json.loads(row.data_snapshot)
+            }
+
+    return {profile_id: _encode(document) for profile_id, document in documents.items()}
+
+
+def digest(document):
+    """Content digest of a document, used as its ETag."""
+    return hashlib.blake2b(document, digest_size=16).hexdigest()
+
+
+_UPSERT_DIALECTS = {'postgresql': postgresql, 'sqlite': sqlite}
+
+
+def _upsert_documents(session, rows):
+    dialect = _UPSERT_DIALECTS.get(session.get_bind().dialect.name)
+    if dialect is None:
+        for row in rows:
+            session.merge(ProfileDocument(**row))
+        return
+    stmt = dialect.insert(ProfileDocument)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ProfileDocument.profile_id],
+        set_={column: stmt.excluded[column] for column in ('document', 'digest', 'built_at')}
+    )
+    session.execute(stmt, rows)
+
+
+def write_documents(profile_ids, session=None):
+    """Rebuild and store the documents of ``profile_ids``; returns how many were written.
+
+    Documents of profiles that no longer exist are removed.
+    """
+    session = session or db.session
+    profile_ids = sorted(set(profile_ids))
+    written = 0
+    for offset in range(0, len(profile_ids), DEFAULT_BATCH_SIZE):
+        batch = profile_ids[offset:offset + DEFAULT_BATCH_SIZE]
+        documents = build_documents(batch, session)
+        now = datetime.utcnow()
+        if documents:
+            _upsert_documents(session, [
+                {'profile_id': profile_id, 'document': document, 'digest': digest(document), 'built_at': now}
+                for profile_id, document in documents.items()
+            ])
+        gone = [profile_id for profile_id in batch if profile_id not in documents]
+        if gone:
+            session.execute(delete(ProfileDocument).where(ProfileDocument.profile_id.in_(gone)))
+        written += len(documents)
+    return written
+
+
+def read_document(profile_id, session=None):
+    """``(document bytes, digest)`` of a profile, or None; no ORM objects are built."""
+    session = session or db.session
+    row = session.execute(
+        select(ProfileDocument.document, ProfileDocument.digest)
+        .where(ProfileDocument.profile_id == profile_id)
+    ).first()
+    return (bytes(row.document), row.digest) if row else None
+
+
+def read_documents(profile_ids, session=None):
+    """``{profile_id: document bytes}`` for the profiles that have documents."""
+    session = session or db.session
+    rows = session.execute(
+        select(ProfileDocument.profile_id, ProfileDocument.document)
+        .where(ProfileDocument.profile_id.in_(list(profile_ids))))
+    return {row.profile_id: bytes(row.document) for row in rows}
+
+
+def verify_documents(batch_size=DEFAULT_BATCH_SIZE, repair=False):
+    """Compare stored documents with the normalized tables and return a drift report.
+
+    ``repair`` rewrites drifted and missing documents and removes orphaned ones.
+    """
+    started = time.monotonic()
+    checked = 0
+    drifted, missing = [], []
+    after_id = 0
+    while True:
+        profile_ids = list(db.session.execute(
+            select(Profile.id).where(Profile.id > after_id).order_by(Profile.id).limit(batch_size)
+        ).scalars())
+        if not profile_ids:
+            break
+        after_id = profile_ids[-1]
+        expected = build_documents(profile_ids)
+        stored = read_documents(profile_ids)
+        for profile_id in profile_ids:
+            if profile_id not in stored:
+                missing.append(profile_id)
+            elif stored[profile_id] != expected[profile_id]:
+                drifted.append(profile_id)
+        checked += len(profile_ids)
+
+    orphaned = list(db.session.execute(
+        select(ProfileDocument.profile_id)
+        .where(~select(Profile.id).where(Profile.id == ProfileDocument.profile_id).exists())
+    ).scalars())
+
+    if repair and (drifted or missing or orphaned):
+        write_documents(drifted + missing + orphaned)
+        db.session.commit()
+
+    elapsed = time.monotonic() - started
+    if drifted or missing or orphaned:
+        logger.warning(f"Profile documents: {len(drifted)} drifted, {len(missing)} missing, "
+                       f"{len(orphaned)} orphaned of {checked}{' (repaired)' if repair else ''}")
+    return {
+        'checked': checked,
+        'drifted': drifted,
+        'missing': missing,
+        'orphaned': orphaned,
+        'repaired': bool(repair and (drifted or missing or orphaned)),
+        'elapsed_seconds': round(elapsed, 3)
+    }
+
+
+def rebuild_documents(batch_size=DEFAULT_BATCH_SIZE):
+    """Rebuild every document; returns a report."""
+    started = time.monotonic()
+    written = 0
+    after_id = 0
+    while True:
+        profile_ids = list(db.session.execute(
+            select(Profile.id).where(Profile.id > after_id).order_by(Profile.id).limit(batch_size)
+        ).scalars())
+        if not profile_ids:
+            break
+        after_id = profile_ids[-1]
+        written += write_documents(profile_ids)
+        db.session.commit()
+    db.session.execute(delete(ProfileDocument).where(
+        ~select(Profile.id).where(Profile.id == ProfileDocument.profile_id).exists()))
+    db.session.commit()
+    return {'documents': written, 'elapsed_seconds': round(time.monotonic() - started, 3)}
+
+
+# Incremental mode: rebuild documents of changed profiles on commit
+
+def mark_changed(profile_ids, session=None):
+    """Rebuild the documents of ``profile_ids`` when the session commits.
+
+    A no-op unless document maintenance is enabled.
+    """
+    session = session or db.session
+    if event.contains(session, 'before_commit', _rebuild_on_commit):
+        _changed(session).update(profile_ids)
+
+
+def _changed(session):
+    return session.info.setdefault('documents_changed', set())
+
+
+def _collect_on_flush(session, flush_context):
+    changed = set()
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, Profile):
+            changed.add(obj.id)
+        elif isinstance(obj, _GRAPH_MODELS):
+            changed.add(obj.profile_id)
+    for obj in session.dirty:
+        if isinstance(obj, _GRAPH_MODELS) and session.is_modified(obj):
+            changed.add(obj.id if isinstance(obj, Profile) else obj.profile_id)
+    changed.discard(None)
+    if changed:
+        _changed(session).update(changed)
+
+
+def _rebuild_on_commit(session):
+    # Flush first so the final flush's changes are collected too
+    session.flush()
+    changed = session.info.pop('documents_changed', None)
+    if changed:
+        write_documents(changed, session)
+
+
+def _discard_on_rollback(session, previous_transaction):
+    session.info.pop('documents_changed', None)
+
+
+_SESSION_HOOKS = (
+    ('after_flush', _collect_on_flush),
+    ('before_commit', _rebuild_on_commit),
+    ('after_soft_rollback', _discard_on_rollback),
+)
+
+
+def enable_document_maintenance(session=None):
+    """Keep profile documents up to date as changes are committed."""
+    session = session or db.session
+    for name, hook in _SESSION_HOOKS:
+        if not event.contains(session, name, hook):
+            event.listen(session, name, hook)
+
+
+def disable_document_maintenance(session=None):
+    session = session or db.session
+    for name, hook in _SESSION_HOOKS:
+        if event.contains(session, name, hook):
+            event.remove(session, name, hook)
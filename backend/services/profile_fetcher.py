@@ -0,0 +1,100 @@
+"""Batch processor that fetches profiles from the LinkedIn data source.
+
+Each queued LinkedIn URL is fetched through the shared ``FetchClient``
+(pooled connections, conditional requests) and stored on its profile, on
+the shard that owns the URL. When the fetched data differs from the
+profile's latest version, that version is closed and a new one is added,
+so version history tracks real changes only.
+"""
+import json
+import logging
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit
+from sqlalchemy import select
+
+from models import Profile, ProfileVersion
+from services.fetch_client import create_fetch_client
+from services.shard_service import shard_set
+from utils.linkedin import canonicalize_linkedin_url
+
+logger = logging.getLogger(__name__)
+
+
+def save_profile(linkedin_url, data, fetched_at=None):
+    """Create or update the profile for ``linkedin_url`` on its shard from fetched ``data``; return it."""
+    fetched_at = fetched_at or datetime.utcnow()
+    with shard_set.profile_session(linkedin_url) as session:
+        profile = session.execute(
+            select(Profile).where(Profile.linkedin_url == linkedin_url)).scalar_one_or_none()
+        if profile is None:
+            profile = Profile(linkedin_url=linkedin_url, name=data.get('name') or linkedin_url)
+            session.add(profile)
+        elif data.get('name'):
+            profile.name = data['name']
+        profile.last_updated = fetched_at
+
+        latest = None
+        if profile.id is not None:
+            latest = session.execute(
+                select(ProfileVersion).where(ProfileVersion.profile_id == profile.id)
+                .order_by(ProfileVersion.version_number.desc()).limit(1)).scalar_one_or_none()
+        snapshot = json.dumps(data, sort_keys=True)
+        if latest is None or latest.data_snapshot != snapshot:
+            if latest is not None:
+                latest.valid_to = fetched_at
+            profile.versions.append(ProfileVersion(
+                version_number=latest.version_number + 1 if latest else 1,
+                data_snapshot=snapshot,
+                valid_from=fetched_at
+            ))
+        session.commit()
+    return profile
+
+
+class ProfileFetcher:
+    """Batch item processor: fetch a LinkedIn URL and store the profile."""
+
+    def __init__(self, app=None):
+        self.base_url = None
+        self._config = {}
+        self._client = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read the data source settings; the client is created on first use."""
+        self.close()
+        self.base_url = app.config.get('LINKEDIN_API_BASE_URL', '').rstrip('/')
+        self._config = app.config
+        app.extensions['profile_fetcher'] = self
+
+    @property
+    def client(self):
+        """The shared ``FetchClient``."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = create_fetch_client(self._config)
+        return self._client
+
+    def close(self):
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    def __call__(self, item):
+        if item.get('type') != 'url':
+            raise ValueError("Only LinkedIn URLs can be fetched; name lookups need a search source")
+        linkedin_url = canonicalize_linkedin_url(item['value'])
+        response = self.client.get(self.base_url + urlsplit(linkedin_url).path)
+        if not response.ok:
+            raise RuntimeError(f"Fetching {linkedin_url} failed with HTTP {response.status}")
+        profile = save_profile(linkedin_url, response.json())
+        return {'profile_id': profile.id, 'from_cache': response.from_cache}
+
+
+# Global instance registered by the application factory
+profile_fetcher = ProfileFetcher()
@@ -0,0 +1,276 @@
+"""Staleness-driven profile refresh scheduler.
+
+Instead of re-fetching every profile on a fixed cron, the scheduler ranks
+profiles by how likely they are to have changed since they were last
+fetched and spends a fixed request budget per window on the top of that
+ranking.
+
+Each profile's change rate is estimated from its ``ProfileVersion`` history
+(versions per day, smoothed with a prior so new profiles get a sensible
+default). Treating changes as a Poisson process, the probability that a
+profile changed since ``last_updated`` is ``1 - exp(-rate * staleness)``;
+that probability is multiplied by the profile's highest tag priority to
+give its score.
+
+Profiles are ranked on every shard in parallel and the per-shard top lists
+are merged. The request budget is shared by every process: each issued
+refresh is a row in the application database's ``refresh_issues``, keyed by
+shard and profile id since ids are only unique within a shard, and a run
+holds a database lock (an advisory lock on Postgres, the write lock on
+SQLite) while it counts the window and records its refreshes. The
+scheduler runs only in the process started with ``flask
+run-refresh-scheduler``, which also runs the batch workers that fetch the
+queued profiles.
+"""
+import heapq
+import logging
+import math
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy import case, delete, func, insert, select, text
+
+from extensions import db
+from models import Profile, ProfileTag, ProfileVersion, RefreshIssue
+from services.batch_service import PRIORITY_LOW, batch_service as default_batch_service
+from services.shard_service import shard_set
+from services.version_archive import version_archive
+
+logger = logging.getLogger(__name__)
+
+# Postgres advisory lock key held while a run spends the budget
+BUDGET_LOCK_KEY = 0x72656672
+
+# Smoothing prior for the change-rate estimate: one change per PRIOR_DAYS
+PRIOR_CHANGES = 1.0
+PRIOR_DAYS = 90.0
+
+RefreshCandidate = namedtuple(
+    'RefreshCandidate', 'profile_id linkedin_url score staleness_days change_rate shard')
+
+
+def estimate_change_rate(version_count, first_seen, now):
+    """Estimated profile changes per day from its version history."""
+    changes = max((version_count or 0) - 1, 0)
+    observed_days = (now - first_seen).total_seconds() / 86400 if first_seen else 0.0
+    return (changes + PRIOR_CHANGES) / (max(observed_days, 0.0) + PRIOR_DAYS)
+
+
+def change_probability(change_rate, staleness_days):
+    """Probability that at least one change happened in ``staleness_days``."""
+    return 1.0 - math.exp(-change_rate * max(staleness_days, 0.0))
+
+
+class RefreshScheduler:
+    """Issue refreshes for the stalest, most volatile profiles within a budget."""
+
+    def __init__(self, app=None, batch=None):
+        self.app = None
+        self.batch = batch or default_batch_service
+        self.budget = 100
+        self.window_seconds = 3600
+        self.interval_seconds = 300
+        self.min_age_hours = 24
+        self.tag_priorities = {}
+        self._stop = threading.Event()
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read scheduler settings from the app config."""
+        self.app = app
+        self.budget = app.config.get('REFRESH_BUDGET_PER_WINDOW', self.budget)
+        self.window_seconds = app.config.get('REFRESH_WINDOW_SECONDS', self.window_seconds)
+        self.interval_seconds = app.config.get('REFRESH_INTERVAL_SECONDS', self.interval_seconds)
+        self.min_age_hours = app.config.get('REFRESH_MIN_AGE_HOURS', self.min_age_hours)
+        self.tag_priorities = dict(app.config.get('REFRESH_TAG_PRIORITIES') or {})
+        app.extensions['refresh_scheduler'] = self
+
+    # Budget
+
+    def _window_start(self, now):
+        return now - timedelta(seconds=self.window_seconds)
+
+    def _lock_budget(self, now):
+        """Serialize budget spending across processes until the transaction ends.
+
+        Pruning expired issues is the first write, which on SQLite takes the
+        database write lock.
+        """
+        if db.session.get_bind().dialect.name == 'postgresql':
+            db.session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': BUDGET_LOCK_KEY})
+        db.session.execute(delete(RefreshIssue).where(RefreshIssue.issued_at <= self._window_start(now)))
+
+    def issued_in_window(self, now=None):
+        """``(shard, profile id)`` of profiles refreshed in the current window, one per issued request."""
+        now = now or datetime.utcnow()
+        return [tuple(row) for row in db.session.execute(
+            select(RefreshIssue.shard, RefreshIssue.profile_id)
+            .where(RefreshIssue.issued_at > self._window_start(now))
+        )]
+
+    def budget_remaining(self, now=None):
+        """Refresh requests still available in the current window, across all processes."""
+        return max(self.budget - len(self.issued_in_window(now)), 0)
+
+    # Ranking
+
+    def _tag_weight_query(self):
+        weight = case(self.tag_priorities, value=ProfileTag.tag_name, else_=1.0)
+        return (
+            select(ProfileTag.profile_id, func.max(weight).label('tag_weight'))
+            .where(ProfileTag.tag_name.in_(list(self.tag_priorities)))
+            .group_by(ProfileTag.profile_id)
+            .subquery()
+        )
+
+    def rank(self, limit, now=None, exclude=()):
+        """Return the ``limit`` highest-scoring refresh candidates.
+
+        Profiles fetched within ``min_age_hours`` or in ``exclude`` (``(shard,
+        profile id)`` pairs already issued in this window) are skipped. Each
+        shard streams its rows into a bounded heap and the per-shard heaps
+        are merged.
+        """
+        now = now or datetime.utcnow()
+        if limit <= 0:
+            return []
+
+        versions = (
+            select(
+                ProfileVersion.profile_id,
+                func.count(ProfileVersion.id).label('version_count'),
+                func.min(ProfileVersion.valid_from).label('first_seen')
+            )
+            .group_by(ProfileVersion.profile_id)
+            .subquery()
+        )
+        columns = [
+            Profile.id, Profile.linkedin_url, Profile.last_updated, Profile.created_at,
+            versions.c.version_count, versions.c.first_seen
+        ]
+        stmt = select(*columns).outerjoin(versions, versions.c.profile_id == Profile.id)
+        tags = None
+        if self.tag_priorities:
+            tags = self._tag_weight_query()
+            stmt = stmt.add_columns(tags.c.tag_weight).outerjoin(tags, tags.c.profile_id == Profile.id)
+
+        # Archived versions count towards the history too; the archive holds
+        # the application database's versions, so it only applies unsharded
+        archived = version_archive.version_stats() if not shard_set.sharded else {}
+        min_age_days = self.min_age_hours / 24
+        recent = set(exclude)
+
+        def candidates(session, shard):
+            rows = session.execute(stmt.execution_options(yield_per=1000))
+            for row in rows:
+                if (shard, row.id) in recent:
+                    continue
+                fetched_at = row.last_updated or row.created_at
+                staleness = (now - fetched_at).total_seconds() / 86400 if fetched_at else float('inf')
+                if row.last_updated is not None and staleness < min_age_days:
+                    continue
+
+                version_count, first_seen = row.version_count or 0, row.first_seen
+                if row.id in archived:
+                    archived_count, archived_first_seen = archived[row.id]
+                    version_count += archived_count
+                    first_seen = min(first_seen, archived_first_seen) if first_seen else archived_first_seen
+                rate = estimate_change_rate(version_count, first_seen or row.created_at, now)
+                # Never-fetched profiles are certain to need data
+                probability = 1.0 if row.last_updated is None else change_probability(rate, staleness)
+                weight = (row.tag_weight if tags is not None else None) or 1.0
+                yield RefreshCandidate(row.id, row.linkedin_url, probability * weight,
+                                       staleness, rate, shard)
+
+        def key(candidate):
+            return candidate.score, candidate.staleness_days
+
+        ranked = shard_set.scatter(
+            lambda session, shard: heapq.nlargest(limit, candidates(session, shard), key=key))
+        return heapq.nlargest(limit, (c for top in ranked.values() for c in top), key=key)
+
+    # Issuing
+
+    def run_once(self, now=None):
+        """Rank profiles and queue refreshes for the remaining budget.
+
+        Returns the batch job the refreshes were queued on, or None if the
+        budget is spent or nothing needs refreshing. Ranking reads every
+        shard, so it runs before the budget lock is taken; candidates issued
+        by another process in the meantime are dropped under the lock.
+        """
+        now = now or datetime.utcnow()
+        started = time.monotonic()
+        issued = self.issued_in_window(now)
+        remaining = max(self.budget - len(issued), 0)
+        ranked = self.rank(remaining, now=now, exclude=issued) if remaining else []
+        try:
+            self._lock_budget(now)
+            issued = self.issued_in_window(now)
+            recent = set(issued)
+            chosen = [candidate for candidate in ranked
+                      if (candidate.shard, candidate.profile_id) not in recent]
+            chosen = chosen[:max(self.budget - len(issued), 0)]
+            if chosen:
+                db.session.execute(insert(RefreshIssue), [
+                    {'shard': candidate.shard, 'profile_id': candidate.profile_id, 'issued_at': now}
+                    for candidate in chosen
+                ])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        if not chosen:
+            return None
+
+        job = self.batch.create_job(source='refresh-scheduler')
+        self.batch.enqueue(job, [
+            {
+                'type': 'url',
+                'value': candidate.linkedin_url,
+                'profile_id': candidate.profile_id,
+                'reason': 'refresh',
+                'score': round(candidate.score, 4)
+            }
+            for candidate in chosen
+        ], priority=PRIORITY_LOW)
+        self.batch.finish_submission(job)
+
+        logger.info(
+            f"Refresh scheduler queued {len(chosen)} profiles on job {job.id} "
+            f"(top score {chosen[0].score:.3f}, ranked in {time.monotonic() - started:.3f}s)"
+        )
+        return job
+
+    # Background thread
+
+    def start(self):
+        """Run the scheduler every ``interval_seconds`` in a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, daemon=True,
+                                        name='refresh-scheduler')
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_forever(self):
+        """Run the scheduler every ``interval_seconds`` until ``stop`` is called."""
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    self.run_once()
+            except Exception as e:
+                logger.error(f"Refresh scheduler run failed: {e}")
+            self._stop.wait(self.interval_seconds)
+
+
+# Shared instance, bound to the app in create_app() and run by run-refresh-scheduler
+refresh_scheduler = RefreshScheduler()
@@ -0,0 +1,190 @@
+"""Read/write routing between the primary database and a read replica.
+
+When ``REPLICA_DATABASE_URL`` is configured, read-only requests (GET,
+HEAD, OPTIONS) read from the replica and everything else uses the primary.
+Two things keep a client on the primary:
+
+* Read-your-writes: a successful write request sets a short-lived cookie
+  that pins that client's reads to the primary for ``REPLICA_PIN_SECONDS``,
+  and a write inside any request pins the rest of that request.
+* Lag: the router bumps a heartbeat row on the primary at most every
+  ``REPLICA_LAG_CHECK_SECONDS`` and compares the previous beat with what the
+  replica has seen. While the replica is more than ``REPLICA_MAX_LAG_SECONDS``
+  behind (or unreachable) all reads go to the primary.
+
+The heartbeat only measures lag when something replicates the primary into
+the replica, e.g. Postgres streaming replication; locally the replica can be
+a second SQLite file kept in sync by hand.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from flask import current_app, request
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from extensions import db
+from models import ReplicationHeartbeat
+from utils.db_routing import REPLICA_ENGINE
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+PIN_COOKIE = 'db_primary_until'
+HEARTBEAT_ID = 1
+
+
+def primary_only(view):
+    """Mark a read-only view that must always read from the primary."""
+    view.primary_only = True
+    return view
+
+
+class ReplicaRouter:
+    """Route read-only requests to the replica while it keeps up."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.max_lag_seconds = 30.0
+        self.lag_check_seconds = 5.0
+        self.pin_seconds = 10.0
+        self.lag_seconds = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read routing settings and register request hooks when a replica is configured."""
+        self.app = app
+        self.max_lag_seconds = app.config.get('REPLICA_MAX_LAG_SECONDS', self.max_lag_seconds)
+        self.lag_check_seconds = app.config.get('REPLICA_LAG_CHECK_SECONDS', self.lag_check_seconds)
+        self.pin_seconds = app.config.get('REPLICA_PIN_SECONDS', self.pin_seconds)
+        self.lag_seconds = None
+        self._checked_at = None
+        app.extensions['replica_router'] = self
+        url = app.config.get('REPLICA_DATABASE_URL')
+        if url:
+            app.extensions[REPLICA_ENGINE] = create_engine(
+                url, **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+            app.before_request(self._before_request)
+            app.after_request(self._after_request)
+            app.teardown_request(self._teardown_request)
+
+    @property
+    def engine(self):
+        """The current app's replica engine, or None."""
+        return current_app.extensions.get(REPLICA_ENGINE)
+
+    # Lag
+
+    def check_lag(self, now=None):
+        """Bump the primary heartbeat and return the replica lag in seconds.
+
+        The lag is the age of the replica's heartbeat relative to the
+        previous primary beat; it is infinite when the replica is unreachable.
+        """
+        now = now or datetime.utcnow()
+        heartbeat = select(ReplicationHeartbeat.beat_at).where(ReplicationHeartbeat.id == HEARTBEAT_ID)
+        with db.engine.begin() as conn:
+            previous = conn.execute(heartbeat).scalar()
+            if previous is None:
+                conn.execute(insert(ReplicationHeartbeat).values(id=HEARTBEAT_ID, beat_at=now))
+            else:
+                conn.execute(update(ReplicationHeartbeat)
+                             .where(ReplicationHeartbeat.id == HEARTBEAT_ID).values(beat_at=now))
+        try:
+            with self.engine.connect() as conn:
+                seen = conn.execute(heartbeat).scalar()
+        except SQLAlchemyError as e:
+            logger.warning(f"Replica heartbeat check failed: {str(e)}")
+            return float('inf')
+
+        if previous is None:
+            return 0.0
+        if seen is None:
+            return float('inf')
+        return max((previous - seen).total_seconds(), 0.0)
+
+    def replica_healthy(self):
+        """Whether the replica is within the lag threshold, re-checking when due.
+
+        One caller runs a due check, outside the lock; a failed check counts
+        as infinite lag.
+        """
+        now = time.monotonic()
+        with self._lock:
+            due = self._checked_at is None or now - self._checked_at >= self.lag_check_seconds
+            if due:
+                self._checked_at = now
+            lag = self.lag_seconds
+        if due:
+            try:
+                lag = self.check_lag()
+            except SQLAlchemyError as e:
+                logger.warning(f"Replica lag check failed: {str(e)}")
+                lag = float('inf')
+            with self._lock:
+                self.lag_seconds = lag
+            if lag > self.max_lag_seconds:
+                logger.warning(f"Replica lag {lag:.1f}s exceeds "
+                               f"{self.max_lag_seconds:.1f}s; reading from the primary")
+        # Until the first check completes the replica is not trusted
+        return lag is not None and lag <= self.max_lag_seconds
+
+    # Routing
+
+    def _pinned(self):
+        try:
+            return float(request.cookies.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def _before_request(self):
+        self._teardown_request()
+        if request.method not in READ_METHODS or self._pinned():
+            return
+        view = current_app.view_functions.get(request.endpoint)
+        if getattr(view, 'primary_only', False):
+            return
+        if self.replica_healthy():
+            db.session.info['use_replica'] = True
+
+    def _after_request(self, response):
+        wrote = request.method not in READ_METHODS or db.session.info.get('wrote')
+        if wrote and response.status_code < 400:
+            response.set_cookie(PIN_COOKIE, f"{time.time() + self.pin_seconds:.3f}",
+                                max_age=int(self.pin_seconds) + 1, httponly=True, samesite='Lax')
+        return response
+
+    def _teardown_request(self, exc=None):
+        db.session.info.pop('use_replica', None)
+        db.session.info.pop('wrote', None)
+
+    @contextmanager
+    def replica_reads(self):
+        """Read from the replica inside the block, e.g. for export streams.
+
+        Falls back to the primary when no replica is configured or it lags.
+        Writes made before the block do not pin it; writes inside it pin the
+        rest of the block and carry over afterwards.
+        """
+        info = db.session.info
+        previous = info.get('use_replica')
+        wrote = info.pop('wrote', False)
+        info['use_replica'] = bool(self.engine is not None and self.replica_healthy())
+        try:
+            yield
+        finally:
+            if previous is None:
+                info.pop('use_replica', None)
+            else:
+                info['use_replica'] = previous
+            if wrote:
+                info['wrote'] = True
+
+
+# Global instance registered by the application factory
+replica_router = ReplicaRouter()
@@ -0,0 +1,273 @@
+"""Role type classification for job history.
+
+Fills ``JobHistory.role_type`` (Full-time, Internship, Volunteer, ...) from
+the role title, description and company size. Titles repeat heavily across
+profiles, so the title decision is memoized by normalized title and each
+batch classifies only its distinct titles; descriptions and company size
+are consulted only when the title alone is inconclusive.
+
+Rows are reclassified when they have no role type yet, or when they were
+classified automatically and have changed since. A role type set by hand
+(no ``role_type_classified_at``) is never overwritten.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+from sqlalchemy import and_, event, inspect, or_, select, update
+
+from extensions import db
+from models import JobHistory
+from services.profile_documents import mark_changed as mark_documents_changed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_CACHE_SIZE = 100000
+
+FULL_TIME = 'Full-time'
+PART_TIME = 'Part-time'
+SELF_EMPLOYED = 'Self-employed'
+FREELANCE = 'Freelance'
+CONTRACT = 'Contract'
+INTERNSHIP = 'Internship'
+APPRENTICESHIP = 'Apprenticeship'
+SEASONAL = 'Seasonal'
+VOLUNTEER = 'Volunteer'
+
+ROLE_TYPES = (FULL_TIME, PART_TIME, SELF_EMPLOYED, FREELANCE, CONTRACT,
+              INTERNSHIP, APPRENTICESHIP, SEASONAL, VOLUNTEER)
+
+# Ordered (role type, pattern) rules; the first match wins
+TITLE_RULES = [
+    (INTERNSHIP, r'\b(?:intern|interns|internship|co-?op|trainee|summer analyst|summer associate)\b'),
+    (APPRENTICESHIP, r'\bapprentice(?:ship)?\b'),
+    (VOLUNTEER, r'\b(?:volunteer|volunteering|pro bono)\b'),
+    (FREELANCE, r'\b(?:freelance|freelancer)\b'),
+    (CONTRACT, r'\b(?:contract|contractor|contracting|temp|temporary|interim)\b'),
+    (PART_TIME, r'\b(?:part-?time|teaching assistant|research assistant|tutor)\b'),
+    (SEASONAL, r'\bseasonal\b'),
+    # Bare "owner" would also match "Product Owner" and "Process Owner"
+    (SELF_EMPLOYED, r'^owner$|\b(?:founder|co-?founder|co-?owner|self-?employed|sole proprietor'
+                    r'|(?:business|shop|store|restaurant|practice|studio|agency|firm) owner'
+                    r'|owner(?:/| |-)(?:operator|founder))\b'),
+]
+
+# Descriptions are only consulted when the title is inconclusive, and only
+# phrases describing the role itself count: "ran the internship program" or
+# "organized volunteer days" say nothing about the author's own role
+DESCRIPTION_RULES = [
+    (INTERNSHIP, r'\b(?:(?:as an?|my|this) (?:summer )?intern(?:ship)?'
+                 r'|intern(?:ship)? (?:role|position|placement))\b'),
+    (VOLUNTEER, r'\b(?:volunteered|(?:as an?|my|this) volunteer|volunteer (?:role|position|basis)'
+                r'|unpaid (?:role|position|work|basis))\b'),
+    (FREELANCE, r'\b(?:freelancing|(?:as an?) freelancer|freelance (?:role|position|basis|work))\b'),
+    (CONTRACT, r'\b(?:contract (?:role|position|basis)|fixed-term|\d+-month contract)\b'),
+    (PART_TIME, r'\b(?:part-?time (?:role|position|job|basis)|(?:worked|working) part-?time)\b'),
+    (SEASONAL, r'\bseasonal (?:role|position|job|work)\b'),
+]
+
+SELF_EMPLOYED_SIZES = {'self-employed', 'self employed', '1', '0-1', '1 employee', 'myself only'}
+
+
+def _compile(rules):
+    """Compile ordered rules into one alternation with a named group per rule."""
+    pattern = '|'.join(f'(?P<r{i}>{regex})' for i, (_, regex) in enumerate(rules))
+    return re.compile(pattern, re.IGNORECASE), [role_type for role_type, _ in rules]
+
+
+def _first_match(compiled, text):
+    pattern, labels = compiled
+    best = None
+    for match in pattern.finditer(text):
+        index = int(match.lastgroup[1:])
+        if best is None or index < best:
+            best = index
+            if best == 0:
+                break
+    return labels[best] if best is not None else None
+
+
+def normalize_title(role):
+    """Lowercase a role title and collapse punctuation and whitespace."""
+    return ' '.join(re.sub(r'[^\w+#/-]+', ' ', (role or '').lower()).split())
+
+
+class RoleTypeClassifier:
+    """Rule-based role type classifier with a thread-safe memoized title decision."""
+
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE):
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        # Shared by request threads classifying on flush
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._title_rules = _compile(TITLE_RULES)
+        self._description_rules = _compile(DESCRIPTION_RULES)
+
+    def classify_title(self, normalized_title):
+        """Return the role type implied by a normalized title, or None."""
+        with self._lock:
+            if normalized_title in self._cache:
+                self._cache.move_to_end(normalized_title)
+                self.hits += 1
+                return self._cache[normalized_title]
+            self.misses += 1
+
+        # Matched outside the lock; a title raced in by another thread is just stored twice
+        result = _first_match(self._title_rules, normalized_title)
+        with self._lock:
+            self._cache[normalized_title] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def classify(self, role, description=None, company_size=None, normalized_title=None):
+        """Classify one job."""
+        if normalized_title is None:
+            normalized_title = normalize_title(role)
+        result = self.classify_title(normalized_title)
+        if result is not None:
+            return result
+        if description:
+            result = _first_match(self._description_rules, description)
+            if result is not None:
+                return result
+        if company_size and company_size.strip().lower() in SELF_EMPLOYED_SIZES:
+            return SELF_EMPLOYED
+        return FULL_TIME
+
+    def classify_batch(self, rows):
+        """Classify ``(role, description, company_size)`` tuples.
+
+        Each distinct title in the batch is normalized and looked up once.
+        """
+        titles = {}
+        for role, _, _ in rows:
+            if role not in titles:
+                titles[role] = normalize_title(role)
+        return [
+            self.classify(role, description, company_size, normalized_title=titles[role])
+            for role, description, company_size in rows
+        ]
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+# Shared classifier, so the title cache survives across runs and ingest
+classifier = RoleTypeClassifier()
+
+
+def _pending_jobs(after_id, limit, full):
+    stmt = (
+        select(JobHistory.id, JobHistory.profile_id, JobHistory.role, JobHistory.description,
+               JobHistory.company_size, JobHistory.updated_at)
+        .where(JobHistory.id > after_id)
+        .order_by(JobHistory.id)
+        .limit(limit)
+    )
+    automatic = JobHistory.role_type_classified_at.isnot(None)
+    if full:
+        stmt = stmt.where(or_(JobHistory.role_type.is_(None), automatic))
+    else:
+        stmt = stmt.where(or_(
+            JobHistory.role_type.is_(None),
+            and_(automatic, JobHistory.role_type_classified_at != JobHistory.updated_at)
+        ))
+    return db.session.execute(stmt).all()
+
+
+def classify_role_types(batch_size=DEFAULT_BATCH_SIZE, full=False, role_classifier=None):
+    """Classify unclassified or changed jobs in batches and return a report.
+
+    ``full`` reclassifies every automatically classified job, e.g. after the
+    rules changed.
+    """
+    role_classifier = role_classifier or classifier
+    started = time.monotonic()
+    processed = 0
+    by_type = Counter()
+    after_id = 0
+
+    while True:
+        rows = _pending_jobs(after_id, batch_size, full)
+        if not rows:
+            break
+        after_id = rows[-1].id
+
+        labels = role_classifier.classify_batch(
+            [(row.role, row.description, row.company_size) for row in rows])
+        db.session.execute(update(JobHistory), [
+            {
+                'id': row.id,
+                'role_type': label,
+                'role_type_classified_at': row.updated_at,
+                'updated_at': row.updated_at
+            }
+            for row, label in zip(rows, labels)
+        ])
+        # Bulk updates bypass the flush hooks that keep profile documents current
+        mark_documents_changed({row.profile_id for row in rows})
+        db.session.commit()
+        processed += len(rows)
+        by_type.update(labels)
+
+    elapsed = time.monotonic() - started
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    logger.info(
+        f"Role classification: {processed} jobs in {elapsed:.2f}s ({rate:.0f} jobs/s, "
+        f"title cache hit rate {role_classifier.hit_rate:.0%})"
+    )
+    return {
+        'processed': processed,
+        'by_type': dict(by_type),
+        'elapsed_seconds': round(elapsed, 3),
+        'jobs_per_second': round(rate, 1),
+        'title_cache_hit_rate': round(role_classifier.hit_rate, 3)
+    }
+
+
+# Incremental mode: classify jobs as they are flushed
+
+_CLASSIFIED_FIELDS = ('role', 'description', 'company_size')
+
+
+def _classify_on_flush(session, flush_context, instances):
+    now = None
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, JobHistory):
+            continue
+        if obj in session.new:
+            if obj.role_type is not None:
+                continue
+        else:
+            state = inspect(obj)
+            if obj.role_type_classified_at is None or state.attrs.role_type.history.has_changes():
+                continue
+            if not any(state.attrs[field].history.has_changes() for field in _CLASSIFIED_FIELDS):
+                continue
+
+        now = now or datetime.utcnow()
+        obj.role_type = classifier.classify(obj.role, obj.description, obj.company_size)
+        # Set updated_at explicitly so the batch pass sees the row as current
+        obj.updated_at = now
+        obj.role_type_classified_at = now
+
+
+def enable_ingest_classification(session=None):
+    """Classify new and changed jobs as they are flushed."""
+    session = session or db.session
+    if not event.contains(session, 'before_flush', _classify_on_flush):
+        event.listen(session, 'before_flush', _classify_on_flush)
+
+
+def disable_ingest_classification(session=None):
+    session = session or db.session
+    if event.contains(session, 'before_flush', _classify_on_flush):
+        event.remove(session, 'before_flush', _classify_on_flush)
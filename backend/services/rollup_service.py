@@ -0,0 +1,422 @@
+"""Pre-aggregated cohort rollups for tenure and transition statistics.
+
+Dashboards read tenure distributions (by company, role type and start
+year) and company-to-company transition counts from summary tables instead
+of aggregating ``job_history`` on every request, so a read costs the same
+regardless of how many jobs are stored.
+
+The rollups are built in two steps:
+
+* ``TenureFact`` holds one row per job: its cohort keys, tenure, tenure
+  bucket and the next company the profile moved to. The next company is
+  the first later job that starts once this one has ended (allowing a short
+  overlap for notice periods); side roles held within the span of another
+  job are neither the source nor the target of a transition.
+* ``TenureRollup`` and ``CompanyTransitionRollup`` are grouped from the
+  facts. Each tenure rollup stores a fixed-bucket histogram, from which
+  percentiles are interpolated at read time.
+
+An incremental refresh rebuilds facts only for profiles whose jobs changed
+(tracked by ``ProfileAnalysisState.rollups_signature``) and regroups only
+the cohorts those facts belonged to before and after. The tenure of open
+jobs grows without any change to the profile, so every refresh also ages
+the open facts and regroups the cohorts whose tenures moved. A full rebuild
+replaces everything in one transaction using plain ``DELETE``, never
+``TRUNCATE``, so on Postgres readers keep seeing the previous rollups
+until it commits and are never blocked.
+"""
+import json
+import logging
+import time
+from bisect import bisect_right
+from datetime import date, timedelta
+from itertools import groupby
+from sqlalchemy import delete, exists, func, insert, select, update
+
+from extensions import db
+from models import CompanyTransitionRollup, JobHistory, Profile, TenureFact, TenureRollup
+from services.career_event_service import (
+    changed_profile_ids, months_between, normalize_company, save_signatures
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+# Lower edges, in months, of the tenure histogram buckets; the last is open-ended
+TENURE_BUCKETS = (0, 3, 6, 9, 12, 18, 24, 30, 36, 48, 60, 84, 120, 180, 240)
+
+UNCLASSIFIED = 'Unclassified'
+
+DIMENSIONS = {
+    'company': TenureFact.company_key,
+    'role_type': TenureFact.role_type,
+    'start_year': TenureFact.start_year,
+}
+
+PERCENTILES = (0.25, 0.5, 0.75, 0.9)
+
+# Keys per IN clause when regrouping affected cohorts
+_KEY_CHUNK = 500
+
+# A job starting this long before the previous one ended still follows it
+TRANSITION_OVERLAP = timedelta(days=31)
+
+
+def tenure_bucket(months):
+    """Index of the histogram bucket holding ``months``."""
+    return bisect_right(TENURE_BUCKETS, max(months, 0)) - 1
+
+
+def approximate_percentile(histogram, q, min_months, max_months):
+    """Interpolate the ``q`` quantile from a bucket histogram.
+
+    Values are assumed uniform within a bucket; the outer buckets are
+    narrowed to the observed minimum and maximum.
+    """
+    total = sum(histogram)
+    if not total:
+        return None
+    target = q * total
+    cumulative = 0
+    for index, count in enumerate(histogram):
+        if count and cumulative + count >= target:
+            low = max(TENURE_BUCKETS[index], min_months)
+            high = TENURE_BUCKETS[index + 1] if index + 1 < len(TENURE_BUCKETS) else max_months
+            high = max(min(high, max_months), low)
+            return round(low + (high - low) * (target - cumulative) / count, 1)
+        cumulative += count
+    return float(max_months)
+
+
+def _job_rows(profile_ids):
+    """Jobs of ``profile_ids`` ordered by profile and start date."""
+    stmt = select(
+        JobHistory.id,
+        JobHistory.profile_id,
+        JobHistory.company_name,
+        JobHistory.role_type,
+        JobHistory.start_date,
+        JobHistory.end_date
+    ).where(JobHistory.profile_id.in_(profile_ids)).order_by(
+        JobHistory.profile_id, JobHistory.start_date, JobHistory.id)
+    return db.session.execute(stmt).all()
+
+
+def _is_side_role(job, other):
+    """Whether ``job`` is held within the span of ``other``."""
+    if other.start_date > job.start_date:
+        return False
+    if other.end_date is not None and (job.end_date is None or other.end_date < job.end_date):
+        return False
+    # Of two jobs with the same span, the later one is the side role
+    same_span = other.start_date == job.start_date and other.end_date == job.end_date
+    return not same_span or other.id < job.id
+
+
+def next_jobs(jobs):
+    """Map each job id of one profile to the job that followed it, if any.
+
+    ``jobs`` are ordered by start date. Only sequential jobs count: a closed
+    job is followed by the first later job starting no more than
+    ``TRANSITION_OVERLAP`` before it ended, and side roles are skipped.
+    """
+    main = [job for job in jobs
+            if not any(other is not job and _is_side_role(job, other) for other in jobs)]
+    following = {}
+    for position, job in enumerate(main):
+        if job.end_date is None:
+            continue
+        following[job.id] = next(
+            (later for later in main[position + 1:]
+             if later.start_date >= job.end_date - TRANSITION_OVERLAP), None)
+    return following
+
+
+def build_facts(rows, today=None):
+    """Turn job rows (ordered by profile and start date) into ``TenureFact`` dicts."""
+    today = today or date.today()
+    facts = []
+    for _, jobs in groupby(rows, key=lambda row: row.profile_id):
+        jobs = list(jobs)
+        following = next_jobs(jobs)
+        for row in jobs:
+            tenure = max(months_between(row.start_date, row.end_date or today), 0)
+            company_key = normalize_company(row.company_name)
+            next_job = following.get(row.id)
+            next_key = normalize_company(next_job.company_name) if next_job else None
+            moved = bool(next_key) and next_key != company_key
+            facts.append({
+                'profile_id': row.profile_id,
+                'job_history_id': row.id,
+                'company_key': company_key,
+                'company_name': row.company_name,
+                'role_type': row.role_type or UNCLASSIFIED,
+                'start_year': row.start_date.year,
+                'start_date': row.start_date,
+                'is_open': row.end_date is None,
+                'tenure_months': tenure,
+                'tenure_bucket': tenure_bucket(tenure),
+                'next_company_key': next_key if moved else None,
+                'next_company_name': next_job.company_name if moved else None
+            })
+    return facts
+
+
+class _AffectedKeys:
+    """Cohort keys whose rollups must be regrouped."""
+
+    def __init__(self):
+        self.tenure = {dimension: set() for dimension in DIMENSIONS}
+        self.transitions = set()
+
+    def add(self, company_key, role_type, start_year, next_company_key):
+        self.tenure['company'].add(company_key)
+        self.tenure['role_type'].add(role_type)
+        self.tenure['start_year'].add(start_year)
+        if next_company_key:
+            self.transitions.add(company_key)
+
+
+def _replace_facts(profile_ids, affected, today=None):
+    """Rebuild the facts of ``profile_ids``, recording old and new cohort keys."""
+    old = db.session.execute(
+        select(TenureFact.company_key, TenureFact.role_type, TenureFact.start_year,
+               TenureFact.next_company_key)
+        .where(TenureFact.profile_id.in_(profile_ids))
+    ).all()
+    for row in old:
+        affected.add(*row)
+
+    facts = build_facts(_job_rows(profile_ids), today=today)
+    for fact in facts:
+        affected.add(fact['company_key'], fact['role_type'], fact['start_year'],
+                     fact['next_company_key'])
+
+    db.session.execute(delete(TenureFact).where(TenureFact.profile_id.in_(profile_ids)))
+    if facts:
+        db.session.execute(insert(TenureFact), facts)
+    return len(facts)
+
+
+def _age_open_facts(affected, today=None):
+    """Recompute the tenure of open jobs as of ``today``; returns how many changed."""
+    today = today or date.today()
+    rows = db.session.execute(
+        select(TenureFact.id, TenureFact.company_key, TenureFact.role_type, TenureFact.start_year,
+               TenureFact.start_date, TenureFact.tenure_months)
+        .where(TenureFact.is_open.is_(True))
+    )
+    aged = []
+    for row in rows:
+        tenure = max(months_between(row.start_date, today), 0)
+        if tenure != row.tenure_months:
+            aged.append({'id': row.id, 'tenure_months': tenure, 'tenure_bucket': tenure_bucket(tenure)})
+            # Transitions start from closed jobs only, so they are unaffected
+            affected.add(row.company_key, row.role_type, row.start_year, None)
+    if aged:
+        db.session.execute(update(TenureFact), aged)
+    return len(aged)
+
+
+def _chunks(keys):
+    keys = sorted(keys)
+    for offset in range(0, len(keys), _KEY_CHUNK):
+        yield keys[offset:offset + _KEY_CHUNK]
+
+
+def _regroup_tenure(dimension, keys=None):
+    """Recompute the tenure rollups of ``dimension`` for ``keys`` (all when None)."""
+    column = DIMENSIONS[dimension]
+    chunks = [None] if keys is None else _chunks(keys)
+    rollups = 0
+    for chunk in chunks:
+        stats = select(
+            column.label('key'),
+            func.count().label('job_count'),
+            func.sum(TenureFact.tenure_months).label('total_months'),
+            func.min(TenureFact.tenure_months).label('min_months'),
+            func.max(TenureFact.tenure_months).label('max_months'),
+            func.max(TenureFact.company_name).label('company_name')
+        ).group_by(column)
+        buckets = select(
+            column.label('key'), TenureFact.tenure_bucket, func.count().label('job_count')
+        ).group_by(column, TenureFact.tenure_bucket)
+        stale = delete(TenureRollup).where(TenureRollup.dimension == dimension)
+        if chunk is not None:
+            stats = stats.where(column.in_(chunk))
+            buckets = buckets.where(column.in_(chunk))
+            stale = stale.where(TenureRollup.dimension_key.in_([str(key) for key in chunk]))
+
+        histograms = {}
+        for row in db.session.execute(buckets):
+            histogram = histograms.setdefault(row.key, [0] * len(TENURE_BUCKETS))
+            histogram[row.tenure_bucket] = row.job_count
+
+        rows = [
+            {
+                'dimension': dimension,
+                'dimension_key': str(row.key),
+                'label': row.company_name if dimension == 'company' else str(row.key),
+                'job_count': row.job_count,
+                'total_months': row.total_months,
+                'min_months': row.min_months,
+                'max_months': row.max_months,
+                'histogram': json.dumps(histograms[row.key])
+            }
+            for row in db.session.execute(stats)
+        ]
+        db.session.execute(stale)
+        if rows:
+            db.session.execute(insert(TenureRollup), rows)
+        rollups += len(rows)
+    return rollups
+
+
+def _regroup_transitions(from_keys=None):
+    """Recompute transition counts out of ``from_keys`` (all when None)."""
+    chunks = [None] if from_keys is None else _chunks(from_keys)
+    rollups = 0
+    for chunk in chunks:
+        stmt = select(
+            TenureFact.company_key,
+            TenureFact.next_company_key,
+            func.max(TenureFact.company_name).label('company_name'),
+            func.max(TenureFact.next_company_name).label('next_company_name'),
+            func.count().label('transition_count')
+        ).where(TenureFact.next_company_key.isnot(None)).group_by(
+            TenureFact.company_key, TenureFact.next_company_key
+        )
+        stale = delete(CompanyTransitionRollup)
+        if chunk is not None:
+            stmt = stmt.where(TenureFact.company_key.in_(chunk))
+            stale = stale.where(CompanyTransitionRollup.from_company_key.in_(chunk))
+
+        rows = [
+            {
+                'from_company_key': row.company_key,
+                'to_company_key': row.next_company_key,
+                'from_company': row.company_name,
+                'to_company': row.next_company_name,
+                'transition_count': row.transition_count
+            }
+            for row in db.session.execute(stmt)
+        ]
+        db.session.execute(stale)
+        if rows:
+            db.session.execute(insert(CompanyTransitionRollup), rows)
+        rollups += len(rows)
+    return rollups
+
+
+def _deleted_profile_ids():
+    """Profiles that still have facts but no longer exist."""
+    stmt = select(TenureFact.profile_id).distinct().where(
+        ~exists().where(Profile.id == TenureFact.profile_id))
+    return list(db.session.execute(stmt).scalars())
+
+
+def refresh_rollups(batch_size=DEFAULT_BATCH_SIZE, full=False, today=None):
+    """Refresh the rollups from changed profiles, or rebuild them, and return a report.
+
+    The whole refresh commits once, so readers never see facts and rollups
+    out of step.
+    """
+    started = time.monotonic()
+    if full:
+        db.session.execute(delete(TenureFact))
+    changed = changed_profile_ids(full=full, column='rollups_signature')
+    deleted = [] if full else _deleted_profile_ids()
+    profile_ids = sorted(set(changed) | set(deleted))
+    affected = _AffectedKeys()
+    fact_count = 0
+
+    for offset in range(0, len(profile_ids), batch_size):
+        batch = profile_ids[offset:offset + batch_size]
+        fact_count += _replace_facts(batch, affected, today=today)
+        signatures = {profile_id: changed[profile_id] for profile_id in batch if profile_id in changed}
+        if signatures:
+            save_signatures(signatures, column='rollups_signature')
+        db.session.flush()
+
+    aged = 0 if full else _age_open_facts(affected, today=today)
+    if full:
+        tenure_rollups = sum(_regroup_tenure(dimension) for dimension in DIMENSIONS)
+        transition_rollups = _regroup_transitions()
+    else:
+        tenure_rollups = sum(_regroup_tenure(dimension, keys)
+                             for dimension, keys in affected.tenure.items() if keys)
+        transition_rollups = _regroup_transitions(affected.transitions) if affected.transitions else 0
+    db.session.commit()
+
+    elapsed = time.monotonic() - started
+    logger.info(
+        f"Rollups: {'rebuilt' if full else 'refreshed'} from {len(profile_ids)} profiles "
+        f"({fact_count} jobs, {aged} open jobs aged), {tenure_rollups} tenure and {transition_rollups} transition "
+        f"rollups in {elapsed:.2f}s"
+    )
+    return {
+        'full': full,
+        'profiles': len(profile_ids),
+        'jobs': fact_count,
+        'aged_open_jobs': aged,
+        'tenure_rollups': tenure_rollups,
+        'transition_rollups': transition_rollups,
+        'elapsed_seconds': round(elapsed, 3)
+    }
+
+
+def tenure_rollup_to_dict(rollup):
+    histogram = rollup.get_histogram()
+    result = {
+        'dimension': rollup.dimension,
+        'key': rollup.dimension_key,
+        'label': rollup.label,
+        'job_count': rollup.job_count,
+        'mean_months': round(rollup.total_months / rollup.job_count, 1),
+        'min_months': rollup.min_months,
+        'max_months': rollup.max_months,
+        'histogram': [
+            {'min_months': low, 'job_count': count}
+            for low, count in zip(TENURE_BUCKETS, histogram)
+        ]
+    }
+    for q in PERCENTILES:
+        result[f'p{int(q * 100)}_months'] = approximate_percentile(
+            histogram, q, rollup.min_months, rollup.max_months)
+    return result
+
+
+def tenure_distribution(dimension, key=None, limit=100):
+    """Tenure rollups of a dimension, largest cohorts first.
+
+    ``key`` selects one cohort; company names are normalized first.
+    """
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"Unknown dimension '{dimension}'")
+    query = TenureRollup.query.filter(TenureRollup.dimension == dimension)
+    if key is not None:
+        if dimension == 'company':
+            key = normalize_company(key)
+        query = query.filter(TenureRollup.dimension_key == str(key))
+    rollups = query.order_by(TenureRollup.job_count.desc(), TenureRollup.dimension_key).limit(limit)
+    return [tenure_rollup_to_dict(rollup) for rollup in rollups]
+
+
+def company_transitions(from_company=None, to_company=None, limit=100):
+    """Company-to-company transition counts, most frequent first."""
+    query = CompanyTransitionRollup.query
+    if from_company:
+        query = query.filter(CompanyTransitionRollup.from_company_key == normalize_company(from_company))
+    if to_company:
+        query = query.filter(CompanyTransitionRollup.to_company_key == normalize_company(to_company))
+    rollups = query.order_by(CompanyTransitionRollup.transition_count.desc(),
+                             CompanyTransitionRollup.id).limit(limit)
+    return [
+        {
+            'from_company': rollup.from_company,
+            'to_company': rollup.to_company,
+            'transition_count': rollup.transition_count
+        }
+        for rollup in rollups
+    ]
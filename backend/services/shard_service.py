@@ -0,0 +1,437 @@
+"""Hash-sharded profile storage across several databases.
+
+Each profile, with its job history, education, tags and versions, lives on
+one shard chosen from its canonical ``linkedin_url`` by rendezvous hashing:
+every shard name is hashed together with the URL and the highest hash
+wins. Placement depends only on the URL and the shard names, so adding a
+shard moves only the profiles that now hash to it (about 1/n of them), and
+``rebalance`` finds and moves exactly those.
+
+Shards are configured as ``SHARD_DATABASE_URLS`` (``name=url,name=url``);
+without it the application database is the single ``default`` shard. Every
+shard carries the full schema and is migrated like a normal database
+(``DATABASE_URL=<shard url> python init_db.py``). Row ids are per shard, so
+profiles are identified across shards by ``linkedin_url``. Derived tables
+(skills, career events, rollups) are computed per shard by running the
+analysis commands against each shard database.
+
+Profile writes (fetched profiles, deletes, moves) go through the owning
+shard's session, which runs the same flush and commit hooks as
+``db.session``: role classification, profile documents and auditing.
+
+Listing, search and export query every shard in parallel with the same
+ordering and merge the sorted results, so they come back in one global
+order. String columns are ordered by code point (``COLLATE "C"`` on
+Postgres, SQLite's default), which is how Python compares them when
+merging. Unsharded, these reads follow the replica routing of
+``db.session`` and exports always read from the replica while it keeps up.
+"""
+import hashlib
+import heapq
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from flask import current_app
+from sqlalchemy import String, create_engine, delete, exists, or_, select
+from sqlalchemy.orm import Session, selectinload
+
+from extensions import db
+from models import Profile, JobHistory, ProfileDocument, RefreshIssue, TenureFact
+from services.audit_log import audit_log, enable_session_audit
+from services.profile_documents import enable_document_maintenance
+from services.replica_router import replica_router
+from services.role_classifier import enable_ingest_classification
+from services.version_archive import enable_deletion_tombstones, version_archive
+from utils.linkedin import canonicalize_linkedin_url
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARD = 'default'
+SHARD_ENGINES = 'shard_engines'
+
+# Children moved together with their profile
+CHILD_RELATIONSHIPS = ('jobs', 'education', 'tags', 'versions')
+
+# Watermarks reset on moved rows, since the derived rows they vouch for stay behind
+DERIVED_WATERMARKS = ('skills_extracted_at',)
+
+# Rows keyed by profile_id that no ORM relationship cascades to; on SQLite
+# the ON DELETE CASCADE of profile_documents is not enforced either
+DEPENDENT_MODELS = (ProfileDocument, TenureFact, RefreshIssue)
+
+SORT_COLUMNS = {
+    'name': Profile.name,
+    'linkedin_url': Profile.linkedin_url,
+    'created_at': Profile.created_at,
+    'updated_at': Profile.updated_at,
+}
+
+SUMMARY_COLUMNS = (Profile.id, Profile.name, Profile.linkedin_url, Profile.last_updated,
+                   Profile.engagement_score, Profile.created_at, Profile.updated_at)
+
+
+def shard_key(linkedin_url):
+    """Canonical URL used for placement; unparseable URLs are used as given."""
+    try:
+        return canonicalize_linkedin_url(linkedin_url)
+    except ValueError:
+        return (linkedin_url or '').strip()
+
+
+def _weight(shard, key):
+    digest = hashlib.blake2b(f"{shard}\0{key}".encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def shard_for(linkedin_url, shards):
+    """Name of the shard among ``shards`` that owns ``linkedin_url``."""
+    key = shard_key(linkedin_url)
+    return max(shards, key=lambda shard: _weight(shard, key))
+
+
+def _summary(row, shard):
+    return dict(row._mapping, shard=shard)
+
+
+def _collated(column, session):
+    """``column`` in code point order, so the database sorts strings like Python."""
+    if isinstance(column.type, String) and session.get_bind().dialect.name == 'postgresql':
+        return column.collate('C')
+    return column
+
+
+def _like_pattern(text):
+    """``%text%`` with LIKE wildcards in ``text`` matched literally (escape ``\\``)."""
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+def _sort_key(column, descending):
+    """Merge key matching ``ORDER BY column NULLS LAST, linkedin_url``."""
+    if descending:
+        return lambda item: (item[column] is not None, item[column], item['linkedin_url'])
+    return lambda item: (item[column] is None, item[column], item['linkedin_url'])
+
+
+def _ordered(stmt, column, descending, session):
+    sort = _collated(SORT_COLUMNS[column], session)
+    linkedin_url = _collated(Profile.linkedin_url, session)
+    if descending:
+        return stmt.order_by(sort.desc().nulls_last(), linkedin_url.desc())
+    return stmt.order_by(sort.asc().nulls_last(), linkedin_url.asc())
+
+
+def _profile_document(profile, shard):
+    """Export form of a profile and its children."""
+    return {
+        'shard': shard,
+        'name': profile.name,
+        'linkedin_url': profile.linkedin_url,
+        'last_updated': profile.last_updated.isoformat() if profile.last_updated else None,
+        'engagement_score': profile.engagement_score,
+        'jobs': [
+            {
+                'company_name': job.company_name,
+                'role': job.role,
+                'role_type': job.role_type,
+                'start_date': job.start_date.isoformat(),
+                'end_date': job.end_date.isoformat() if job.end_date else None,
+                'is_current': job.is_current,
+            }
+            for job in sorted(profile.jobs, key=lambda job: (job.start_date, job.id))
+        ],
+        'education': [
+            {
+                'institution': education.institution,
+                'degree': education.degree,
+                'field_of_study': education.field_of_study,
+            }
+            for education in sorted(profile.education, key=lambda education: education.id)
+        ],
+        'tags': sorted(tag.tag_name for tag in profile.tags),
+    }
+
+
+def _delete_profile(session, profile):
+    """Delete ``profile`` with its children and every row derived from it."""
+    for model in DEPENDENT_MODELS:
+        session.execute(delete(model).where(model.profile_id == profile.id))
+    session.delete(profile)
+
+
+def _copy_row(obj):
+    """Copy a mapped row's column values, without its primary and foreign keys."""
+    columns = {
+        attr.key: getattr(obj, attr.key)
+        for attr in obj.__mapper__.column_attrs
+        if attr.key not in ('id', 'profile_id')
+    }
+    for key in DERIVED_WATERMARKS:
+        if key in columns:
+            columns[key] = None
+    return type(obj)(**columns)
+
+
+class ShardSet:
+    """Profile placement, scatter-gather reads and rebalancing over the shards."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.max_workers = 8
+        self.classify_on_ingest = True
+        self.maintain_documents = True
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Create an engine per configured shard."""
+        self.app = app
+        self.max_workers = app.config.get('SHARD_MAX_WORKERS', self.max_workers)
+        self.classify_on_ingest = app.config.get('ROLE_TYPE_CLASSIFY_ON_INGEST', True)
+        self.maintain_documents = app.config.get('PROFILE_DOCUMENTS_MAINTAINED', True)
+        options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        app.extensions[SHARD_ENGINES] = {
+            name: create_engine(url, **options)
+            for name, url in (app.config.get('SHARD_DATABASE_URLS') or {}).items()
+        }
+        app.extensions['shard_set'] = self
+
+    @property
+    def sharded(self):
+        """Whether ``SHARD_DATABASE_URLS`` configures shards of their own."""
+        return bool(current_app.extensions.get(SHARD_ENGINES))
+
+    @property
+    def engines(self):
+        """``{shard name: engine}``; the application database when unsharded."""
+        return current_app.extensions.get(SHARD_ENGINES) or {DEFAULT_SHARD: db.engine}
+
+    @property
+    def read_engines(self):
+        """Like ``engines``, but unsharded reads go where ``db.session`` routes them."""
+        if self.sharded:
+            return self.engines
+        return {DEFAULT_SHARD: db.session.get_bind()}
+
+    def shard_for(self, linkedin_url):
+        return shard_for(linkedin_url, self.engines)
+
+    @contextmanager
+    def _session(self, engine, hooks=False):
+        session = Session(engine, expire_on_commit=False)
+        if hooks:
+            if self.classify_on_ingest:
+                enable_ingest_classification(session)
+            if self.maintain_documents:
+                enable_document_maintenance(session)
+            if audit_log.enabled:
+                enable_session_audit(session)
+            # The version archive belongs to the application database
+            if version_archive.directory and engine is db.engine:
+                enable_deletion_tombstones(session)
+        try:
+            yield session
+        finally:
+            session.close()
+
+    def session(self, shard, read_only=False):
+        """A session on one shard.
+
+        Writable sessions run the ``db.session`` ingest hooks; ``read_only``
+        sessions may read from the replica.
+        """
+        if read_only:
+            return self._session(self.read_engines[shard])
+        return self._session(self.engines[shard], hooks=True)
+
+    def profile_session(self, linkedin_url):
+        """A writable session on the shard owning ``linkedin_url``."""
+        return self.session(self.shard_for(linkedin_url))
+
+    # Writes and point reads
+
+    def add_profile(self, profile):
+        """Store a new profile and its children on its shard; return the shard name."""
+        shard = self.shard_for(profile.linkedin_url)
+        with self.session(shard) as session:
+            session.add(profile)
+            session.commit()
+        return shard
+
+    def get_profile(self, linkedin_url):
+        """Load a profile with its children from its shard, or None."""
+        with self.session(self.shard_for(linkedin_url), read_only=True) as session:
+            return session.execute(
+                select(Profile)
+                .where(Profile.linkedin_url == shard_key(linkedin_url))
+                .options(*(selectinload(getattr(Profile, name)) for name in CHILD_RELATIONSHIPS))
+            ).scalar_one_or_none()
+
+    def get_profile_document(self, linkedin_url):
+        """Export form of a profile, or None."""
+        profile = self.get_profile(linkedin_url)
+        return _profile_document(profile, self.shard_for(linkedin_url)) if profile else None
+
+    def delete_profile(self, linkedin_url):
+        """Delete a profile and everything derived from it; return whether it existed."""
+        with self.profile_session(linkedin_url) as session:
+            profile = session.execute(
+                select(Profile).where(Profile.linkedin_url == shard_key(linkedin_url))
+            ).scalar_one_or_none()
+            if profile is None:
+                return False
+            _delete_profile(session, profile)
+            session.commit()
+        return True
+
+    def existing_urls(self, urls):
+        """The subset of canonical ``urls`` that have a profile on their shard."""
+        by_shard = {}
+        for url in urls:
+            by_shard.setdefault(self.shard_for(url), []).append(url)
+        existing = set()
+        for shard, shard_urls in by_shard.items():
+            with self.session(shard, read_only=True) as session:
+                existing.update(session.execute(
+                    select(Profile.linkedin_url).where(Profile.linkedin_url.in_(shard_urls))).scalars())
+        return existing
+
+    # Scatter-gather
+
+    def scatter(self, query):
+        """Run ``query(session, shard)`` on every shard in parallel; return ``{shard: result}``."""
+        app = current_app._get_current_object()
+        # Resolved here: the worker threads get app contexts of their own
+        engines = self.read_engines
+
+        def run(shard):
+            with app.app_context(), self._session(engines[shard]) as session:
+                return query(session, shard)
+
+        shards = list(engines)
+        if len(shards) == 1:
+            return {shards[0]: run(shards[0])}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(shards))) as pool:
+            return dict(zip(shards, pool.map(run, shards)))
+
+    def _gather(self, stmt, sort, descending, limit, offset):
+        window = offset + limit
+
+        def query(session, shard):
+            rows = session.execute(_ordered(stmt, sort, descending, session).limit(window))
+            return [_summary(row, shard) for row in rows]
+
+        # Sorted again here with the same key, rather than trusting each
+        # database's order to be the one Python merges by
+        rows = [row for shard_rows in self.scatter(query).values() for row in shard_rows]
+        rows.sort(key=_sort_key(sort, descending), reverse=descending)
+        return rows[offset:window]
+
+    def list_profiles(self, sort='name', descending=False, limit=50, offset=0):
+        """A page of profile summaries in one global order across shards."""
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Unknown sort column '{sort}'")
+        return self._gather(select(*SUMMARY_COLUMNS), sort, descending, limit, offset)
+
+    def search_profiles(self, text, limit=50, offset=0):
+        """Profiles whose name or any company matches ``text``, ordered by name."""
+        pattern = _like_pattern(text)
+        stmt = select(*SUMMARY_COLUMNS).where(or_(
+            Profile.name.ilike(pattern, escape='\\'),
+            exists().where(JobHistory.profile_id == Profile.id,
+                           JobHistory.company_name.ilike(pattern, escape='\\'))
+        ))
+        return self._gather(stmt, 'name', False, limit, offset)
+
+    def _export_shard(self, shard, batch_size):
+        """Profile documents of one shard in ``linkedin_url`` order, a page at a time."""
+        after = None
+        while True:
+            with self.session(shard, read_only=True) as session:
+                linkedin_url = _collated(Profile.linkedin_url, session)
+                stmt = (
+                    select(Profile)
+                    .options(selectinload(Profile.jobs), selectinload(Profile.education),
+                             selectinload(Profile.tags))
+                    .order_by(linkedin_url)
+                    .limit(batch_size)
+                )
+                if after is not None:
+                    stmt = stmt.where(linkedin_url > after)
+                documents = [_profile_document(profile, shard)
+                             for profile in session.execute(stmt).scalars()]
+            if not documents:
+                return
+            yield from documents
+            after = documents[-1]['linkedin_url']
+
+    def export_profiles(self, batch_size=500):
+        """Stream every profile document across shards in ``linkedin_url`` order.
+
+        Unsharded, the export reads from the replica while it keeps up.
+        """
+        with replica_router.replica_reads():
+            streams = [self._export_shard(shard, batch_size) for shard in self.engines]
+            yield from heapq.merge(*streams, key=lambda document: document['linkedin_url'])
+
+    # Rebalancing
+
+    def _move(self, source, target, linkedin_url):
+        """Copy one profile and its children to ``target``, then delete it from ``source``.
+
+        The profile's derived rows are deleted from ``source`` too; run the
+        analysis commands on ``target`` to derive them there. Safe to
+        re-run: a profile already present on the target is only deleted
+        from the source.
+        """
+        with self.session(source) as src, self.session(target) as dst:
+            profile = src.execute(
+                select(Profile).where(Profile.linkedin_url == linkedin_url)
+                .options(*(selectinload(getattr(Profile, name)) for name in CHILD_RELATIONSHIPS))
+            ).scalar_one_or_none()
+            if profile is None:
+                return False
+            copied = dst.execute(
+                select(exists().where(Profile.linkedin_url == linkedin_url))).scalar()
+            if not copied:
+                clone = _copy_row(profile)
+                for name in CHILD_RELATIONSHIPS:
+                    setattr(clone, name, [_copy_row(child) for child in getattr(profile, name)])
+                dst.add(clone)
+                dst.commit()
+            _delete_profile(src, profile)
+            src.commit()
+            return True
+
+    def rebalance(self, batch_size=500, dry_run=False):
+        """Move every profile that is not on its owning shard; return a report."""
+        shards = list(self.engines)
+        report = {'scanned': 0, 'moved': 0, 'dry_run': dry_run,
+                  'moves': {source: {} for source in shards}}
+        for source in shards:
+            after = None
+            while True:
+                with self.session(source) as session:
+                    stmt = select(Profile.linkedin_url).order_by(Profile.linkedin_url).limit(batch_size)
+                    if after is not None:
+                        stmt = stmt.where(Profile.linkedin_url > after)
+                    urls = list(session.execute(stmt).scalars())
+                if not urls:
+                    break
+                after = urls[-1]
+                report['scanned'] += len(urls)
+                for url in urls:
+                    target = shard_for(url, shards)
+                    if target == source:
+                        continue
+                    if dry_run or self._move(source, target, url):
+                        moves = report['moves'][source]
+                        moves[target] = moves.get(target, 0) + 1
+                        report['moved'] += 1
+        logger.info(f"Shard rebalance: {report['moved']} of {report['scanned']} profiles "
+                    f"{'would move' if dry_run else 'moved'}")
+        return report
+
+
+# Global instance registered by the application factory
+shard_set = ShardSet()
@@ -0,0 +1,277 @@
+"""Skill extraction from job descriptions.
+
+The skill dictionary (canonical name -> aliases) is compiled into a single
+trie-shaped regular expression, so each description is scanned once by the
+C regex engine no matter how many skills the dictionary holds. Descriptions
+are processed in batches across a process pool and only job rows whose
+``updated_at`` moved since the last run are reprocessed.
+"""
+import logging
+import os
+import re
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import delete, insert, or_, select, update
+
+from extensions import db
+from models import JobHistory, ProfileSkill, Skill
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+# Seed dictionary: canonical skill name -> alternative spellings
+DEFAULT_SKILLS = {
+    'Python': ['python3'],
+    'Java': [],
+    'JavaScript': ['js', 'ecmascript'],
+    'TypeScript': [],
+    'C++': ['cpp'],
+    'C#': ['csharp', 'c sharp'],
+    'Golang': [],
+    'Rust': [],
+    'Ruby': [],
+    'PHP': [],
+    'Scala': [],
+    'Kotlin': [],
+    'SQL': [],
+    'PostgreSQL': ['postgres'],
+    'MySQL': [],
+    'MongoDB': ['mongo'],
+    'Redis': [],
+    'Elasticsearch': ['elastic search'],
+    'Kafka': ['apache kafka'],
+    'Spark': ['apache spark', 'pyspark'],
+    'Hadoop': [],
+    'Airflow': ['apache airflow'],
+    'dbt': [],
+    'Snowflake': [],
+    'Tableau': [],
+    'Power BI': ['powerbi'],
+    'Microsoft Excel': ['ms excel'],
+    'React': ['react.js', 'reactjs'],
+    'Angular': ['angularjs'],
+    'Vue': ['vue.js', 'vuejs'],
+    'Node.js': ['nodejs'],
+    'Django': [],
+    'Flask': [],
+    'Spring Boot': ['spring framework'],
+    '.NET': ['dotnet', 'asp.net'],
+    'GraphQL': [],
+    'REST APIs': ['rest api', 'restful'],
+    'AWS': ['amazon web services'],
+    'Azure': ['microsoft azure'],
+    'GCP': ['google cloud', 'google cloud platform'],
+    'Docker': [],
+    'Kubernetes': ['k8s'],
+    'Terraform': [],
+    'Linux': [],
+    'Git': [],
+    'CI/CD': ['continuous integration'],
+    'Machine Learning': ['ml'],
+    'Deep Learning': [],
+    'NLP': ['natural language processing'],
+    'Computer Vision': [],
+    'TensorFlow': [],
+    'PyTorch': [],
+    'scikit-learn': ['sklearn'],
+    'Pandas': [],
+    'NumPy': [],
+    'Data Analysis': ['data analytics'],
+    'Statistics': [],
+    'Agile': [],
+    'Scrum': [],
+    'Product Management': [],
+    'Project Management': [],
+    'Leadership': ['people management'],
+    'Figma': [],
+    'Salesforce': [],
+    'SEO': [],
+}
+
+# A match may not touch these characters, so "c" does not match inside "c++"
+# and "java" does not match inside "javascript"
+_BOUNDARY_BEFORE = r'(?<![\w.+#])'
+_BOUNDARY_AFTER = r'(?![\w+#]|\.\w)'
+
+
+def _trie_pattern(terms):
+    """Build a regex for ``terms`` whose shape is the terms' prefix trie."""
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        terminal = '' in node
+        branches = [(r'\s+' if char == ' ' else re.escape(char)) + build(child)
+                    for char, child in sorted(node.items()) if char != '']
+        if not branches:
+            return ''
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        pattern = '(?:' + '|'.join(branches) + ')'
+        # Greedy optional: try the longer term first, fall back to the prefix
+        return pattern + '?' if terminal else pattern
+
+    return build(trie)
+
+
+class SkillMatcher:
+    """Match every skill in a dictionary with one compiled pattern."""
+
+    def __init__(self, dictionary):
+        self.lookup = {}
+        for name, aliases in dictionary.items():
+            for term in [name] + list(aliases):
+                term = ' '.join(term.lower().split())
+                if term:
+                    self.lookup.setdefault(term, name)
+        self.pattern = re.compile(
+            _BOUNDARY_BEFORE + '(' + _trie_pattern(self.lookup) + ')' + _BOUNDARY_AFTER,
+            re.IGNORECASE
+        )
+
+    def extract(self, text):
+        """Return a ``Counter`` of canonical skill names mentioned in ``text``."""
+        counts = Counter()
+        if not text:
+            return counts
+        for match in self.pattern.finditer(text):
+            counts[self.lookup[' '.join(match.group(1).lower().split())]] += 1
+        return counts
+
+
+# Per-process matcher used by pool workers
+_worker_matcher = None
+
+
+def _init_worker(dictionary):
+    global _worker_matcher
+    _worker_matcher = SkillMatcher(dictionary)
+
+
+def _extract_batch(rows):
+    """Extract skills for ``[(job_id, description), ...]`` in a pool worker."""
+    return [(job_id, dict(_worker_matcher.extract(description))) for job_id, description in rows]
+
+
+def load_dictionary():
+    """Return the skill dictionary, seeding missing default skills into the table."""
+    existing = {skill.name: skill for skill in Skill.query.all()}
+    for name, aliases in DEFAULT_SKILLS.items():
+        if name not in existing:
+            skill = Skill(name=name)
+            skill.set_aliases(aliases)
+            db.session.add(skill)
+            existing[name] = skill
+    db.session.commit()
+    return {name: skill.get_aliases() for name, skill in existing.items()}
+
+
+def _pending_jobs(after_id, limit, full):
+    stmt = (
+        select(JobHistory.id, JobHistory.profile_id, JobHistory.description, JobHistory.updated_at)
+        .where(JobHistory.id > after_id)
+        .order_by(JobHistory.id)
+        .limit(limit)
+    )
+    if not full:
+        stmt = stmt.where(or_(
+            JobHistory.skills_extracted_at.is_(None),
+            JobHistory.skills_extracted_at != JobHistory.updated_at
+        ))
+    return db.session.execute(stmt).all()
+
+
+def _store_results(rows, results, skill_ids):
+    """Replace the skills of a batch of jobs and stamp them as extracted."""
+    profile_ids = {row.id: row.profile_id for row in rows}
+    job_ids = list(profile_ids)
+
+    db.session.execute(delete(ProfileSkill).where(ProfileSkill.job_history_id.in_(job_ids)))
+    links = [
+        {
+            'profile_id': profile_ids[job_id],
+            'job_history_id': job_id,
+            'skill_id': skill_ids[name],
+            'mention_count': count
+        }
+        for job_id, counts in results
+        for name, count in counts.items()
+    ]
+    if links:
+        db.session.execute(insert(ProfileSkill), links)
+
+    # Stamp the updated_at we read, and keep updated_at itself unchanged
+    db.session.execute(update(JobHistory), [
+        {'id': row.id, 'skills_extracted_at': row.updated_at, 'updated_at': row.updated_at}
+        for row in rows
+    ])
+    db.session.commit()
+    return len(links)
+
+
+def extract_skills(batch_size=DEFAULT_BATCH_SIZE, workers=None, full=False):
+    """Extract skills for changed job descriptions and return a run report.
+
+    ``workers`` defaults to the CPU count; ``workers=0`` extracts in the
+    calling process. ``full`` reprocesses every job, e.g. after the skill
+    dictionary changed.
+    """
+    started = time.monotonic()
+    dictionary = load_dictionary()
+    skill_ids = dict(db.session.execute(select(Skill.name, Skill.id)).all())
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    processed = links = 0
+    after_id = 0
+
+    def batches():
+        nonlocal after_id
+        while True:
+            rows = _pending_jobs(after_id, batch_size, full)
+            if not rows:
+                return
+            after_id = rows[-1].id
+            yield rows
+
+    if workers <= 0:
+        matcher = SkillMatcher(dictionary)
+        for rows in batches():
+            results = [(row.id, matcher.extract(row.description)) for row in rows]
+            links += _store_results(rows, results, skill_ids)
+            processed += len(rows)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(dictionary,)) as pool:
+            # Keep a bounded window of batches in flight and store in order
+            in_flight = deque()
+            for rows in batches():
+                in_flight.append((rows, pool.submit(
+                    _extract_batch, [(row.id, row.description) for row in rows])))
+                if len(in_flight) >= workers * 2:
+                    done_rows, future = in_flight.popleft()
+                    links += _store_results(done_rows, future.result(), skill_ids)
+                    processed += len(done_rows)
+            while in_flight:
+                done_rows, future = in_flight.popleft()
+                links += _store_results(done_rows, future.result(), skill_ids)
+                processed += len(done_rows)
+
+    elapsed = time.monotonic() - started
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    logger.info(
+        f"Skill extraction: {processed} descriptions, {links} skill links "
+        f"in {elapsed:.2f}s ({rate:.0f} descriptions/s)"
+    )
+    return {
+        'processed': processed,
+        'skill_links': links,
+        'elapsed_seconds': round(elapsed, 3),
+        'descriptions_per_second': round(rate, 1)
+    }
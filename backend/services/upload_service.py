@@ -0,0 +1,217 @@
+"""Streaming ingestion of uploaded name and LinkedIn URL lists.
+
+Uploads are parsed line by line, deduplicated within the file and checked
+against ``profiles.linkedin_url`` one chunk at a time, so memory use is
+bounded by the chunk size plus an 8-byte digest per unique entry, however
+large the upload is. The endpoint spools the upload to a temporary file and
+ingests it on a background thread, so the request never waits on the queue.
+"""
+import codecs
+import csv
+import hashlib
+import itertools
+import logging
+import shutil
+import tempfile
+import threading
+from services.shard_service import shard_set
+from utils.linkedin import canonicalize_linkedin_url
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Uploads larger than this are spooled to disk instead of memory
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+# Number of invalid entries echoed back in the upload report
+MAX_REPORTED_INVALID = 20
+
+URL_HEADERS = {'url', 'linkedin_url', 'linkedin', 'profile_url'}
+NAME_HEADERS = {'name', 'full_name'}
+
+
+def _decoded_lines(stream):
+    """Iterate the lines of a binary or text stream as text."""
+    iterator = iter(stream)
+    first = next(iterator, None)
+    if first is None:
+        return
+    lines = itertools.chain([first], iterator)
+    if isinstance(first, bytes):
+        lines = codecs.iterdecode(lines, 'utf-8-sig', errors='replace')
+    yield from lines
+
+
+def _looks_like_url(value):
+    lowered = value.lower()
+    return lowered.startswith(('http://', 'https://', 'www.')) or 'linkedin.com/' in lowered
+
+
+def iter_upload_values(stream, fmt='text'):
+    """Yield ``(line_number, value)`` pairs from an uploaded file.
+
+    ``fmt`` is ``'text'`` (one URL or name per line) or ``'csv'``. A CSV
+    header row naming a url/name column is honoured; without one, the first
+    URL-looking cell of each row is used, falling back to the first cell.
+    """
+    lines = _decoded_lines(stream)
+
+    if fmt != 'csv':
+        for line_number, line in enumerate(lines, start=1):
+            value = line.strip()
+            if value:
+                yield line_number, value
+        return
+
+    url_col = name_col = None
+    for line_number, row in enumerate(csv.reader(lines), start=1):
+        cells = [cell.strip() for cell in row]
+        if line_number == 1:
+            headers = [cell.lower() for cell in cells]
+            url_col = next((i for i, h in enumerate(headers) if h in URL_HEADERS), None)
+            name_col = next((i for i, h in enumerate(headers) if h in NAME_HEADERS), None)
+            if url_col is not None or name_col is not None:
+                continue
+
+        if url_col is not None or name_col is not None:
+            value = ''
+            if url_col is not None and url_col < len(cells):
+                value = cells[url_col]
+            if not value and name_col is not None and name_col < len(cells):
+                value = cells[name_col]
+        else:
+            non_empty = [cell for cell in cells if cell]
+            value = next((cell for cell in non_empty if _looks_like_url(cell)),
+                         non_empty[0] if non_empty else '')
+
+        if value:
+            yield line_number, value
+
+
+def classify_value(value):
+    """Turn a raw upload value into a queue item.
+
+    URLs are canonicalized with ``canonicalize_linkedin_url`` (raising
+    ``ValueError`` when invalid); anything else is treated as a name.
+    """
+    if _looks_like_url(value):
+        return {'type': 'url', 'value': canonicalize_linkedin_url(value)}
+    return {'type': 'name', 'value': ' '.join(value.split())}
+
+
+def _dedup_key(item):
+    key = item['value'] if item['type'] == 'url' else item['value'].casefold()
+    return hashlib.blake2b(f"{item['type']}\0{key}".encode('utf-8'), digest_size=8).digest()
+
+
+def existing_linkedin_urls(urls):
+    """Return the subset of canonical ``urls`` that already have a profile.
+
+    ``Profile`` stores URLs in canonical form, so this is an exact match on
+    the unique index of each URL's shard.
+    """
+    if not urls:
+        return set()
+    return shard_set.existing_urls(urls)
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def ingest_upload(stream, job, service, fmt='text', chunk_size=DEFAULT_CHUNK_SIZE,
+                  skip_existing=True):
+    """Stream an upload into ``job`` on ``service`` and return a report.
+
+    Each chunk of unique items is checked against the profiles table in a
+    single ``IN`` query and the new items are queued before the next chunk
+    is read.
+    """
+    report = {
+        'rows': 0,
+        'urls': 0,
+        'names': 0,
+        'invalid': 0,
+        'duplicates': 0,
+        'existing': 0,
+        'queued': 0,
+        'invalid_samples': []
+    }
+    seen = set()
+
+    def unique_items():
+        for line_number, value in iter_upload_values(stream, fmt):
+            report['rows'] += 1
+            try:
+                item = classify_value(value)
+            except ValueError as e:
+                report['invalid'] += 1
+                if len(report['invalid_samples']) < MAX_REPORTED_INVALID:
+                    report['invalid_samples'].append(
+                        {'line': line_number, 'value': value, 'error': str(e)})
+                continue
+
+            key = _dedup_key(item)
+            if key in seen:
+                report['duplicates'] += 1
+                continue
+            seen.add(key)
+            report['urls' if item['type'] == 'url' else 'names'] += 1
+            yield item
+
+    try:
+        for chunk in _chunked(unique_items(), chunk_size):
+            if skip_existing:
+                existing = existing_linkedin_urls(
+                    [item['value'] for item in chunk if item['type'] == 'url'])
+                if existing:
+                    report['existing'] += len(existing)
+                    chunk = [item for item in chunk
+                             if not (item['type'] == 'url' and item['value'] in existing)]
+            report['queued'] += service.enqueue(job, chunk)
+    finally:
+        job.upload_report = report
+        service.finish_submission(job)
+
+    logger.info(
+        f"Upload for batch job {job.id}: {report['rows']} rows, {report['queued']} queued, "
+        f"{report['duplicates']} duplicates, {report['existing']} existing, "
+        f"{report['invalid']} invalid"
+    )
+    return report
+
+
+def spool_upload(stream):
+    """Copy an upload into a rewound temporary file that outlives the request."""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    shutil.copyfileobj(stream, spool)
+    spool.seek(0)
+    return spool
+
+
+def ingest_in_background(app, spool, job, service, **kwargs):
+    """Ingest a spooled upload into ``job`` on a daemon thread.
+
+    The thread runs ``ingest_upload`` in an application context and closes
+    the spool when it is done. Ingestion that fails part way still finishes
+    the submission, and the error is added to the job's upload report.
+    """
+    def run():
+        try:
+            with app.app_context():
+                ingest_upload(spool, job, service, **kwargs)
+        except Exception as e:
+            logger.exception(f"Upload ingestion failed for batch job {job.id}")
+            job.upload_report = dict(job.upload_report or {}, error=str(e))
+        finally:
+            spool.close()
+
+    thread = threading.Thread(target=run, name=f"batch-upload-{job.id[:8]}", daemon=True)
+    thread.start()
+    return thread
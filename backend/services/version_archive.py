@@ -0,0 +1,488 @@
+"""Archive of closed profile versions in compressed segment files.
+
+``profile_versions`` only grows. Closed versions (``valid_to`` set) that
+closed before a cutoff are moved out of the database into append-only
+segments on local disk, so the hot table holds recent history only. The
+latest version of a profile always stays in the database.
+
+A segment is a pair of immutable files written once per archive batch:
+
+* ``versions-NNNNNNNN.seg`` holds the versions, each compressed on its own
+  with zlib so it can be read without touching its neighbours.
+* ``versions-NNNNNNNN.idx`` holds one fixed-width entry per version
+  (profile id, version number, valid_from, valid_to, offset, length), sorted
+  by profile id and version number.
+
+Both are read through ``mmap``: lookups binary-search the index and
+decompress only the matching versions. A segment counts once its index
+exists; the index is renamed into place after the data file and before the
+rows are deleted, and versions already in the archive are not written
+again, so an interrupted run is safe to repeat.
+
+Segments are never rewritten, so deleting a profile leaves its archived
+versions in place. Deletions committed through a watched session append a
+tombstone (profile id, deletion time) to ``tombstones.bin``; archived
+versions that started before their profile's latest tombstone belong to a
+deleted profile and are never read back, even when the database later
+reuses the id for a new profile. Writers (``archive``, ``write_segment``
+and tombstones) hold an exclusive ``flock`` on the directory's lock file,
+so concurrent runs cannot pick the same segment name.
+
+``profile_history`` and ``version_as_of`` read across the hot table and
+the archive.
+"""
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, event, exists, select
+from sqlalchemy.orm import aliased
+
+from extensions import db
+from models import Profile, ProfileVersion
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows; writers are then only serialized in-process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 10000
+
+DATA_MAGIC = b'PVASEG01'
+INDEX_MAGIC = b'PVAIDX01'
+
+# profile_id, version_number, valid_from, valid_to (microseconds since the epoch), offset, length
+INDEX_ENTRY = struct.Struct('<qiqqQI')
+
+# profile_id, deleted at (microseconds since the epoch)
+TOMBSTONE = struct.Struct('<qq')
+TOMBSTONE_FILE = 'tombstones.bin'
+LOCK_FILE = '.lock'
+
+_SEGMENT_NAME = re.compile(r'^versions-(\d{8})\.idx$')
+_EPOCH = datetime(1970, 1, 1)
+_NO_END = 2 ** 63 - 1
+
+
+def naive_utc(value):
+    """``value`` as a naive UTC datetime, the form stored in the database."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _to_micros(value):
+    return (naive_utc(value) - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value):
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def _parse(value):
+    return datetime.fromisoformat(value) if value is not None else None
+
+
+def _to_version(record):
+    """A transient ``ProfileVersion`` for an archived record."""
+    return ProfileVersion(
+        id=record['id'],
+        profile_id=record['profile_id'],
+        version_number=record['version_number'],
+        data_snapshot=record['data_snapshot'],
+        valid_from=_parse(record['valid_from']),
+        valid_to=_parse(record['valid_to']),
+        created_at=_parse(record['created_at'])
+    )
+
+
+def _write_file(path, data):
+    directory = os.path.dirname(path)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class Segment:
+    """One memory-mapped, read-only segment."""
+
+    def __init__(self, index_path, data_path):
+        self.name = os.path.basename(index_path)[:-len('.idx')]
+        with open(index_path, 'rb') as f:
+            self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(data_path, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._index[:len(INDEX_MAGIC)] != INDEX_MAGIC or self._data[:len(DATA_MAGIC)] != DATA_MAGIC:
+            self.close()
+            raise ValueError(f"{self.name} is not a version archive segment")
+        self.count = (len(self._index) - len(INDEX_MAGIC)) // INDEX_ENTRY.size
+        self._stats = None
+
+    def entry(self, position):
+        return INDEX_ENTRY.unpack_from(self._index, len(INDEX_MAGIC) + position * INDEX_ENTRY.size)
+
+    def entries(self, profile_id):
+        """Index entries of one profile, in version order."""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.entry(middle)[0] < profile_id:
+                low = middle + 1
+            else:
+                high = middle
+        while low < self.count:
+            entry = self.entry(low)
+            if entry[0] != profile_id:
+                return
+            yield entry
+            low += 1
+
+    def read(self, entry):
+        """Decompress the record an index entry points at."""
+        offset, length = entry[4], entry[5]
+        return json.loads(zlib.decompress(self._data[offset:offset + length]))
+
+    def stats(self):
+        """``{profile_id: (version count, earliest valid_from)}``, computed once."""
+        if self._stats is None:
+            stats = {}
+            for position in range(self.count):
+                profile_id, _, valid_from = self.entry(position)[:3]
+                count, first_seen = stats.get(profile_id, (0, valid_from))
+                stats[profile_id] = (count + 1, min(first_seen, valid_from))
+            self._stats = stats
+        return self._stats
+
+    def close(self):
+        self._index.close()
+        self._data.close()
+
+
+class VersionArchive:
+    """Writes closed versions to segments and reads them back."""
+
+    def __init__(self, app=None):
+        self.directory = None
+        self.after_days = 365
+        self._segments = {}
+        self._tombstones = {}
+        self._tombstones_size = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._lock_file = None
+        self._lock_depth = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read the archive directory and cutoff from config."""
+        directory = app.config.get('VERSION_ARCHIVE_DIR')
+        if directory != self.directory:
+            self.close()
+        self.directory = directory
+        self.after_days = app.config.get('VERSION_ARCHIVE_AFTER_DAYS', self.after_days)
+        app.extensions['version_archive'] = self
+        if self.directory:
+            enable_deletion_tombstones()
+        else:
+            disable_deletion_tombstones()
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the directory's writer lock; re-entrant within a process."""
+        with self._write_lock:
+            if self._lock_depth == 0:
+                os.makedirs(self.directory, exist_ok=True)
+                self._lock_file = open(os.path.join(self.directory, LOCK_FILE), 'a')
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    lock_file, self._lock_file = self._lock_file, None
+                    if fcntl is not None:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                    lock_file.close()
+
+    # Tombstones
+
+    def tombstones(self):
+        """``{profile_id: latest deletion (microseconds)}``, re-read when the file grows."""
+        path = os.path.join(self.directory or '', TOMBSTONE_FILE)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return {}
+        with self._lock:
+            if size != self._tombstones_size:
+                with open(path, 'rb') as f:
+                    data = f.read(size - size % TOMBSTONE.size)
+                tombstones = {}
+                for profile_id, deleted_at in TOMBSTONE.iter_unpack(data):
+                    tombstones[profile_id] = max(deleted_at, tombstones.get(profile_id, deleted_at))
+                self._tombstones, self._tombstones_size = tombstones, size
+            return self._tombstones
+
+    def record_deletions(self, profile_ids, deleted_at=None):
+        """Tombstone the archived versions of deleted ``profile_ids``; returns how many were recorded."""
+        if not self.directory:
+            return 0
+        archived = [profile_id for profile_id in sorted(set(profile_ids))
+                    if any(next(segment.entries(profile_id), None) for segment in self.segments())]
+        if not archived:
+            return 0
+        micros = _to_micros(deleted_at or datetime.utcnow())
+        with self._exclusive(), open(os.path.join(self.directory, TOMBSTONE_FILE), 'ab') as f:
+            f.write(b''.join(TOMBSTONE.pack(profile_id, micros) for profile_id in archived))
+            f.flush()
+            os.fsync(f.fileno())
+        return len(archived)
+
+    def _live_entries(self, segment, profile_id, tombstones):
+        """Index entries of ``profile_id`` that do not belong to a deleted profile."""
+        deleted_at = tombstones.get(profile_id)
+        for entry in segment.entries(profile_id):
+            if deleted_at is None or entry[2] >= deleted_at:
+                yield entry
+
+    # Reading
+
+    def segments(self):
+        """Open segments, oldest first, picking up segments written since the last call."""
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        names = sorted(name for name in os.listdir(self.directory) if _SEGMENT_NAME.match(name))
+        with self._lock:
+            for name in names:
+                base = name[:-len('.idx')]
+                if base not in self._segments:
+                    self._segments[base] = Segment(os.path.join(self.directory, name),
+                                                   os.path.join(self.directory, base + '.seg'))
+            return [self._segments[name] for name in sorted(self._segments)]
+
+    def history(self, profile_id):
+        """Archived versions of a profile as transient ``ProfileVersion`` objects, in version order."""
+        tombstones = self.tombstones()
+        found = [(entry[1], segment, entry) for segment in self.segments()
+                 for entry in self._live_entries(segment, profile_id, tombstones)]
+        return [_to_version(segment.read(entry)) for _, segment, entry in sorted(found, key=lambda f: f[0])]
+
+    def as_of(self, profile_id, at):
+        """The archived version of a profile valid at ``at``, or None."""
+        micros = _to_micros(at)
+        tombstones = self.tombstones()
+        for segment in self.segments():
+            for entry in self._live_entries(segment, profile_id, tombstones):
+                if entry[2] <= micros < entry[3]:
+                    return _to_version(segment.read(entry))
+        return None
+
+    def archived_keys(self, profile_ids):
+        """``(profile_id, version_number)`` of every live archived version of ``profile_ids``."""
+        tombstones = self.tombstones()
+        return {(entry[0], entry[1]) for segment in self.segments()
+                for profile_id in set(profile_ids)
+                for entry in self._live_entries(segment, profile_id, tombstones)}
+
+    def version_stats(self):
+        """``{profile_id: (archived version count, earliest valid_from)}`` across segments."""
+        stats = {}
+        tombstones = self.tombstones()
+        for segment in self.segments():
+            for profile_id, (count, first_seen) in segment.stats().items():
+                if profile_id in tombstones:
+                    valid_from = [entry[2] for entry in self._live_entries(segment, profile_id, tombstones)]
+                    if not valid_from:
+                        continue
+                    count, first_seen = len(valid_from), min(valid_from)
+                if profile_id in stats:
+                    total, earliest = stats[profile_id]
+                    stats[profile_id] = (total + count, min(earliest, first_seen))
+                else:
+                    stats[profile_id] = (count, first_seen)
+        return {profile_id: (count, _from_micros(first_seen))
+                for profile_id, (count, first_seen) in stats.items()}
+
+    # Writing
+
+    def _next_name(self):
+        numbers = [int(match.group(1)) for match in map(_SEGMENT_NAME.match, os.listdir(self.directory))
+                   if match]
+        return f"versions-{max(numbers, default=0) + 1:08d}"
+
+    def write_segment(self, rows):
+        """Write ``rows`` (version rows sorted by profile id and version number) as a new segment."""
+        os.makedirs(self.directory, exist_ok=True)
+        data = bytearray(DATA_MAGIC)
+        index = bytearray(INDEX_MAGIC)
+        for row in rows:
+            record = json.dumps({
+                'id': row.id,
+                'profile_id': row.profile_id,
+                'version_number': row.version_number,
+                'data_snapshot': row.data_snapshot,
+                'valid_from': _iso(row.valid_from),
+                'valid_to': _iso(row.valid_to),
+                'created_at': _iso(row.created_at)
+            }, separators=(',', ':')).encode('utf-8')
+            compressed = zlib.compress(record)
+            index += INDEX_ENTRY.pack(
+                row.profile_id, row.version_number, _to_micros(row.valid_from),
+                _to_micros(row.valid_to) if row.valid_to is not None else _NO_END,
+                len(data), len(compressed))
+            data += compressed
+
+        with self._exclusive():
+            name = self._next_name()
+            # The index goes last: a segment without one is ignored and overwritten
+            _write_file(os.path.join(self.directory, name + '.seg'), bytes(data))
+            _write_file(os.path.join(self.directory, name + '.idx'), bytes(index))
+        return name
+
+    def archive(self, cutoff=None, batch_size=DEFAULT_BATCH_SIZE, now=None):
+        """Move versions closed before ``cutoff`` into new segments; return a report.
+
+        ``cutoff`` defaults to ``VERSION_ARCHIVE_AFTER_DAYS`` before now.
+        """
+        if not self.directory:
+            raise RuntimeError("VERSION_ARCHIVE_DIR is not configured")
+        started = time.monotonic()
+        cutoff = cutoff or (now or datetime.utcnow()) - timedelta(days=self.after_days)
+        newer = aliased(ProfileVersion)
+        stmt = (
+            select(*ProfileVersion.__table__.columns)
+            .where(ProfileVersion.valid_to.isnot(None), ProfileVersion.valid_to < cutoff)
+            # The latest version of a profile stays hot
+            .where(exists().where(newer.profile_id == ProfileVersion.profile_id,
+                                  newer.version_number > ProfileVersion.version_number))
+            .order_by(ProfileVersion.profile_id, ProfileVersion.version_number)
+            .limit(batch_size)
+        )
+        archived = 0
+        segments = []
+        # One run at a time, so a concurrent run cannot re-archive these rows
+        with self._exclusive():
+            while True:
+                rows = db.session.execute(stmt).all()
+                if not rows:
+                    break
+                done = self.archived_keys(row.profile_id for row in rows)
+                pending = [row for row in rows if (row.profile_id, row.version_number) not in done]
+                if pending:
+                    segments.append(self.write_segment(pending))
+                db.session.execute(
+                    delete(ProfileVersion).where(ProfileVersion.id.in_([row.id for row in rows])))
+                db.session.commit()
+                archived += len(pending)
+
+        elapsed = time.monotonic() - started
+        logger.info(f"Version archive: {archived} versions closed before {cutoff:%Y-%m-%d} "
+                    f"moved to {len(segments)} segments in {elapsed:.2f}s")
+        return {
+            'archived': archived,
+            'segments': segments,
+            'cutoff': cutoff.isoformat(),
+            'elapsed_seconds': round(elapsed, 3)
+        }
+
+    def close(self):
+        with self._lock:
+            segments, self._segments = self._segments, {}
+            self._tombstones, self._tombstones_size = {}, 0
+        for segment in segments.values():
+            segment.close()
+
+
+# Global instance registered by the application factory
+version_archive = VersionArchive()
+
+
+# Reads across the hot table and the archive
+
+def profile_history(profile_id, session=None, archived=True):
+    """Every version of a profile, hot and archived, in version order.
+
+    ``archived=False`` leaves out the archive, which only holds versions of
+    the application database.
+    """
+    session = session or db.session
+    hot = session.query(ProfileVersion).filter_by(profile_id=profile_id).all()
+    versions = {}
+    if archived:
+        versions.update((version.version_number, version) for version in version_archive.history(profile_id))
+    versions.update((version.version_number, version) for version in hot)
+    return [versions[number] for number in sorted(versions)]
+
+
+def version_as_of(profile_id, at, session=None, archived=True):
+    """The version of a profile valid at ``at`` (aware datetimes are converted to UTC), or None."""
+    session = session or db.session
+    at = naive_utc(at)
+    hot = session.query(ProfileVersion).filter(
+        ProfileVersion.profile_id == profile_id,
+        ProfileVersion.valid_from <= at,
+        (ProfileVersion.valid_to.is_(None)) | (ProfileVersion.valid_to > at)
+    ).order_by(ProfileVersion.version_number.desc()).first()
+    if hot is not None or not archived:
+        return hot
+    return version_archive.as_of(profile_id, at)
+
+
+# Deleted profiles, captured at flush and tombstoned on commit
+
+def _collect_deleted(session, flush_context):
+    deleted = {obj.id for obj in session.deleted if isinstance(obj, Profile)}
+    if deleted:
+        session.info.setdefault('archive_deleted', set()).update(deleted)
+
+
+def _tombstone_on_commit(session):
+    deleted = session.info.pop('archive_deleted', None)
+    if deleted:
+        version_archive.record_deletions(deleted)
+
+
+def _discard_on_rollback(session, previous_transaction):
+    session.info.pop('archive_deleted', None)
+
+
+_SESSION_HOOKS = (
+    ('after_flush', _collect_deleted),
+    ('after_commit', _tombstone_on_commit),
+    ('after_soft_rollback', _discard_on_rollback),
+)
+
+
+def enable_deletion_tombstones(session=None):
+    """Tombstone the archived versions of profiles deleted through ``session``."""
+    session = session or db.session
+    for name, hook in _SESSION_HOOKS:
+        if not event.contains(session, name, hook):
+            event.listen(session, name, hook)
+
+
+def disable_deletion_tombstones(session=None):
+    session = session or db.session
+    for name, hook in _SESSION_HOOKS:
+        if event.contains(session, name, hook):
+            event.remove(session, name, hook)
@@ -0,0 +1,124 @@
+import json
+import pytest
+from app import create_app
+from config import TestingConfig
+from extensions import db
+from models import AuditRecord, Profile, ProfileTag
+from services.audit_log import AuditLog, audit_log
+from services.batch_service import BatchService
+from services.shard_service import shard_set
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Create an app auditing to the database and JSONL segments."""
+    monkeypatch.setattr(TestingConfig, 'AUDIT_SINKS', ['db', 'jsonl'])
+    monkeypatch.setattr(TestingConfig, 'AUDIT_LOG_DIR', str(tmp_path / 'audit'))
+    monkeypatch.setattr(TestingConfig, 'AUDIT_FLUSH_INTERVAL_SECONDS', 0.05)
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        audit_log.stop()
+        db.session.remove()
+        db.drop_all()
+
+def actions():
+    return [(record.action, record.get_details()) for record in AuditRecord.query.order_by(AuditRecord.id)]
+
+def test_tags_and_deletions_are_audited_on_commit(app, tmp_path):
+    """Test that committed tag assignments and deletions are written to both sinks."""
+    profile = Profile(name="Jane", linkedin_url="https://www.linkedin.com/in/jane")
+    profile.tags = [ProfileTag(tag_name="vip")]
+    db.session.add(profile)
+    db.session.commit()
+
+    db.session.add(ProfileTag(profile_id=profile.id, tag_name="watchlist"))
+    db.session.flush()
+    db.session.rollback()
+
+    db.session.delete(profile)
+    db.session.commit()
+    audit_log.flush()
+
+    assert actions() == [
+        ('tag.assign', {'tag': 'vip'}),
+        ('profile.delete', {'linkedin_url': "https://www.linkedin.com/in/jane"}),
+    ]
+    lines = [json.loads(line) for path in (tmp_path / 'audit').iterdir() for line in path.open()]
+    assert [line['action'] for line in lines] == ['tag.assign', 'profile.delete']
+    assert audit_log.stats()['written'] == 2
+
+def test_shard_deletions_are_audited(app):
+    """Test that profiles deleted through the shard set are audited."""
+    db.session.add(Profile(name="Jane", linkedin_url="https://www.linkedin.com/in/jane"))
+    db.session.commit()
+
+    assert shard_set.delete_profile("https://www.linkedin.com/in/jane")
+    audit_log.flush()
+    assert actions() == [('profile.delete', {'linkedin_url': "https://www.linkedin.com/in/jane"})]
+
+def test_batch_fetches_are_audited(app):
+    """Test that each processed batch item is recorded as a fetch."""
+    service = BatchService(app, processor=lambda item: None, audit=audit_log)
+    job = service.create_job(source='upload')
+    service.enqueue(job, [{'type': 'url', 'value': "https://www.linkedin.com/in/a"}, {'type': 'name', 'value': "Bo"}])
+    service.process_pending()
+    audit_log.flush()
+
+    records = AuditRecord.query.filter_by(action='fetch').order_by(AuditRecord.id).all()
+    assert [record.entity_id for record in records] == ["https://www.linkedin.com/in/a", "Bo"]
+    assert records[0].get_details()['job_id'] == job.id
+
+def test_back_pressure_drops_and_counts(app, monkeypatch):
+    """Test that a full queue drops records after a bounded wait and stop flushes the rest."""
+    monkeypatch.setitem(app.config, 'AUDIT_QUEUE_SIZE', 2)
+    monkeypatch.setitem(app.config, 'AUDIT_SINKS', ['db'])
+    log = AuditLog(app)
+    monkeypatch.setattr(log, '_ensure_writer', lambda: None)
+
+    assert [log.record('fetch', entity_id=i) for i in range(3)] == [True, True, False]
+    assert log.stats()['dropped'] == 1
+
+    log.stop()
+    assert log.stats()['written'] == 2
+    assert AuditRecord.query.count() == 2
+
+def test_failed_batches_are_kept_and_dead_lettered(app, monkeypatch, tmp_path):
+    """Test that a failing sink's batches are retried with the next write and spilled on overflow."""
+    monkeypatch.setitem(app.config, 'AUDIT_QUEUE_SIZE', 3)
+    monkeypatch.setitem(app.config, 'AUDIT_SINKS', ['db'])
+    monkeypatch.setattr('services.audit_log.time.sleep', lambda seconds: None)
+    log = AuditLog(app)
+    monkeypatch.setattr(log, '_ensure_writer', lambda: None)
+    write_db = log._write_db
+
+    def unavailable(batch):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(log, '_write_db', unavailable)
+    log.record('fetch', entity_id=1)
+    log.record('fetch', entity_id=2)
+    log.flush()
+    assert log.stats()['retained'] == 2
+    assert (log.stats()['written'], log.stats()['failed']) == (0, 0)
+
+    monkeypatch.setattr(log, '_write_db', write_db)
+    log.record('fetch', entity_id=3)
+    log.flush()
+    assert [record.entity_id for record in AuditRecord.query.order_by(AuditRecord.id)] == ['1', '2', '3']
+    assert (log.stats()['written'], log.stats()['retained']) == (3, 0)
+
+    # More kept records than the queue holds: the oldest go to the dead-letter file
+    monkeypatch.setattr(log, '_write_db', unavailable)
+    for i in range(4, 8):
+        log.record('fetch', entity_id=i)
+        log.flush()
+    assert (log.stats()['retained'], log.stats()['failed']) == (3, 1)
+    log.stop()
+    assert (log.stats()['retained'], log.stats()['failed']) == (0, 4)
+
+    lines = [json.loads(line) for path in (tmp_path / 'audit').glob('dead-letter-*.jsonl')
+             for line in path.open()]
+    assert [line['entity_id'] for line in lines] == ['4', '5', '6', '7']
+    assert lines[0]['missing_sinks'] == ['db']
@@ -0,0 +1,166 @@
+import json
+import threading
+from datetime import datetime, timedelta
+import pytest
+from app import create_app
+from config import TestingConfig
+from extensions import db
+from services.batch_service import BatchService
+from services.event_bus import EventBus, PostgresNotifyBridge, event_bus
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
+
+@pytest.fixture
+def service(app):
+    """A batch service of its own, registered on the app for the endpoints."""
+    return BatchService(app, processor=lambda item: None, events=event_bus)
+
+class RecordingBridge:
+    """Bridge stand-in that records what would be sent to other processes."""
+
+    def __init__(self):
+        self.sent = []
+
+    def publish(self, channel, event):
+        self.sent.append(event['type'])
+
+def parse_sse(body):
+    """Return the (event, data) pairs of an SSE response body."""
+    events = []
+    for block in body.split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line and not line.startswith(':'))
+        if 'event' in lines:
+            events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+def test_subscription_drops_oldest_when_full():
+    """Test that a slow subscriber loses old events instead of blocking publishers."""
+    bus = EventBus()
+    subscription = bus.subscribe('chan', maxsize=2)
+    for i in range(5):
+        bus.publish('chan', 'tick', i)
+
+    assert subscription.dropped == 3
+    assert subscription.get(timeout=0)['data'] == 3
+    assert subscription.get(timeout=0)['data'] == 4
+    assert subscription.get(timeout=0) is None
+
+    subscription.close()
+    assert bus.subscriber_count('chan') == 0
+
+def test_batch_service_publishes_job_events():
+    """Test that workers publish progress, item and summary events."""
+    bus = EventBus()
+    service = BatchService(processor=lambda item: None, events=bus)
+    job = service.create_job()
+
+    with bus.subscribe(service.channel(job.id)) as subscription:
+        service.enqueue(job, [{'type': 'url', 'value': 'a'}, {'type': 'url', 'value': 'b'}])
+        service.finish_submission(job)
+        service.process_pending()
+
+        types = []
+        while (event := subscription.get(timeout=0)) is not None:
+            types.append(event['type'])
+
+    assert types == ['progress', 'item', 'item', 'summary']
+
+def test_item_events_need_local_watchers_and_bridge_is_throttled():
+    """Test that unwatched jobs publish no item events and the bridge gets throttled progress."""
+    bus = EventBus()
+    bus.bridge = RecordingBridge()
+    service = BatchService(processor=lambda item: None, events=bus)
+    service.progress_interval = 3600
+    job = service.create_job()
+    service.enqueue(job, [{'type': 'url', 'value': str(i)} for i in range(50)])
+    service.finish_submission(job)
+    service.process_pending()
+
+    assert bus.bridge.sent == ['progress', 'summary']
+
+def test_finished_jobs_are_evicted_after_ttl():
+    """Test that finished jobs leave the registry once their TTL has passed."""
+    service = BatchService()
+    service.job_ttl = 60
+    old, running = service.create_job(), service.create_job()
+    service.finish_submission(old)
+    old.finished_at = datetime.utcnow() - timedelta(seconds=120)
+
+    assert service.list_jobs() == [running]
+    assert service.get_job(old.id) is None
+
+def test_bridge_ignores_own_notifications():
+    """Test that the NOTIFY bridge only relays events from other processes."""
+    bus = EventBus()
+    local = PostgresNotifyBridge(bus, 'postgresql://user:pw@localhost/career_peek')
+    remote = PostgresNotifyBridge(bus, 'postgresql://user:pw@localhost/career_peek')
+    payload = local.encode('batch:1', {'type': 'progress', 'data': {'processed': 1}})
+
+    assert local.decode(payload) is None
+    assert remote.decode(payload) == ('batch:1', {'type': 'progress', 'data': {'processed': 1}})
+
+    big = local.encode('batch:1', {'type': 'summary', 'data': 'x' * 10000})
+    assert remote.decode(big)[1] == {'type': 'summary', 'data': None, 'truncated': True}
+
+def test_job_events_stream(client, service):
+    """Test that the SSE endpoint streams a running job through to its summary."""
+    job = service.create_job(source='test')
+    service.enqueue(job, [{'type': 'name', 'value': 'Jane Smith'}])
+
+    response = client.get(f'/batch/jobs/{job.id}/events', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+
+    def finish():
+        service.finish_submission(job)
+        service.process_pending()
+
+    chunks = iter(response.response)
+    first = next(chunks) + next(chunks)
+    worker = threading.Thread(target=finish)
+    worker.start()
+    body = first + b''.join(chunks)
+    worker.join()
+
+    events = parse_sse(body.decode('utf-8'))
+    assert events[0][0] == 'progress'
+    assert events[-1][0] == 'summary'
+    assert events[-1][1]['job']['status'] == 'completed'
+    assert [e for e, _ in events].count('item') == 1
+
+def test_job_events_finished_job_and_missing(client, service):
+    """Test that finished jobs return only a summary and unknown jobs 404."""
+    job = service.create_job(source='test')
+    service.finish_submission(job)
+
+    events = parse_sse(client.get(f'/batch/jobs/{job.id}/events').get_data(as_text=True))
+    assert [e for e, _ in events] == ['summary']
+
+    assert client.get('/batch/jobs/missing/events').status_code == 404
+
+def test_job_events_for_unknown_job_time_out_with_bridge(monkeypatch):
+    """Test that with the bridge on, a stream for a job no process reports on ends with a timeout."""
+    monkeypatch.setattr(TestingConfig, 'SSE_KEEPALIVE_SECONDS', 0.05)
+    monkeypatch.setattr(TestingConfig, 'SSE_REMOTE_IDLE_SECONDS', 0.2)
+    monkeypatch.setattr(event_bus, 'bridge', RecordingBridge())
+    app = create_app('testing')
+    BatchService(app, processor=lambda item: None, events=event_bus)
+
+    response = app.test_client().get('/batch/jobs/missing/events')
+    assert response.status_code == 200
+    events = parse_sse(response.get_data(as_text=True))
+    assert [e for e, _ in events] == ['timeout']
+    assert events[0][1]['job_id'] == 'missing'
@@ -0,0 +1,211 @@
+import io
+import threading
+import time
+import pytest
+from app import create_app
+from config import TestingConfig
+from extensions import db
+from models import Profile, ProfileVersion
+from services.batch_service import BatchService, JobStatus
+from services.profile_fetcher import ProfileFetcher
+from services.upload_service import iter_upload_values, ingest_upload
+from utils.linkedin import canonicalize_linkedin_url
+from utils.stub_server import StubServer
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
+
+def test_canonicalize_linkedin_url():
+    """Test that URL variants collapse to one canonical form."""
+    variants = [
+        "https://www.linkedin.com/in/JohnDoe/",
+        "http://linkedin.com/in/johndoe?trk=public_profile",
+        "  HTTPS://WWW.LINKEDIN.COM/in/johndoe#about  ",
+    ]
+    for url in variants:
+        assert canonicalize_linkedin_url(url) == "https://www.linkedin.com/in/johndoe"
+
+    for url in ["", "https://facebook.com/johndoe", "www.linkedin.com/in/johndoe", "https://linkedin.com/"]:
+        with pytest.raises(ValueError):
+            canonicalize_linkedin_url(url)
+
+def test_iter_upload_values_csv_with_header():
+    """Test that a CSV header selects the URL column, falling back to name."""
+    data = b"\xef\xbb\xbfname,linkedin_url\nJane Smith,https://linkedin.com/in/jane\nJohn Smith,\n"
+    values = list(iter_upload_values(io.BytesIO(data), fmt='csv'))
+    assert values == [(2, "https://linkedin.com/in/jane"), (3, "John Smith")]
+
+def test_iter_upload_values_csv_without_header():
+    """Test that headerless CSV rows prefer URL-looking cells."""
+    data = b"Jane Smith,https://linkedin.com/in/jane\nJohn Smith\n"
+    values = list(iter_upload_values(io.BytesIO(data), fmt='csv'))
+    assert values == [(1, "https://linkedin.com/in/jane"), (2, "John Smith")]
+
+def test_ingest_upload_dedups_and_skips_existing(app):
+    """Test in-file dedup, existing-profile lookup and chunked queueing."""
+    db.session.add(Profile(name="John Doe", linkedin_url="https://www.linkedin.com/in/johndoe"))
+    db.session.commit()
+
+    lines = [
+        "https://www.linkedin.com/in/johndoe",
+        "https://linkedin.com/in/JaneSmith/",
+        "https://www.linkedin.com/in/janesmith",
+        "Jane  Smith",
+        "jane smith",
+        "https://facebook.com/someone",
+    ] + [f"https://www.linkedin.com/in/user{i}" for i in range(25)]
+    stream = io.BytesIO("\n".join(lines).encode('utf-8'))
+
+    service = BatchService()
+    job = service.create_job(source='test')
+    report = ingest_upload(stream, job, service, chunk_size=4)
+
+    assert report['rows'] == 31
+    assert report['duplicates'] == 2
+    assert report['invalid'] == 1
+    assert report['invalid_samples'][0]['line'] == 6
+    assert report['existing'] == 1
+    assert report['urls'] == 27
+    assert report['names'] == 1
+    assert report['queued'] == 27
+    assert job.total == 27
+    assert job.submitted is True
+
+def test_existing_check_matches_non_canonical_urls(app):
+    """Test that a profile saved with a non-canonical URL is still found as existing."""
+    db.session.add(Profile(name="John Doe", linkedin_url="http://linkedin.com/in/JohnDoe/?trk=public_profile"))
+    db.session.commit()
+    assert Profile.query.one().linkedin_url == "https://www.linkedin.com/in/johndoe"
+
+    service = BatchService()
+    job = service.create_job()
+    report = ingest_upload(io.BytesIO(b"https://www.linkedin.com/in/johndoe/\n"), job, service)
+    assert report['existing'] == 1
+    assert report['queued'] == 0
+
+def test_enqueue_blocks_when_queue_is_full(app, monkeypatch):
+    """Test that producers wait for room in a full queue instead of growing it."""
+    monkeypatch.setattr(TestingConfig, 'BATCH_QUEUE_SIZE', 2)
+    service = BatchService(create_app('testing'), processor=lambda item: None)
+    job = service.create_job()
+    producer = threading.Thread(target=service.enqueue, args=(job, [{'type': 'name', 'value': str(i)} for i in range(5)]))
+    producer.start()
+    time.sleep(0.2)
+    assert producer.is_alive()
+    assert service._queue.qsize() == 2
+
+    service.start()
+    producer.join(5)
+    service.finish_submission(job)
+    service.stop(5)
+    assert job.status == JobStatus.COMPLETED
+    assert job.processed == 5
+
+def test_ingest_upload_processes_items(app):
+    """Test that queued items reach the processor and complete the job."""
+    processed = []
+    service = BatchService(processor=processed.append)
+    job = service.create_job()
+    ingest_upload(io.BytesIO(b"https://linkedin.com/in/a\nhttps://linkedin.com/in/b\n"), job, service)
+    service.process_pending()
+
+    assert [item['value'] for item in processed] == [
+        "https://www.linkedin.com/in/a", "https://www.linkedin.com/in/b"
+    ]
+    assert job.status == JobStatus.COMPLETED
+    assert job.succeeded == 2
+
+def _wait_for_submission(client, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get(f"/batch/jobs/{job_id}")
+        assert response.status_code == 200
+        job = response.get_json()
+        if job['submitted'] or time.monotonic() > deadline:
+            return job
+        time.sleep(0.02)
+
+def test_submit_batch_endpoint(client):
+    """Test uploading a file to the batch endpoint and reading the job back."""
+    data = {'file': (io.BytesIO(b"url\nhttps://linkedin.com/in/a\nhttps://linkedin.com/in/a\n"), 'people.csv')}
+    response = client.post('/batch/profiles', data=data, content_type='multipart/form-data')
+
+    assert response.status_code == 202
+    job = _wait_for_submission(client, response.get_json()['id'])
+    assert job['upload_report']['queued'] == 1
+    assert job['upload_report']['duplicates'] == 1
+    assert job['total'] == 1
+
+    assert client.get('/batch/jobs/missing').status_code == 404
+
+def test_submit_batch_returns_before_the_queue_drains(monkeypatch):
+    """Test that an upload larger than the queue is accepted without waiting for workers."""
+    monkeypatch.setattr(TestingConfig, 'BATCH_QUEUE_SIZE', 5)
+    app = create_app('testing')
+    service = BatchService(app)
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        data = b"".join(f"Person {i}\n".encode() for i in range(20))
+        started = time.monotonic()
+        response = client.post('/batch/profiles', data=data, content_type='text/plain')
+        assert response.status_code == 202
+        assert time.monotonic() - started < 2
+        job = service.get_job(response.get_json()['id'])
+        assert not job.submitted
+
+        deadline = time.monotonic() + 5
+        while service._queue.qsize() < 5 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert client.delete(f"/batch/jobs/{job.id}").status_code == 200
+        job = _wait_for_submission(client, job.id)
+        assert job['submitted'] and job['status'] == JobStatus.CANCELLED
+        assert job['total'] == 5
+        service.process_pending()
+        db.session.remove()
+        db.drop_all()
+
+def test_uploaded_job_runs_to_completion(tmp_path, monkeypatch):
+    """Test that an upload is fetched by the worker pool and stored as profiles."""
+    with StubServer(token='secret') as server:
+        monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'test.sqlite'}")
+        monkeypatch.setattr(TestingConfig, 'BATCH_WORKERS_ENABLED', True)
+        monkeypatch.setattr(TestingConfig, 'LINKEDIN_API_BASE_URL', server.base_url)
+        monkeypatch.setattr(TestingConfig, 'LINKEDIN_API_TOKEN', 'secret')
+        monkeypatch.setattr(TestingConfig, 'FETCH_CACHE_DIR', str(tmp_path / 'cache'))
+        app = create_app('testing')
+        fetcher = ProfileFetcher(app)
+        service = BatchService(app, processor=fetcher)
+        server.set_profile('jane-doe', {'name': "Jane Doe", 'headline': "Engineer"})
+
+        with app.app_context():
+            db.create_all()
+            data = b"https://linkedin.com/in/jane-doe\nhttps://linkedin.com/in/bo\nJohn Smith\n"
+            response = app.test_client().post('/batch/profiles', data=data, content_type='text/plain')
+            job = service.get_job(response.get_json()['id'])
+            deadline = time.monotonic() + 10
+            while not job.is_finished and time.monotonic() < deadline:
+                time.sleep(0.05)
+            service.stop(5)
+            fetcher.close()
+
+            assert job.status == JobStatus.COMPLETED
+            assert (job.succeeded, job.failed) == (2, 1)
+            jane = Profile.query.filter_by(linkedin_url="https://www.linkedin.com/in/jane-doe").one()
+            assert jane.name == "Jane Doe" and jane.last_updated is not None
+            assert ProfileVersion.query.filter_by(profile_id=jane.id).count() == 1
+            db.session.remove()
+            db.drop_all()
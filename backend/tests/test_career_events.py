@@ -0,0 +1,130 @@
+import pytest
+from datetime import date, datetime
+from app import create_app
+from extensions import db
+from models import Profile, JobHistory, CareerEvent
+from services.career_event_service import (
+    normalize_company, profiles_promoted_within, refresh_career_events, seniority
+)
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
+
+def add_profile(slug, jobs):
+    """Create a profile with ``(company, role, start, end)`` jobs."""
+    profile = Profile(name=slug, linkedin_url=f"https://www.linkedin.com/in/{slug}")
+    db.session.add(profile)
+    db.session.flush()
+    for company, role, start, end in jobs:
+        db.session.add(JobHistory(profile_id=profile.id, company_name=company, role=role,
+                                  start_date=start, end_date=end, is_current=end is None))
+    db.session.commit()
+    return profile
+
+def event_types(profile):
+    events = CareerEvent.query.filter_by(profile_id=profile.id).order_by(CareerEvent.event_date, CareerEvent.id)
+    return [event.event_type for event in events]
+
+def test_seniority_levels():
+    """Test the seniority ladder used to tell promotions from lateral moves."""
+    assert seniority("Software Engineer") < seniority("Senior Software Engineer")
+    assert seniority("Software Engineer II") > seniority("Software Engineer I")
+    assert seniority("Vice President, Sales") < seniority("President")
+    assert seniority("Engineering Manager") < seniority("Director of Engineering")
+    assert seniority("Marketing Intern") < seniority("Marketing Associate")
+
+def test_normalize_company():
+    """Test that only trailing legal suffixes are stripped and whitespace is collapsed."""
+    assert normalize_company("ACME Inc.") == "acme"
+    assert normalize_company("Acme Co., Ltd.") == "acme"
+    assert normalize_company("Acme Co Labs") == "acme co labs"
+    assert normalize_company("Co-op Bank") == "co op bank"
+    assert normalize_company("LLC Partners") == "llc partners"
+    assert normalize_company("  Big   Corp  ") == "big"
+    assert normalize_company("Inc") == "inc"
+
+def test_derive_events(app):
+    """Test promotion, lateral move, company change, gap and side-role handling."""
+    profile = add_profile('jane', [
+        ("Acme Inc", "Software Engineer", date(2015, 1, 1), date(2016, 6, 1)),
+        ("Acme", "Senior Software Engineer", date(2016, 6, 1), date(2017, 6, 1)),
+        ("Acme", "Senior Data Engineer", date(2017, 6, 1), date(2018, 1, 1)),
+        ("Open Source Foundation", "Board Member", date(2017, 1, 1), date(2017, 12, 1)),
+        ("Globex", "Staff Engineer", date(2018, 9, 1), None),
+    ])
+    report = refresh_career_events()
+
+    assert report['profiles'] == 1
+    assert event_types(profile) == ['promotion', 'lateral_move', 'gap', 'company_change']
+
+    promotion = CareerEvent.query.filter_by(event_type='promotion').one()
+    assert promotion.company_tenure_months == 17
+    assert promotion.company_key == 'acme'
+    gap = CareerEvent.query.filter_by(event_type='gap').one()
+    assert gap.gap_months == 8
+    change = CareerEvent.query.filter_by(event_type='company_change').one()
+    assert change.from_company == "Acme"
+    assert change.to_company == "Globex"
+
+def test_refresh_is_incremental(app):
+    """Test that only profiles whose jobs changed are recomputed."""
+    jane = add_profile('jane', [
+        ("Acme", "Engineer", date(2015, 1, 1), date(2016, 1, 1)),
+        ("Acme", "Senior Engineer", date(2016, 1, 1), None),
+    ])
+    add_profile('john', [("Globex", "Analyst", date(2019, 1, 1), None)])
+
+    assert refresh_career_events()['profiles'] == 2
+    assert refresh_career_events()['profiles'] == 0
+
+    job = JobHistory.query.filter_by(profile_id=jane.id, role="Senior Engineer").one()
+    job.role = "Engineering Manager"
+    job.updated_at = datetime(2030, 1, 1)
+    db.session.commit()
+    assert refresh_career_events()['profiles'] == 1
+
+    for job in JobHistory.query.filter_by(profile_id=jane.id):
+        db.session.delete(job)
+    db.session.commit()
+    assert refresh_career_events()['profiles'] == 1
+    assert event_types(jane) == []
+
+def test_promoted_within_query(app, client):
+    """Test the set-based promotion query and its endpoint."""
+    fast = add_profile('fast', [
+        ("Acme", "Engineer", date(2015, 1, 1), date(2016, 1, 1)),
+        ("Acme", "Senior Engineer", date(2016, 1, 1), None),
+    ])
+    add_profile('slow', [
+        ("Acme", "Engineer", date(2015, 1, 1), date(2018, 1, 1)),
+        ("Acme", "Senior Engineer", date(2018, 1, 1), None),
+    ])
+    refresh_career_events()
+
+    assert profiles_promoted_within("ACME Inc.", 18) == [fast.id]
+
+    response = client.get('/analytics/promotions?company=Acme&within_months=18')
+    assert response.status_code == 200
+    assert response.get_json()['profile_ids'] == [fast.id]
+
+    response = client.get('/analytics/career-events?type=promotion&company=Acme')
+    assert len(response.get_json()) == 2
+    assert client.get('/analytics/career-events?type=bogus').status_code == 400
+    for path in ('/analytics/career-events', '/analytics/tenure', '/analytics/transitions'):
+        assert client.get(f'{path}?limit=-1').status_code == 400
+        assert client.get(f'{path}?limit=0').status_code == 400
+        assert client.get(f'{path}?limit=5000').status_code == 200
+    assert client.get('/analytics/promotions?company=Acme').status_code == 400
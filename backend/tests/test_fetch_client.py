@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import pytest
+from services.fetch_client import AsyncFetchClient, FetchClient
+from utils.stub_server import StubServer
+
+@pytest.fixture
+def server():
+    """A running stand-in LinkedIn server."""
+    with StubServer(token="secret") as server:
+        yield server
+
+def test_keep_alive_connections_are_reused(server):
+    """Test that sequential requests share one pooled connection."""
+    with FetchClient(token="secret") as client:
+        responses = [client.get(server.url(f"user-{i}")) for i in range(10)]
+    assert [response.json()['slug'] for response in responses] == [f"user-{i}" for i in range(10)]
+    assert server.counters['connections'] == 1
+    assert client.stats()['connections_reused'] == 9
+
+def test_conditional_requests_use_disk_cache(server, tmp_path):
+    """Test ETag revalidation, cache persistence across clients and changed content."""
+    url = server.url("jane")
+    server.set_profile("jane", {'name': "Jane", 'title': "Engineer"})
+    with FetchClient(token="secret", cache_dir=str(tmp_path)) as client:
+        first = client.get(url)
+        second = client.get(url)
+    assert not first.from_cache
+    assert second.from_cache and second.json() == first.json()
+
+    with FetchClient(token="secret", cache_dir=str(tmp_path)) as client:
+        assert client.get(url).from_cache
+        server.set_profile("jane", {'name': "Jane", 'title': "Manager"})
+        changed = client.get(url)
+    assert not changed.from_cache
+    assert changed.json()['title'] == "Manager"
+    assert server.counters['not_modified'] == 2
+
+    with FetchClient(cache_dir=str(tmp_path)) as client:
+        assert client.get(url).status == 401
+
+def test_cache_is_scoped_to_the_token(tmp_path):
+    """Test that clients with different tokens do not share cached responses."""
+    with StubServer() as server:
+        url = server.url("jane")
+        with FetchClient(token="first", cache_dir=str(tmp_path)) as client:
+            client.get(url)
+        with FetchClient(token="second", cache_dir=str(tmp_path)) as client:
+            assert not client.get(url).from_cache
+        assert server.counters['not_modified'] == 0
+        with FetchClient(token="first", cache_dir=str(tmp_path)) as client:
+            assert client.get(url).from_cache
+    cached = [path.read_text() for path in tmp_path.rglob('*.json')]
+    assert len(cached) == 2 and not any("first" in text or "second" in text for text in cached)
+
+def test_duplicate_in_flight_requests_are_coalesced(server):
+    """Test that concurrent requests for one URL send a single request."""
+    server.latency = 0.2
+    client = FetchClient(token="secret")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.get(server.url("jane"))))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    client.close()
+    assert len(results) == 8 and len({id(result) for result in results}) == 1
+    assert server.counters['requests'] == 1
+    assert client.stats()['coalesced'] == 7
+
+def test_async_client(server, tmp_path):
+    """Test concurrent asyncio fetching with coalescing of duplicate URLs."""
+    server.latency = 0.05
+    urls = [server.url(f"user-{i % 10}") for i in range(30)]
+
+    async def fetch():
+        async with AsyncFetchClient(max_concurrency=16, token="secret", cache_dir=str(tmp_path)) as client:
+            return await client.get_many(urls), client.client.stats()
+
+    responses, stats = asyncio.run(fetch())
+    assert [response.json()['slug'] for response in responses] == [f"user-{i % 10}" for i in range(30)]
+    assert server.counters['requests'] == 10
+    assert stats['coalesced'] == 20
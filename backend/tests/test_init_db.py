@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import create_engine, text
+from init_db import (
+    backoff_delays, server_uri, wait_for_db, get_head_revisions, schema_is_current
+)
+
+@pytest.fixture
+def sqlite_uri(tmp_path):
+    """A file-backed SQLite database URI."""
+    return f"sqlite:///{tmp_path / 'init_db_test.sqlite'}"
+
+def test_backoff_delays_grow_and_are_capped():
+    """Test that backoff delays double each attempt up to the cap."""
+    delays = list(backoff_delays(6, base_delay=0.5, max_delay=3.0, rng=lambda: 1.0))
+    assert delays == [0.5, 1.0, 2.0, 3.0, 3.0, 3.0]
+
+def test_backoff_delays_are_jittered():
+    """Test that jitter scales each delay by the random factor."""
+    delays = list(backoff_delays(3, base_delay=1.0, max_delay=10.0, rng=lambda: 0.25))
+    assert delays == [0.25, 0.5, 1.0]
+
+def test_server_uri_targets_maintenance_database():
+    """Test that the server URI keeps credentials and swaps the database name."""
+    url = server_uri('postgresql://user:p%40ss@db:6543/career_peek')
+    assert url.database == 'postgres'
+    assert url.host == 'db'
+    assert url.port == 6543
+    assert url.password == 'p@ss'
+
+def test_wait_for_db_sqlite_returns_immediately(sqlite_uri):
+    """Test that SQLite databases do not wait."""
+    assert wait_for_db(sqlite_uri) is True
+
+def test_schema_is_current(sqlite_uri):
+    """Test the revision check against an empty and a stamped database."""
+    heads = get_head_revisions()
+    assert len(heads) == 1
+
+    assert schema_is_current(sqlite_uri, heads) is False
+
+    engine = create_engine(sqlite_uri)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+        conn.execute(text("INSERT INTO alembic_version VALUES (:rev)"), {'rev': next(iter(heads))})
+    engine.dispose()
+
+    assert schema_is_current(sqlite_uri, heads) is True
@@ -0,0 +1,138 @@
+import json
+import pytest
+from datetime import date
+from sqlalchemy import update
+from app import create_app
+from extensions import db
+from models import Education, JobHistory, Profile, ProfileDocument, ProfileTag, ProfileVersion
+from services.profile_documents import read_document, verify_documents, write_documents
+from services.role_classifier import classify_role_types
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
+
+@pytest.fixture
+def profile(app):
+    """A profile with a job, an education entry, a tag and a version."""
+    profile = Profile(name="Jane Doe", linkedin_url="https://www.linkedin.com/in/janedoe")
+    profile.jobs = [JobHistory(company_name="Acme", role="Engineer", role_type="Contract",
+                               start_date=date(2020, 1, 1), is_current=True)]
+    profile.education = [Education(institution="MIT", degree="BSc")]
+    profile.tags = [ProfileTag(tag_name="vip")]
+    profile.versions = [ProfileVersion(version_number=1, data_snapshot=json.dumps({'name': "Jane Doe"}))]
+    db.session.add(profile)
+    db.session.commit()
+    return profile
+
+def stored(profile_id):
+    return json.loads(read_document(profile_id)[0])
+
+def test_document_is_built_on_commit(profile):
+    """Test that committing a profile graph stores its serialized document."""
+    document = stored(profile.id)
+    assert document['name'] == "Jane Doe"
+    assert [job['company_name'] for job in document['jobs']] == ["Acme"]
+    assert [education['institution'] for education in document['education']] == ["MIT"]
+    assert document['tags'] == ["vip"]
+    assert document['latest_version']['data'] == {'name': "Jane Doe"}
+
+def test_document_follows_child_changes(profile):
+    """Test that changing, adding or removing children rebuilds the document, and rollbacks do not."""
+    profile.jobs[0].role = "Staff Engineer"
+    db.session.add(ProfileTag(profile_id=profile.id, tag_name="alumni"))
+    db.session.commit()
+    assert stored(profile.id)['jobs'][0]['role'] == "Staff Engineer"
+    assert stored(profile.id)['tags'] == ["alumni", "vip"]
+
+    db.session.delete(profile.education[0])
+    db.session.flush()
+    db.session.rollback()
+    assert len(stored(profile.id)['education']) == 1
+
+    db.session.delete(profile)
+    db.session.commit()
+    assert db.session.get(ProfileDocument, profile.id) is None
+
+def test_bulk_classification_keeps_documents_current(profile):
+    """Test that the bulk role classification pass rebuilds the documents it changes."""
+    db.session.execute(update(JobHistory).values(role_type=None))
+    db.session.commit()
+    classify_role_types(full=True)
+    assert stored(profile.id)['jobs'][0]['role_type'] is not None
+
+def test_verify_detects_and_repairs_drift(profile):
+    """Test that verification reports drift introduced behind the hooks' back and repairs it."""
+    db.session.execute(update(JobHistory).values(company_name="Initech"))
+    db.session.commit()
+
+    report = verify_documents()
+    assert report['drifted'] == [profile.id] and not report['repaired']
+
+    report = verify_documents(repair=True)
+    assert report['repaired']
+    assert stored(profile.id)['jobs'][0]['company_name'] == "Initech"
+    assert verify_documents()['drifted'] == []
+
+def test_get_profile_serves_stored_bytes(client, profile):
+    """Test that the endpoint returns the stored bytes with an ETag and honours If-None-Match."""
+    document, digest = read_document(profile.id)
+    response = client.get(f'/profiles/{profile.id}')
+    assert response.status_code == 200
+    assert response.data == document
+    assert response.headers['ETag'] == f'"{digest}"'
+
+    response = client.get(f'/profiles/{profile.id}', headers={'If-None-Match': f'"{digest}"'})
+    assert response.status_code == 304
+    assert client.get('/profiles/999').status_code == 404
+
+def test_write_documents_upserts(profile):
+    """Test that rewriting documents updates them in place and removes those of deleted profiles."""
+    db.session.execute(update(Profile).values(name="Jane Smith"))
+    assert write_documents([profile.id, 999]) == 1
+    db.session.commit()
+    assert stored(profile.id)['name'] == "Jane Smith"
+    assert db.session.query(ProfileDocument).count() == 1
+
+def test_get_profile_verify_mode(client, profile):
+    """Test that verify mode serves the rebuilt document and reports drift without storing it."""
+    db.session.execute(update(Profile).values(name="Jane Smith"))
+    db.session.commit()
+
+    response = client.get(f'/profiles/{profile.id}?verify=true')
+    assert response.headers['X-Document-Drift'] == 'true'
+    assert response.get_json()['name'] == "Jane Smith"
+    assert stored(profile.id)['name'] == "Jane Doe"
+    assert client.get(f'/profiles/{profile.id}?verify=true').headers['X-Document-Drift'] == 'true'
+
+    verify_documents(repair=True)
+    response = client.get(f'/profiles/{profile.id}?verify=true')
+    assert response.headers['X-Document-Drift'] == 'false'
+
+def test_get_profiles_builds_missing_documents(client, profile):
+    """Test that the batch endpoint returns documents in request order and builds missing ones unstored."""
+    other = Profile(name="Bo", linkedin_url="https://www.linkedin.com/in/bo")
+    db.session.add(other)
+    db.session.commit()
+    db.session.query(ProfileDocument).filter_by(profile_id=other.id).delete()
+    db.session.commit()
+
+    response = client.get(f'/profiles?ids={other.id},{profile.id},999')
+    assert [document['name'] for document in response.get_json()] == ["Bo", "Jane Doe"]
+    assert read_document(other.id) is None
+    response = client.get(f'/profiles/{other.id}')
+    assert response.get_json()['name'] == "Bo" and 'ETag' in response.headers
+    assert read_document(other.id) is None
+    assert client.get('/profiles?ids=x').status_code == 400
@@ -0,0 +1,114 @@
+import json
+import pytest
+from datetime import datetime, timedelta
+from app import create_app
+from extensions import db
+from models import Profile, ProfileTag, ProfileVersion, RefreshIssue
+from services.batch_service import BatchService
+from services.refresh_scheduler import (
+    RefreshScheduler, change_probability, estimate_change_rate, refresh_scheduler
+)
+
+NOW = datetime(2026, 1, 1)
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def add_profile(slug, last_updated, versions=0, tags=()):
+    """Create a profile with evenly spaced versions over the past year."""
+    profile = Profile(
+        name=slug,
+        linkedin_url=f"https://www.linkedin.com/in/{slug}",
+        last_updated=last_updated,
+        created_at=NOW - timedelta(days=365)
+    )
+    db.session.add(profile)
+    db.session.flush()
+    for i in range(versions):
+        db.session.add(ProfileVersion(
+            profile_id=profile.id,
+            version_number=i + 1,
+            data_snapshot=json.dumps({}),
+            valid_from=NOW - timedelta(days=365) + timedelta(days=i * 365 / max(versions, 1))
+        ))
+    for tag in tags:
+        db.session.add(ProfileTag(profile_id=profile.id, tag_name=tag))
+    db.session.commit()
+    return profile
+
+def test_change_rate_estimate():
+    """Test that more version history means a higher change rate."""
+    first_seen = NOW - timedelta(days=365)
+    assert estimate_change_rate(10, first_seen, NOW) > estimate_change_rate(1, first_seen, NOW)
+    assert change_probability(0.01, 0) == 0.0
+    assert 0.0 < change_probability(0.01, 30) < change_probability(0.01, 60) < 1.0
+
+def test_rank_orders_by_staleness_volatility_and_tags(app):
+    """Test the ranking combines staleness, change history and tag priority."""
+    add_profile('fresh', NOW - timedelta(hours=1), versions=20)
+    add_profile('stable', NOW - timedelta(days=30), versions=1)
+    add_profile('volatile', NOW - timedelta(days=30), versions=12)
+    add_profile('vip', NOW - timedelta(days=30), versions=1, tags=['vip'])
+    add_profile('never', None)
+
+    scheduler = RefreshScheduler(batch=BatchService())
+    scheduler.tag_priorities = {'vip': 20.0}
+
+    ranked = [c.linkedin_url.rsplit('/', 1)[1] for c in scheduler.rank(10, now=NOW)]
+    assert ranked == ['vip', 'never', 'volatile', 'stable']
+
+def test_run_once_respects_budget(app):
+    """Test that refreshes are queued within the window budget and not repeated."""
+    for i in range(5):
+        add_profile(f"user{i}", NOW - timedelta(days=10 + i))
+
+    batch = BatchService()
+    scheduler = RefreshScheduler(batch=batch)
+    scheduler.budget = 3
+
+    job = scheduler.run_once(now=NOW)
+    assert job.total == 3
+    assert scheduler.budget_remaining(now=NOW) == 0
+    assert scheduler.run_once(now=NOW) is None
+
+    # With more budget, profiles already issued in this window are skipped
+    scheduler.budget = 10
+    job = scheduler.run_once(now=NOW)
+    assert job.total == 2
+
+    queued = []
+    batch.processor = queued.append
+    batch.process_pending()
+    assert sorted(item['value'].rsplit('/', 1)[1] for item in queued) == [
+        'user0', 'user1', 'user2', 'user3', 'user4'
+    ]
+
+def test_budget_is_shared_between_schedulers(app):
+    """Test that schedulers in different processes spend one budget, which frees up after the window."""
+    for i in range(4):
+        add_profile(f"user{i}", NOW - timedelta(days=10 + i))
+
+    first, second = RefreshScheduler(batch=BatchService()), RefreshScheduler(batch=BatchService())
+    for scheduler in (first, second):
+        scheduler.budget = 3
+
+    assert first.run_once(now=NOW).total == 3
+    assert second.run_once(now=NOW) is None
+    assert RefreshIssue.query.count() == 3
+
+    later = NOW + timedelta(seconds=second.window_seconds + 1)
+    assert second.budget_remaining(now=later) == 3
+    assert second.run_once(now=later).total == 3
+    assert RefreshIssue.query.count() == 3
+
+def test_app_factory_does_not_start_scheduler(app):
+    """Test that creating an app never starts the scheduler thread."""
+    assert refresh_scheduler._thread is None or not refresh_scheduler._thread.is_alive()
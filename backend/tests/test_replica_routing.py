@@ -0,0 +1,104 @@
+import pytest
+from datetime import date
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import OperationalError
+from app import create_app
+from config import TestingConfig
+from extensions import db
+from models import Profile, CareerEvent, ReplicationHeartbeat
+from services.replica_router import PIN_COOKIE, replica_router
+from services.shard_service import shard_set
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Create an app with a primary and a replica SQLite file."""
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'primary.sqlite'}")
+    monkeypatch.setattr(TestingConfig, 'REPLICA_DATABASE_URL', f"sqlite:///{tmp_path / 'replica.sqlite'}")
+    monkeypatch.setattr(TestingConfig, 'REPLICA_LAG_CHECK_SECONDS', 0)
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(replica_router.engine)
+        yield app
+        db.session.remove()
+        db.drop_all()
+        db.metadata.drop_all(replica_router.engine)
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
+
+def replicate_heartbeat():
+    """Copy the primary heartbeat to the replica, as replication would."""
+    with db.engine.connect() as conn:
+        beat_at = conn.execute(select(ReplicationHeartbeat.beat_at)).scalar()
+    with replica_router.engine.begin() as conn:
+        conn.execute(delete(ReplicationHeartbeat))
+        conn.execute(insert(ReplicationHeartbeat).values(id=1, beat_at=beat_at))
+
+def event_count(client):
+    return len(client.get('/analytics/career-events').get_json())
+
+def test_reads_route_to_replica_with_fallback_and_pinning(app, client):
+    """Test replica reads, lag fallback and read-your-writes pinning."""
+    profile = Profile(name="Jane", linkedin_url="https://www.linkedin.com/in/jane")
+    db.session.add(profile)
+    db.session.flush()
+    db.session.add(CareerEvent(profile_id=profile.id, event_type='promotion', event_date=date(2020, 1, 1)))
+    db.session.commit()
+
+    # The first check has no earlier beat to compare, so the replica is trusted
+    assert event_count(client) == 0
+    # The replica has not seen the previous beat: too far behind
+    assert event_count(client) == 1
+    assert replica_router.lag_seconds == float('inf')
+
+    replicate_heartbeat()
+    assert event_count(client) == 0
+    assert replica_router.lag_seconds == 0
+
+    # A write pins the client to the primary
+    response = client.post('/batch/profiles', data=b"https://www.linkedin.com/in/john\n",
+                           content_type='text/plain')
+    assert response.status_code == 202
+    assert PIN_COOKIE in response.headers['Set-Cookie']
+    assert event_count(client) == 1
+    assert event_count(app.test_client()) == 0
+
+def test_replica_reads_context(app):
+    """Test explicit replica reads for export streams."""
+    db.session.add(Profile(name="Jane", linkedin_url="https://www.linkedin.com/in/jane"))
+    db.session.commit()
+
+    with replica_router.replica_reads():
+        assert Profile.query.count() == 0
+        # A write pins the rest of the session to the primary
+        db.session.add(Profile(name="John", linkedin_url="https://www.linkedin.com/in/john"))
+        db.session.flush()
+        assert Profile.query.count() == 2
+    db.session.commit()
+    assert Profile.query.count() == 2
+
+def test_failed_lag_check_reads_from_primary(app, client, monkeypatch):
+    """Test that a lag check that raises is treated as infinite lag."""
+    def fail(now=None):
+        raise OperationalError("SELECT beat_at", {}, Exception("connection refused"))
+
+    monkeypatch.setattr(replica_router, 'check_lag', fail)
+    assert replica_router.replica_healthy() is False
+    assert replica_router.lag_seconds == float('inf')
+    assert replica_router.replica_healthy() is False
+    assert client.get('/analytics/career-events').status_code == 200
+
+def test_export_reads_from_replica(app):
+    """Test that the profile export reads from the replica while it keeps up."""
+    db.session.add(Profile(name="Jane", linkedin_url="https://www.linkedin.com/in/jane"))
+    db.session.commit()
+
+    assert list(shard_set.export_profiles()) == []
+    assert 'use_replica' not in db.session.info
+
+    # The replica has not seen the previous beat, so the export falls back
+    assert [document['name'] for document in shard_set.export_profiles()] == ["Jane"]
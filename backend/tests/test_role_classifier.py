@@ -0,0 +1,143 @@
+import threading
+import pytest
+from datetime import date, datetime
+from sqlalchemy import event
+from app import create_app
+from config import TestingConfig
+from extensions import db
+from models import Profile, JobHistory
+from services.role_classifier import (
+    RoleTypeClassifier, _classify_on_flush, classify_role_types,
+    disable_ingest_classification, enable_ingest_classification, normalize_title
+)
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def profile(app):
+    """Create a sample profile."""
+    profile = Profile(name="Jane Smith", linkedin_url="https://www.linkedin.com/in/janesmith")
+    db.session.add(profile)
+    db.session.commit()
+    return profile
+
+def add_job(profile, role, description=None, company_size=None, role_type=None):
+    job = JobHistory(profile_id=profile.id, company_name="Acme", role=role,
+                     description=description, company_size=company_size,
+                     role_type=role_type, start_date=date(2020, 1, 1))
+    db.session.add(job)
+    return job
+
+def test_classifier_rules():
+    """Test title, description and company size rules."""
+    classifier = RoleTypeClassifier()
+    assert normalize_title("  Software Engineering   INTERN!! ") == "software engineering intern"
+    assert classifier.classify("Software Engineering Intern") == 'Internship'
+    assert classifier.classify("Co-Founder & CEO") == 'Self-employed'
+    assert classifier.classify("Volunteer Coordinator") == 'Volunteer'
+    assert classifier.classify("Internal Auditor") == 'Full-time'
+    assert classifier.classify("Mentor", "Volunteered weekly with students") == 'Volunteer'
+    assert classifier.classify("Designer", company_size="Self-employed") == 'Self-employed'
+    assert classifier.classify("Senior Developer") == 'Full-time'
+
+def test_classifier_ignores_incidental_mentions():
+    """Test that "owner" and description keywords only count when they describe the role."""
+    classifier = RoleTypeClassifier()
+    assert classifier.classify("Product Owner") == 'Full-time'
+    assert classifier.classify("Owner") == 'Self-employed'
+    assert classifier.classify("Business Owner") == 'Self-employed'
+    assert classifier.classify("Owner/Operator") == 'Self-employed'
+    assert classifier.classify("Software Engineer", "Ran the internship program") == 'Full-time'
+    assert classifier.classify("Engineering Manager", "Organized volunteer days") == 'Full-time'
+    assert classifier.classify("Recruiter", "Hired part-time and seasonal staff") == 'Full-time'
+    assert classifier.classify("Analyst", "Worked as a summer intern on pricing") == 'Internship'
+    assert classifier.classify("Organizer", "An unpaid position with the food bank") == 'Volunteer'
+
+def test_classify_batch_memoizes_titles():
+    """Test that repeated titles are served from the title cache."""
+    classifier = RoleTypeClassifier()
+    rows = [("Software Engineer", None, None)] * 8 + [("Summer Intern", None, None)] * 2
+    labels = classifier.classify_batch(rows)
+    assert labels == ['Full-time'] * 8 + ['Internship'] * 2
+    assert classifier.misses == 2
+    assert classifier.hits == 8
+
+def test_title_cache_is_thread_safe():
+    """Test that concurrent lookups keep the bounded title cache consistent."""
+    classifier = RoleTypeClassifier(cache_size=16)
+    titles = [f"engineer {i % 40}" for i in range(4000)]
+
+    def work(offset):
+        for title in titles[offset:] + titles[:offset]:
+            classifier.classify_title(title)
+
+    threads = [threading.Thread(target=work, args=(i * 7,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(classifier._cache) == 16
+    assert classifier.hits + classifier.misses == 8 * len(titles)
+
+def test_classify_role_types_batch(app, profile):
+    """Test the batch pass fills unclassified rows and respects manual values."""
+    disable_ingest_classification()
+    try:
+        intern = add_job(profile, "Data Science Intern")
+        manual = add_job(profile, "Consultant", role_type="Contract")
+        add_job(profile, "Engineer")
+        db.session.commit()
+
+        report = classify_role_types(batch_size=2)
+        assert report['processed'] == 2
+        assert report['by_type'] == {'Internship': 1, 'Full-time': 1}
+        assert intern.role_type == 'Internship'
+        assert manual.role_type == 'Contract'
+        assert classify_role_types()['processed'] == 0
+
+        # Automatically classified rows are reclassified after they change
+        intern.role = "Data Scientist"
+        intern.updated_at = datetime(2030, 1, 1)
+        db.session.commit()
+        assert classify_role_types()['processed'] == 1
+        assert intern.role_type == 'Full-time'
+    finally:
+        enable_ingest_classification()
+
+def test_ingest_classification(app, profile):
+    """Test that new and edited jobs are classified when flushed."""
+    job = add_job(profile, "Marketing Intern")
+    manual = add_job(profile, "Engineer", role_type="Part-time")
+    db.session.commit()
+
+    assert job.role_type == 'Internship'
+    assert job.role_type_classified_at == job.updated_at
+    assert manual.role_type == 'Part-time'
+    assert manual.role_type_classified_at is None
+
+    job.role = "Marketing Manager"
+    db.session.commit()
+    assert job.role_type == 'Full-time'
+
+    # The batch pass has nothing left to do
+    assert classify_role_types()['processed'] == 0
+
+def test_create_app_disables_ingest_classification(monkeypatch):
+    """Test that an app created with ingest classification off removes the flush hook."""
+    create_app('testing')
+    assert event.contains(db.session, 'before_flush', _classify_on_flush)
+
+    monkeypatch.setattr(TestingConfig, 'ROLE_TYPE_CLASSIFY_ON_INGEST', False)
+    create_app('testing')
+    assert not event.contains(db.session, 'before_flush', _classify_on_flush)
+    enable_ingest_classification()
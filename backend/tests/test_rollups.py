@@ -0,0 +1,143 @@
+import pytest
+from datetime import date, datetime
+from app import create_app
+from extensions import db
+from models import Profile, JobHistory, TenureRollup
+from services.rollup_service import (
+    approximate_percentile, company_transitions, refresh_rollups, tenure_bucket,
+    tenure_distribution
+)
+
+TODAY = date(2024, 1, 1)
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
+
+def add_profile(slug, jobs):
+    """Create a profile with ``(company, role_type, start, end)`` jobs."""
+    profile = Profile(name=slug, linkedin_url=f"https://www.linkedin.com/in/{slug}")
+    db.session.add(profile)
+    db.session.flush()
+    for company, role_type, start, end in jobs:
+        db.session.add(JobHistory(profile_id=profile.id, company_name=company, role="Engineer",
+                                  role_type=role_type, start_date=start, end_date=end))
+    db.session.commit()
+    return profile
+
+def test_approximate_percentile():
+    """Test that percentiles interpolate within buckets and respect the observed range."""
+    assert tenure_bucket(0) == 0
+    assert tenure_bucket(13) == 4
+    assert tenure_bucket(500) == 14
+    histogram = [0] * 15
+    histogram[tenure_bucket(12)] = 4
+    assert approximate_percentile(histogram, 0.5, 12, 17) == 14.5
+    assert approximate_percentile([0] * 15, 0.5, 0, 0) is None
+
+def test_rollups_refresh_incrementally(app):
+    """Test that rollups match the jobs and follow edits and deletions."""
+    jane = add_profile('jane', [
+        ("Acme Inc", "Full-time", date(2015, 1, 1), date(2017, 1, 1)),
+        ("Globex", "Full-time", date(2017, 1, 1), None),
+    ])
+    add_profile('john', [
+        ("Acme", "Internship", date(2016, 1, 1), date(2016, 7, 1)),
+        ("Globex", "Full-time", date(2016, 7, 1), date(2018, 7, 1)),
+    ])
+
+    report = refresh_rollups(today=TODAY)
+    assert report['profiles'] == 2
+    assert report['jobs'] == 4
+    acme = tenure_distribution('company', key="ACME, Inc.")[0]
+    assert acme['job_count'] == 2
+    assert (acme['min_months'], acme['max_months']) == (6, 24)
+    assert tenure_distribution('role_type', key='Internship')[0]['job_count'] == 1
+    assert tenure_distribution('start_year', key=2016)[0]['job_count'] == 2
+    assert company_transitions(from_company="Acme") == [
+        {'from_company': "Acme Inc", 'to_company': "Globex", 'transition_count': 2}
+    ]
+
+    assert refresh_rollups(today=TODAY)['profiles'] == 0
+
+    job = JobHistory.query.filter_by(profile_id=jane.id, company_name="Globex").one()
+    job.company_name = "Initech"
+    job.updated_at = datetime(2030, 1, 1)
+    db.session.commit()
+    assert refresh_rollups(today=TODAY)['profiles'] == 1
+    assert [t['to_company'] for t in company_transitions(from_company="Acme")] == ["Globex", "Initech"]
+    assert tenure_distribution('company', key="Initech")[0]['job_count'] == 1
+
+    db.session.delete(jane)
+    db.session.commit()
+    assert refresh_rollups(today=TODAY)['profiles'] == 1
+    assert tenure_distribution('company', key="Initech") == []
+    assert tenure_distribution('company', key="Acme")[0]['job_count'] == 1
+
+    before = {(r.dimension, r.dimension_key, r.job_count) for r in TenureRollup.query}
+    assert refresh_rollups(full=True, today=TODAY)['profiles'] == 1
+    assert {(r.dimension, r.dimension_key, r.job_count) for r in TenureRollup.query} == before
+
+def test_open_job_tenure_ages_without_profile_changes(app):
+    """Test that a refresh ages open jobs even when no profile changed."""
+    add_profile('jane', [("Acme", "Full-time", date(2023, 1, 1), None)])
+    refresh_rollups(today=TODAY)
+    assert tenure_distribution('company', key="Acme")[0]['max_months'] == 12
+
+    report = refresh_rollups(today=date(2025, 1, 1))
+    assert report['profiles'] == 0
+    assert report['aged_open_jobs'] == 1
+    cohort = tenure_distribution('company', key="Acme")[0]
+    assert (cohort['min_months'], cohort['max_months']) == (24, 24)
+    assert tenure_distribution('start_year', key=2023)[0]['max_months'] == 24
+    assert refresh_rollups(today=date(2025, 1, 1))['aged_open_jobs'] == 0
+
+def test_transitions_count_sequential_jobs_only(app):
+    """Test that side roles and overlapping jobs are not counted as transitions."""
+    add_profile('jane', [
+        ("Acme", "Full-time", date(2015, 1, 1), date(2019, 1, 1)),
+        ("Board Co", "Part-time", date(2016, 1, 1), date(2017, 1, 1)),
+        ("Advisory", "Contract", date(2017, 6, 1), date(2020, 1, 1)),
+        ("Globex", "Full-time", date(2018, 12, 15), None),
+    ])
+    refresh_rollups(today=TODAY)
+
+    assert company_transitions(from_company="Acme") == [
+        {'from_company': "Acme", 'to_company': "Globex", 'transition_count': 1}
+    ]
+    assert company_transitions(from_company="Board Co") == []
+    assert company_transitions(to_company="Board Co") == []
+    assert company_transitions(to_company="Advisory") == []
+    assert company_transitions(from_company="Globex") == []
+
+def test_aggregate_endpoints(app, client):
+    """Test the tenure and transition endpoints."""
+    add_profile('jane', [
+        ("Acme", "Contract", date(2015, 1, 1), date(2017, 1, 1)),
+        ("Globex", "Contract", date(2017, 1, 1), date(2018, 1, 1)),
+    ])
+    refresh_rollups(today=TODAY)
+
+    response = client.get('/analytics/tenure?dimension=role_type')
+    assert response.status_code == 200
+    cohort = response.get_json()[0]
+    assert cohort['key'] == 'Contract'
+    assert cohort['job_count'] == 2
+    assert cohort['mean_months'] == 18
+    assert 12 <= cohort['p50_months'] <= 24
+
+    response = client.get('/analytics/transitions?to=globex')
+    assert response.get_json()[0]['transition_count'] == 1
+    assert client.get('/analytics/tenure?dimension=bogus').status_code == 400
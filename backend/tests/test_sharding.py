@@ -0,0 +1,193 @@
+import pytest
+from collections import Counter
+from datetime import date, datetime
+from app import create_app
+from config import TestingConfig
+from extensions import db
+from models import (
+    Profile, JobHistory, Education, ProfileTag, ProfileVersion, ProfileDocument, RefreshIssue, TenureFact
+)
+from services.batch_service import BatchService
+from services.profile_fetcher import save_profile
+from services.refresh_scheduler import RefreshScheduler
+from services.shard_service import shard_for, shard_set
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Create an app with three SQLite shards."""
+    urls = {name: f"sqlite:///{tmp_path / name}.sqlite" for name in ('a', 'b', 'c')}
+    monkeypatch.setattr(TestingConfig, 'SHARD_DATABASE_URLS', urls)
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        for engine in shard_set.engines.values():
+            db.metadata.create_all(engine)
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
+
+def make_profile(slug, company="Acme"):
+    profile = Profile(name=slug.title(), linkedin_url=f"https://www.linkedin.com/in/{slug}")
+    profile.jobs = [JobHistory(company_name=company, role="Engineer", start_date=date(2020, 1, 1))]
+    profile.education = [Education(institution="State University")]
+    profile.tags = [ProfileTag(tag_name="vip")]
+    version = ProfileVersion(version_number=1)
+    version.set_data({'name': slug})
+    profile.versions = [version]
+    return profile
+
+def test_placement_is_stable_and_minimal():
+    """Test that placement ignores URL spelling and adding a shard moves about 1/n of keys."""
+    assert shard_for("https://linkedin.com/in/Jane/", "ab") == shard_for("https://www.linkedin.com/in/jane", "ab")
+
+    urls = [f"https://www.linkedin.com/in/user{i}" for i in range(2000)]
+    before = {url: shard_for(url, ['a', 'b', 'c']) for url in urls}
+    after = {url: shard_for(url, ['a', 'b', 'c', 'd']) for url in urls}
+    moved = [url for url in urls if before[url] != after[url]]
+    assert all(after[url] == 'd' for url in moved)
+    assert 350 < len(moved) < 650
+    assert min(Counter(before.values()).values()) > 550
+
+def test_scatter_gather_reads(app):
+    """Test placement with children, merged listing, search and export."""
+    slugs = [f"user{i:02d}" for i in range(30)]
+    for slug in slugs:
+        shard_set.add_profile(make_profile(slug, company="Globex" if slug == "user07" else "Acme"))
+
+    counts = shard_set.scatter(lambda session, shard: session.query(Profile).count())
+    assert sum(counts.values()) == 30
+    assert all(counts.values())
+
+    profile = shard_set.get_profile("https://www.linkedin.com/in/user03")
+    assert [job.company_name for job in profile.jobs] == ["Acme"]
+    assert len(profile.versions) == 1
+
+    page = shard_set.list_profiles(limit=5, offset=10)
+    assert [item['name'] for item in page] == [slug.title() for slug in slugs[10:15]]
+    newest = shard_set.list_profiles(sort='linkedin_url', descending=True, limit=3)
+    assert [item['linkedin_url'][-6:] for item in newest] == ['user29', 'user28', 'user27']
+
+    assert [item['name'] for item in shard_set.search_profiles("globex")] == ["User07"]
+    assert len(shard_set.search_profiles("user1")) == 10
+    # LIKE wildcards in the search text match literally
+    assert shard_set.search_profiles("%") == []
+    assert shard_set.search_profiles("r_0") == []
+
+    exported = list(shard_set.export_profiles(batch_size=4))
+    assert [document['linkedin_url'] for document in exported] == sorted(
+        f"https://www.linkedin.com/in/{slug}" for slug in slugs)
+    assert exported[0]['tags'] == ['vip']
+
+def test_rebalance_after_adding_a_shard(app):
+    """Test that rebalancing moves misplaced profiles with their children."""
+    engines = app.extensions['shard_engines']
+    added = engines.pop('c')
+    for i in range(40):
+        shard_set.add_profile(make_profile(f"user{i}"))
+    engines['c'] = added
+
+    assert shard_set.rebalance(dry_run=True)['moved'] == shard_set.rebalance(batch_size=7)['moved'] > 0
+    assert shard_set.rebalance()['moved'] == 0
+
+    for shard in engines:
+        with shard_set.session(shard) as session:
+            for profile in session.query(Profile):
+                assert shard_for(profile.linkedin_url, engines) == shard
+                assert len(profile.jobs) == len(profile.education) == len(profile.versions) == 1
+            assert session.query(JobHistory).count() == session.query(Profile).count()
+            assert session.query(ProfileDocument).count() == session.query(Profile).count()
+
+def test_delete_and_move_remove_derived_rows(app):
+    """Test that deleting or moving a profile removes its documents, facts and refresh issues."""
+    engines = app.extensions['shard_engines']
+    added = engines.pop('c')
+    slugs = [f"user{i}" for i in range(20)]
+    for slug in slugs:
+        shard = shard_set.add_profile(make_profile(slug))
+        with shard_set.session(shard) as session:
+            profile_id = session.query(Profile.id).filter_by(
+                linkedin_url=f"https://www.linkedin.com/in/{slug}").scalar()
+            session.add(TenureFact(profile_id=profile_id, job_history_id=1, company_key="acme",
+                                   company_name="Acme", role_type="Full-time", start_year=2020,
+                                   start_date=date(2020, 1, 1), is_open=True, tenure_months=1,
+                                   tenure_bucket=0))
+            session.add(RefreshIssue(profile_id=profile_id, issued_at=datetime(2024, 1, 1)))
+            session.commit()
+    engines['c'] = added
+
+    assert shard_set.delete_profile("https://linkedin.com/in/USER0/")
+    assert not shard_set.delete_profile("https://www.linkedin.com/in/user0")
+    moved = shard_set.rebalance()['moved']
+    assert moved > 0
+
+    remaining = facts = 0
+    for shard in engines:
+        with shard_set.session(shard) as session:
+            profile_ids = {profile_id for profile_id, in session.query(Profile.id)}
+            remaining += len(profile_ids)
+            assert {row.profile_id for row in session.query(ProfileDocument)} == profile_ids
+            fact_ids = {row.profile_id for row in session.query(TenureFact)}
+            assert fact_ids <= profile_ids
+            assert {row.profile_id for row in session.query(RefreshIssue)} == fact_ids
+            facts += len(fact_ids)
+    assert remaining == 19
+    # Derived rows stay behind with the source and are dropped there
+    assert facts == 19 - moved
+
+def test_profile_crud_goes_through_shards(app, client):
+    """Test that fetched profiles are stored on their shard and served by the URL endpoints."""
+    save_profile("https://www.linkedin.com/in/jane", {'name': "Jane"}, fetched_at=datetime(2024, 1, 1))
+    save_profile("https://www.linkedin.com/in/jane", {'name': "Jane D"}, fetched_at=datetime(2024, 2, 1))
+    owner = shard_set.shard_for("https://www.linkedin.com/in/jane")
+    for shard in shard_set.engines:
+        with shard_set.session(shard) as session:
+            assert session.query(Profile).count() == (1 if shard == owner else 0)
+            assert session.query(ProfileVersion).count() == (2 if shard == owner else 0)
+    assert Profile.query.count() == 0
+
+    response = client.get('/profiles/by-url?linkedin_url=https://linkedin.com/in/Jane')
+    assert response.status_code == 200
+    assert response.get_json()['name'] == "Jane D"
+    assert response.get_json()['shard'] == owner
+
+    listing = client.get('/profiles?sort=linkedin_url&order=desc').get_json()
+    assert [item['name'] for item in listing] == ["Jane D"]
+    assert listing[0]['last_updated'] == "2024-02-01T00:00:00"
+    assert client.get('/profiles/search?q=jane').get_json()[0]['shard'] == owner
+    assert client.get('/profiles?sort=bogus').status_code == 400
+
+    history = client.get('/profiles/by-url/history?linkedin_url=https://linkedin.com/in/jane').get_json()
+    assert [version['data']['name'] for version in history] == ["Jane", "Jane D"]
+    response = client.get('/profiles/by-url/history',
+                          query_string={'linkedin_url': "https://linkedin.com/in/jane", 'as_of': "2024-01-15"})
+    assert response.get_json()['data']['name'] == "Jane"
+    # Ids are only unique within a shard, so the by-id endpoints refuse to guess
+    for path in ('/profiles/1', '/profiles?ids=1', '/profiles/1/history'):
+        assert client.get(path).status_code == 400
+
+    assert client.delete('/profiles/by-url?linkedin_url=https://www.linkedin.com/in/jane').status_code == 204
+    assert client.get('/profiles/by-url/history?linkedin_url=https://www.linkedin.com/in/jane').status_code == 404
+    assert client.get('/profiles/by-url?linkedin_url=https://www.linkedin.com/in/jane').status_code == 404
+
+def test_refresh_scheduler_ranks_every_shard(app):
+    """Test that the scheduler ranks profiles on every shard and tells equal ids apart."""
+    for i in range(9):
+        shard_set.add_profile(make_profile(f"user{i}"))
+    scheduler = RefreshScheduler(batch=BatchService())
+    scheduler.budget = 20
+
+    assert scheduler.run_once().total == 9
+    issued = scheduler.issued_in_window()
+    assert len(set(issued)) == 9
+    assert {shard for shard, _ in issued} == {'a', 'b', 'c'}
+    # Ids repeat across shards, so they are only unique together with the shard
+    assert len({profile_id for _, profile_id in issued}) < 9
+    # Every profile was issued in this window
+    assert scheduler.run_once() is None
+    assert scheduler.budget_remaining() == 11
@@ -0,0 +1,81 @@
+import pytest
+from datetime import date, datetime
+from app import create_app
+from extensions import db
+from models import Profile, JobHistory, ProfileSkill, Skill
+from services.skill_service import SkillMatcher, extract_skills
+
+@pytest.fixture
+def app():
+    """Create and configure a Flask app for testing."""
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def profile(app):
+    """Create a profile with two jobs."""
+    profile = Profile(name="Jane Smith", linkedin_url="https://www.linkedin.com/in/janesmith")
+    db.session.add(profile)
+    db.session.flush()
+    db.session.add_all([
+        JobHistory(profile_id=profile.id, company_name="Tech Corp", role="Engineer",
+                   start_date=date(2018, 1, 1), description="Built Python and C++ services on AWS."),
+        JobHistory(profile_id=profile.id, company_name="Data Inc", role="Analyst",
+                   start_date=date(2016, 1, 1), description=None),
+    ])
+    db.session.commit()
+    return profile
+
+def skill_names(job):
+    return sorted(link.skill.name for link in ProfileSkill.query.filter_by(job_history_id=job.id))
+
+def test_skill_matcher_boundaries_and_aliases():
+    """Test longest-match, boundaries, aliases and case-insensitivity."""
+    matcher = SkillMatcher({
+        'Java': [], 'JavaScript': ['js'], 'C': [], 'C++': [], 'Node.js': [],
+        'Machine Learning': ['ml'], 'Kubernetes': ['k8s']
+    })
+    counts = matcher.extract(
+        "JavaScript and JS on Node.js; some java, C and c++.\n"
+        "Machine\nlearning with ML on K8s. Javanese is not a skill."
+    )
+    assert counts == {
+        'JavaScript': 2, 'Node.js': 1, 'Java': 1, 'C': 1, 'C++': 1,
+        'Machine Learning': 2, 'Kubernetes': 1
+    }
+    assert matcher.extract(None) == {}
+
+def test_extract_skills_is_incremental(app, profile):
+    """Test that only new or changed job descriptions are reprocessed."""
+    report = extract_skills(workers=0)
+    assert report['processed'] == 2
+    assert report['skill_links'] == 3
+    assert Skill.query.filter_by(name='Python').count() == 1
+
+    job = JobHistory.query.filter_by(company_name="Tech Corp").one()
+    original_updated_at = job.updated_at
+    assert skill_names(job) == ['AWS', 'C++', 'Python']
+    assert job.skills_extracted_at == original_updated_at
+
+    assert extract_skills(workers=0)['processed'] == 0
+
+    job.description = "Moved to Golang and Kubernetes."
+    job.updated_at = datetime(2030, 1, 1)
+    db.session.commit()
+
+    report = extract_skills(workers=0)
+    assert report['processed'] == 1
+    assert skill_names(job) == ['Golang', 'Kubernetes']
+
+    assert extract_skills(workers=0, full=True)['processed'] == 2
+
+def test_extract_skills_process_pool(app, profile):
+    """Test extraction through the process pool."""
+    report = extract_skills(workers=2, batch_size=1)
+    assert report['processed'] == 2
+    assert ProfileSkill.query.filter_by(profile_id=profile.id).count() == 3
@@ -0,0 +1,207 @@
+import json
+import os
+import threading
+import pytest
+from datetime import datetime, timedelta
+from app import create_app
+from config import TestingConfig
+from extensions import db
+from models import Profile, ProfileVersion
+from services.refresh_scheduler import RefreshScheduler
+from services.shard_service import shard_set
+from services.version_archive import VersionArchive, profile_history, version_archive, version_as_of
+
+NOW = datetime(2026, 1, 1)
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Create an app archiving versions to a temporary directory."""
+    monkeypatch.setattr(TestingConfig, 'VERSION_ARCHIVE_DIR', str(tmp_path / 'versions'))
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        version_archive.close()
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
+
+def add_profile(slug, count):
+    """A profile with ``count`` consecutive versions, one every 100 days, ending before NOW."""
+    profile = Profile(name=slug, linkedin_url=f"https://www.linkedin.com/in/{slug}")
+    start = NOW - timedelta(days=100 * count)
+    for i in range(count):
+        profile.versions.append(ProfileVersion(
+            version_number=i + 1,
+            data_snapshot=json.dumps({'title': f"v{i + 1}"}),
+            valid_from=start + timedelta(days=100 * i),
+            valid_to=start + timedelta(days=100 * (i + 1)) if i + 1 < count else None
+        ))
+    db.session.add(profile)
+    db.session.commit()
+    return profile
+
+def titles(versions):
+    return [version.get_data()['title'] for version in versions]
+
+def test_archive_moves_closed_versions_and_keeps_latest(app):
+    """Test that versions closed before the cutoff leave the table and the latest stays hot."""
+    profile = add_profile("jane", 6)
+    report = version_archive.archive(cutoff=NOW - timedelta(days=150), batch_size=2)
+
+    assert report['archived'] == 4
+    assert len(report['segments']) == 2
+    hot = ProfileVersion.query.filter_by(profile_id=profile.id).order_by(ProfileVersion.version_number)
+    assert [version.version_number for version in hot] == [5, 6]
+    assert version_archive.archive(cutoff=NOW)['archived'] == 1
+    assert ProfileVersion.query.filter_by(profile_id=profile.id).count() == 1
+
+def test_history_and_as_of_read_across_archive(app):
+    """Test that history and as-of lookups return the same answers before and after archiving."""
+    jane, bo = add_profile("jane", 5), add_profile("bo", 3)
+    probes = [NOW - timedelta(days=days) for days in (450, 350, 250, 150, 50, 0)]
+    before = {profile.id: (titles(profile_history(profile.id)),
+                           [version_as_of(profile.id, at) and version_as_of(profile.id, at).get_data()
+                            for at in probes])
+              for profile in (jane, bo)}
+
+    version_archive.archive(cutoff=NOW)
+    assert ProfileVersion.query.count() == 2
+    after = {profile.id: (titles(profile_history(profile.id)),
+                          [version_as_of(profile.id, at) and version_as_of(profile.id, at).get_data()
+                           for at in probes])
+             for profile in (jane, bo)}
+    assert after == before
+    assert before[jane.id][0] == ["v1", "v2", "v3", "v4", "v5"]
+    assert version_as_of(jane.id, NOW - timedelta(days=600)) is None
+
+def test_interrupted_archive_is_not_duplicated(app):
+    """Test that rows already written to a segment are only deleted when the archive is re-run."""
+    profile = add_profile("jane", 3)
+    rows = db.session.execute(
+        db.select(*ProfileVersion.__table__.columns).where(ProfileVersion.version_number < 3)
+        .order_by(ProfileVersion.version_number)).all()
+    version_archive.write_segment(rows)
+
+    report = version_archive.archive(cutoff=NOW)
+    assert report['archived'] == 0 and report['segments'] == []
+    assert titles(profile_history(profile.id)) == ["v1", "v2", "v3"]
+
+def test_segments_are_compressed_and_indexed(app, tmp_path):
+    """Test that a segment holds compressed records with a fixed-width index entry each."""
+    profile = Profile(name="jane", linkedin_url="https://www.linkedin.com/in/jane")
+    snapshot = json.dumps({'summary': "Engineer " * 200})
+    for i in range(3):
+        profile.versions.append(ProfileVersion(
+            version_number=i + 1, data_snapshot=snapshot,
+            valid_from=NOW - timedelta(days=3 - i), valid_to=NOW - timedelta(days=2 - i)))
+    db.session.add(profile)
+    db.session.commit()
+
+    name = version_archive.archive(cutoff=NOW)['segments'][0]
+    directory = tmp_path / 'versions'
+    assert os.path.getsize(directory / f"{name}.seg") < 2 * len(snapshot)
+    assert version_archive.segments()[0].count == 2
+
+def test_scheduler_counts_archived_versions(app):
+    """Test that archived versions still count towards the refresh change-rate estimate."""
+    profile = add_profile("jane", 5)
+    profile.last_updated = NOW - timedelta(days=30)
+    db.session.commit()
+    scheduler = RefreshScheduler(app)
+    before = scheduler.rank(1, now=NOW)[0].change_rate
+
+    version_archive.archive(cutoff=NOW)
+    assert scheduler.rank(1, now=NOW)[0].change_rate == pytest.approx(before)
+
+def test_history_endpoint(client, app):
+    """Test that the history endpoint lists archived versions and answers as-of queries."""
+    profile = add_profile("jane", 3)
+    version_archive.archive(cutoff=NOW)
+
+    response = client.get(f'/profiles/{profile.id}/history')
+    assert [version['data']['title'] for version in response.get_json()] == ["v1", "v2", "v3"]
+    at = (NOW - timedelta(days=250)).isoformat()
+    assert client.get(f'/profiles/{profile.id}/history?as_of={at}').get_json()['version_number'] == 1
+    assert client.get(f'/profiles/{profile.id}/history?as_of=1990-01-01').status_code == 404
+    assert client.get('/profiles/999/history').status_code == 404
+
+    response = client.get('/profiles/by-url/history', query_string={'linkedin_url': profile.linkedin_url})
+    assert response.get_json() == client.get(f'/profiles/{profile.id}/history').get_json()
+
+def test_history_endpoint_accepts_offsets(client, app):
+    """Test that as-of times with a UTC offset are converted instead of failing."""
+    profile = add_profile("jane", 3)
+    version_archive.archive(cutoff=NOW)
+
+    at = NOW - timedelta(days=150)
+    naive = client.get(f'/profiles/{profile.id}/history?as_of={at.isoformat()}')
+    aware = client.get(f'/profiles/{profile.id}/history', query_string={'as_of': f"{at.isoformat()}+00:00"})
+    assert aware.status_code == 200
+    assert aware.get_json() == naive.get_json()
+    # v2 starts at midnight; 01:00 at +02:00 is 23:00 UTC the day before, still v1
+    shifted = (NOW - timedelta(days=200)).replace(hour=1).isoformat() + "+02:00"
+    response = client.get(f'/profiles/{profile.id}/history', query_string={'as_of': shifted})
+    assert response.get_json()['version_number'] == 1
+    assert client.get(f'/profiles/{profile.id}/history?as_of=yesterday').status_code == 400
+
+def test_deleted_profiles_do_not_leak_into_reused_ids(app):
+    """Test that archived versions of a deleted profile are hidden, also from a profile reusing its id."""
+    jane = add_profile("jane", 4)
+    jane_id = jane.id
+    version_archive.archive(cutoff=NOW)
+    db.session.delete(jane)
+    db.session.commit()
+    assert profile_history(jane_id) == []
+    assert jane_id not in version_archive.version_stats()
+
+    # SQLite hands the freed id to the next profile
+    now = datetime.utcnow()
+    bo = Profile(name="bo", linkedin_url="https://www.linkedin.com/in/bo")
+    bo.versions = [
+        ProfileVersion(version_number=1, data_snapshot=json.dumps({'title': "b1"}),
+                       valid_from=now, valid_to=now + timedelta(seconds=1)),
+        ProfileVersion(version_number=2, data_snapshot=json.dumps({'title': "b2"}),
+                       valid_from=now + timedelta(seconds=1)),
+    ]
+    db.session.add(bo)
+    db.session.commit()
+    assert bo.id == jane_id
+
+    assert version_archive.archive(cutoff=now + timedelta(days=1))['archived'] == 1
+    assert titles(profile_history(bo.id)) == ["b1", "b2"]
+    assert version_archive.version_stats()[bo.id][0] == 1
+    assert version_as_of(bo.id, NOW - timedelta(days=250)) is None
+
+def test_shard_deletions_are_tombstoned(app):
+    """Test that deleting a profile through the shard set tombstones its archived versions."""
+    jane = add_profile("jane", 3)
+    version_archive.archive(cutoff=NOW)
+    assert shard_set.delete_profile(jane.linkedin_url)
+    assert profile_history(jane.id) == []
+
+def test_concurrent_writers_use_distinct_segments(app, tmp_path):
+    """Test that writers of separate archive instances never pick the same segment name."""
+    add_profile("jane", 2)
+    rows = db.session.execute(db.select(*ProfileVersion.__table__.columns)).all()
+    archives = [VersionArchive(app) for _ in range(4)]
+    names = []
+
+    def write(archive):
+        for _ in range(5):
+            names.append(archive.write_segment(rows))
+
+    threads = [threading.Thread(target=write, args=(archive,)) for archive in archives]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for archive in archives:
+        archive.close()
+    assert len(set(names)) == 20
+    assert len(version_archive.segments()) == 20
@@ -0,0 +1,27 @@
+"""Session class that can send reads to a read replica.
+
+The session reads from the app's replica engine (registered by
+``services.replica_router``) only while ``session.info['use_replica']`` is
+set. Any write (a flush, or an INSERT/UPDATE/DELETE statement) pins the
+rest of the session to the primary so it reads its own writes.
+"""
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+# app.extensions key of the replica engine
+REPLICA_ENGINE = 'replica_engine'
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session routing reads to the replica when asked to."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or isinstance(clause, UpdateBase):
+                self.info['wrote'] = True
+            elif self.info.get('use_replica') and not self.info.get('wrote'):
+                engine = current_app.extensions.get(REPLICA_ENGINE)
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,43 @@
+"""LinkedIn URL validation and canonicalization helpers."""
+from urllib.parse import urlsplit
+
+# URL prefixes accepted as LinkedIn profile URLs
+LINKEDIN_URL_PREFIXES = (
+    'https://www.linkedin.com/', 'http://www.linkedin.com/',
+    'https://linkedin.com/', 'http://linkedin.com/'
+)
+
+CANONICAL_LINKEDIN_ROOT = 'https://www.linkedin.com/'
+
+
+def validate_linkedin_url(url):
+    """Validate that the LinkedIn URL is properly formatted."""
+    if not url:
+        raise ValueError("LinkedIn URL cannot be empty")
+
+    if not url.startswith(LINKEDIN_URL_PREFIXES):
+        raise ValueError("Invalid LinkedIn URL format")
+
+    return url
+
+
+def canonicalize_linkedin_url(url):
+    """Return the canonical form of a LinkedIn URL.
+
+    The URL must pass ``validate_linkedin_url`` once surrounding whitespace
+    is removed and the scheme/host are lowercased. The canonical form always
+    uses ``https://www.linkedin.com/``, drops the query string and fragment,
+    lowercases the path (LinkedIn vanity names are case-insensitive) and
+    strips the trailing slash.
+    """
+    url = (url or '').strip()
+    parts = urlsplit(url)
+    if parts.scheme and parts.netloc:
+        url = f"{parts.scheme.lower()}://{parts.netloc.lower()}{parts.path}"
+    validate_linkedin_url(url)
+
+    path = urlsplit(url).path.strip('/').lower()
+    if not path:
+        raise ValueError("LinkedIn URL has no profile path")
+
+    return CANONICAL_LINKEDIN_ROOT + path
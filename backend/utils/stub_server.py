@@ -0,0 +1,130 @@
+"""Local stand-in for the LinkedIn data source, for tests and benchmarks.
+
+Serves JSON profiles at ``/in/<slug>`` over HTTP/1.1 with keep-alive,
+``ETag``/``Last-Modified`` validators and ``304 Not Modified`` replies, and
+counts connections and requests so tests can check pooling, caching and
+coalescing. Profiles that were not set explicitly are generated from the
+slug.
+"""
+import hashlib
+import json
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.count('connections')
+
+    def do_GET(self):
+        server = self.server
+        server.count('requests')
+        if server.latency:
+            time.sleep(server.latency)
+        if server.token and self.headers.get('Authorization') != f"Bearer {server.token}":
+            return self._send(401, b'{"error": "unauthorized"}')
+
+        resource = server.resource(self.path)
+        if resource is None:
+            return self._send(404, b'{"error": "not found"}')
+        body, modified_at = resource
+        etag = '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+        validators = {'ETag': etag, 'Last-Modified': formatdate(modified_at, usegmt=True)}
+
+        if self._not_modified(etag, modified_at):
+            server.count('not_modified')
+            return self._send(304, b'', validators)
+        self._send(200, body, validators)
+
+    def _not_modified(self, etag, modified_at):
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(',')]
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return int(modified_at) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body and status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded stand-in server; use as a context manager or call ``start``/``stop``."""
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, token=None):
+        super().__init__((host, port), _StubHandler)
+        self.latency = latency
+        self.token = token
+        self.counters = {'connections': 0, 'requests': 0, 'not_modified': 0}
+        self._profiles = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, slug):
+        return f"{self.base_url}/in/{slug}"
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def set_profile(self, slug, data):
+        """Set or change a profile; its validators change with it."""
+        with self._lock:
+            self._profiles[slug] = (json.dumps(data, sort_keys=True).encode('utf-8'), time.time())
+
+    def resource(self, path):
+        """``(body, modified timestamp)`` for a path, or None."""
+        if not path.startswith('/in/'):
+            return None
+        slug = path[len('/in/'):].split('?', 1)[0].strip('/')
+        if not slug:
+            return None
+        with self._lock:
+            if slug not in self._profiles:
+                data = {'slug': slug, 'name': slug.replace('-', ' ').title()}
+                self._profiles[slug] = (json.dumps(data, sort_keys=True).encode('utf-8'), time.time())
+            return self._profiles[slug]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True, name='stub-server')
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()